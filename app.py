@@ -1,10 +1,130 @@
 import streamlit as st
 import prognose_tool_ethisch
+import einlesen
+import trainings_jobs
+import modell_store
+import messung
 import pandas as pd
 import os
+import time
+import hashlib
+import kandidaten_index
+import diagramme
+import export
+import ueberwachung
 import tempfile
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+
+# Streamlit führt das Skript bei jeder Interaktion neu aus. Geparste Uploads und
+# Prognosen werden daher pro Upload-Hash (und Modellstand) zwischengespeichert.
+# cache_resource statt cache_data: die DataFrames werden nicht bei jedem Zugriff
+# kopiert; sie werden hier nur gelesen, nie verändert.
+CACHE_TTL_S = 3600
+CACHE_MAX_EINTRAEGE = 8
+
+
+# Ein oder mehrere hochgeladene Dateien (z. B. eine je Geschäftsstelle)
+def upload_hash(uploaded_file):
+    if not isinstance(uploaded_file, list):
+        return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    h = hashlib.sha256()
+    for datei in uploaded_file:
+        h.update(datei.name.encode("utf-8"))
+        h.update(hashlib.sha256(datei.getvalue()).digest())
+    return h.hexdigest()
+
+
+# Stand des aktiven Modells (Version im Modellspeicher, sonst Zeitstempel des Altmodells)
+def modell_stand():
+    version = modell_store.aktuelle_version()
+    if version is not None:
+        return version
+    pfad = modell_store.modell_pfad()
+    return str(os.stat(pfad).st_mtime_ns) if os.path.exists(pfad) else None
+
+
+# Führende Unterstriche: Argument geht nicht in den Cache-Schlüssel ein
+@st.cache_resource(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def upload_lesen(datei_hash, _uploaded_file):
+    if isinstance(_uploaded_file, list):
+        # Mehrere Arbeitsmappen werden parallel geparst und mit Spalte "Quelldatei" zusammengeführt
+        df = einlesen.lese_mehrere([datei.getvalue() for datei in _uploaded_file],
+                                   namen=[datei.name for datei in _uploaded_file])
+    else:
+        df = einlesen.lese_tabelle(_uploaded_file.getvalue())
+    kandidaten = None
+    if 'Nachname' in df.columns and 'Vorname' in df.columns:
+        kandidaten = kandidaten_index.KandidatenIndex(df)
+    return df, kandidaten
+
+
+# Große Tabellen seitenweise anzeigen; an den Browser geht nur die aktuelle Seite
+ZEILEN_PRO_SEITE = 1000
+MAX_AUSWAHL = 200
+
+
+def seite_auswaehlen(df, key, zeilen_pro_seite=ZEILEN_PRO_SEITE):
+    seiten = max(1, -(-len(df) // zeilen_pro_seite))
+    seite = 1
+    if seiten > 1:
+        seite = st.number_input(f"Seite (1–{seiten})", min_value=1, max_value=seiten, value=1, key=key)
+    start = (seite - 1) * zeilen_pro_seite
+    ende = min(start + zeilen_pro_seite, len(df))
+    if seiten > 1:
+        st.caption(f"Zeilen {start + 1}–{ende} von {len(df)}")
+    return df.iloc[start:ende]
+
+
+# Prognosen für die gesamte Datei, einmal pro Upload und Modellstand
+@st.cache_resource(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def prognosen_lesen(datei_hash, stand, _df):
+    # Inkrementell: bei erneutem Upload mit wenigen geänderten Zeilen wird nur der Rest bewertet
+    ergebnisse = prognose_tool_ethisch.prognose_excel(_df, inkrementell=True)
+    if 'Prognose-Score (%)' in ergebnisse.columns:
+        ergebnisse = ergebnisse.rename(columns={'Prognose-Score (%)': 'Eignungs-Score (%)'})
+    return ergebnisse
+
+# Export der Ergebnisse als Datei im Temp-Verzeichnis, einmal pro Upload, Modellstand
+# und Format; der Download liest die Datei, statt eine zweite Kopie als Bytes zu bauen
+EXPORT_VERZEICHNIS = os.path.join(tempfile.gettempdir(), "prognose_export")
+
+
+@st.cache_resource(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def export_datei(datei_hash, stand, format, _ergebnisse):
+    os.makedirs(EXPORT_VERZEICHNIS, exist_ok=True)
+    pfad = os.path.join(EXPORT_VERZEICHNIS, f"{datei_hash}_{stand}{export.FORMATE[format]}")
+    return export.exportieren(_ergebnisse, pfad, format)
+
+# Beiträge der Merkmale für alle Bewerber der Datei, einmal pro Upload und Modellstand
+@st.cache_resource(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def erklaerungen_lesen(datei_hash, stand, _df):
+    return prognose_tool_ethisch.erklaerung_excel(_df)
+
+
+# Warum dieser Score? Beiträge je Merkmal in Prozentpunkten relativ zum Ausgangswert
+def beitraege_anzeigen(basis, beitraege):
+    st.write("**Einflussfaktoren auf den Score**")
+    st.caption(f"Ausgangswert des Modells: {basis:.2f}%. Positive Werte erhöhen, "
+               "negative senken die prognostizierte Eignung (in Prozentpunkten).")
+    st.bar_chart(pd.DataFrame({"Beitrag (Prozentpunkte)": beitraege.round(2)}))
+
+# Diagramme werden als PNG zwischengespeichert (diagramme.py lädt matplotlib erst
+# beim ersten Zeichnen); die Verteilung wird einmal pro Upload und Modellstand berechnet
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def verteilung_diagramm(datei_hash, stand, _scores):
+    verteilung = diagramme.verteilung(_scores)
+    png = diagramme.verteilung_png(verteilung) if verteilung["n"] < diagramme.NATIV_AB else None
+    return verteilung, png
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=256, show_spinner=False)
+def eignung_diagramm(score):
+    return diagramme.eignung_png(score)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_EINTRAEGE, show_spinner=False)
+def wichtigkeit_diagramm(job_id, _model):
+    return diagramme.wichtigkeit_png(prognose_tool_ethisch.FEATURES, _model.feature_importances_)
 
 # Set page configuration
 st.set_page_config(
@@ -65,7 +185,7 @@ if page == "Übersicht":
     
     with col2:
         # Display a sample chart
-        if os.path.exists("prognose_model_ethisch.pkl"):
+        if modell_store.modell_vorhanden():
             st.success("Ein trainiertes Eignungsmodell wurde gefunden!")
             st.image("https://img.freepik.com/free-vector/business-team-putting-together-jigsaw-puzzle-isolated-flat-vector-illustration-cartoon-partners-working-connection-teamwork-partnership-cooperation-concept_74855-9814.jpg", 
                     caption="Effiziente Bewerberauswahl", width=300)
@@ -82,14 +202,9 @@ elif page == "Modell trainieren":
     uploaded_file = st.file_uploader("Trainingsdaten hochladen (Excel-Datei)", type=["xlsx"])
     
     if uploaded_file is not None:
-        # Save the uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(uploaded_file.getvalue())
-            tmp_path = tmp.name
-        
-        # Preview data
+        # Preview data (Arbeitsmappe wird nur einmal geparst, danach aus dem Cache gelesen)
         try:
-            df = pd.read_excel(tmp_path, sheet_name="Tabelle1")
+            df, _ = upload_lesen(upload_hash(uploaded_file), uploaded_file)
             st.write("Vorschau der Trainingsdaten:")
             st.dataframe(df.head())
             
@@ -104,40 +219,34 @@ elif page == "Modell trainieren":
                 st.write(f"Davon gekündigt: {gekuendigt}")
                 st.write(f"Anteil gekündigt: {(gekuendigt / df.shape[0] * 100):.2f}%")
             
-            # Train button
+            # Train button: Training läuft im Hintergrund, die Seite fragt nur den Status ab
             if st.button("Modell trainieren"):
-                with st.spinner('Modell wird trainiert...'):
-                    prognose_tool_ethisch.trainiere_modell(tmp_path)
-                st.success("Eignungsmodell erfolgreich trainiert!")
-                
-                # Data visualization after training
-                X, y = prognose_tool_ethisch.vorbereiten_ethisch(df, is_training=True)
-                
-                # Feature importance visualization if model exists
-                if os.path.exists("prognose_model_ethisch.pkl"):
-                    model = prognose_tool_ethisch.joblib.load("prognose_model_ethisch.pkl")
-                    feature_importance = pd.DataFrame({
-                        'Feature': X.columns,
-                        'Importance': model.feature_importances_
-                    }).sort_values('Importance', ascending=False)
+                st.session_state["trainings_job"] = trainings_jobs.einreichen(df)
+            
+            job_id = st.session_state.get("trainings_job")
+            job = trainings_jobs.status(job_id) if job_id else None
+            if job is not None:
+                if job["status"] in (trainings_jobs.WARTEND, trainings_jobs.LAEUFT):
+                    st.info(f"Modell wird trainiert... ({job['phase']})")
+                    st.progress(job["fortschritt"])
+                    time.sleep(1)
+                    st.rerun()
+                elif job["status"] == trainings_jobs.FEHLER:
+                    st.error(f"Fehler beim Training: {job['fehler']}")
+                else:
+                    st.success("Eignungsmodell erfolgreich trainiert!")
                     
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    sns.barplot(x='Importance', y='Feature', data=feature_importance, ax=ax)
-                    ax.set_title('Bedeutung der Merkmale für die Eignungsprognose')
-                    st.pyplot(fig)
+                    # Feature importance visualization
+                    st.image(wichtigkeit_diagramm(job_id, job["model"]))
         
         except Exception as e:
             st.error(f"Fehler beim Verarbeiten der Datei: {e}")
-        
-        finally:
-            # Clean up the temp file
-            os.unlink(tmp_path)
 
 # Predict page
 elif page == "Bewerber bewerten":
     st.markdown('<p class="sub-header">Bewerber-Eignungsprognose</p>', unsafe_allow_html=True)
     
-    if not os.path.exists("prognose_model_ethisch.pkl"):
+    if not modell_store.modell_vorhanden():
         st.warning("Kein trainiertes Eignungsmodell gefunden. Bitte trainieren Sie zuerst ein Modell.")
     else:
         # Tabs für verschiedene Eingabemethoden
@@ -248,12 +357,12 @@ elif page == "Bewerber bewerten":
                         st.progress(int(score) / 100)
                         
                         # Einfache Visualisierung
-                        fig, ax = plt.subplots(figsize=(10, 2))
-                        sns.barplot(x=[score], y=["Eignung"], ax=ax, palette=["green" if score >= 70 else "orange" if score >= 40 else "red"])
-                        ax.set_xlim(0, 100)
-                        ax.set_xlabel('Eignungs-Score (%)')
-                        ax.set_ylabel('')
-                        st.pyplot(fig)
+                        st.image(eignung_diagramm(float(score)))
+                        
+                        beitraege_anzeigen(*prognose_tool_ethisch.erklaerung_manuell(
+                            monatsgehalt_aktuell, monatsgehalt_einstieg,
+                            qualifikationsstufe, schulabschluss, berufabschluss
+                        ))
                 
                 except Exception as e:
                     st.error(f"Fehler bei der Prognose: {e}")
@@ -261,38 +370,39 @@ elif page == "Bewerber bewerten":
         with tab2:
             st.write("Alternativ können Sie eine Excel-Datei mit mehreren Bewerberdaten hochladen.")
             
-            uploaded_file = st.file_uploader("Bewerberdaten hochladen (Excel-Datei)", type=["xlsx"])
+            uploaded_file = st.file_uploader("Bewerberdaten hochladen (eine oder mehrere Excel-Dateien)",
+                                             type=["xlsx"], accept_multiple_files=True)
+            if len(uploaded_file) == 1:
+                uploaded_file = uploaded_file[0]
             
-            if uploaded_file is not None:
-                # Save the uploaded file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-                    tmp.write(uploaded_file.getvalue())
-                    tmp_path = tmp.name
-                
+            if uploaded_file:
                 # Preview data
                 try:
-                    # Globale Variable für die Daten
-                    df = pd.read_excel(tmp_path, sheet_name="Tabelle1")
+                    # Geparste Datei und Kandidatenliste aus dem Sitzungs-Cache
+                    datei_hash = upload_hash(uploaded_file)
+                    df, kandidaten = upload_lesen(datei_hash, uploaded_file)
                     st.write("Übersicht aller Bewerberdaten:")
-                    st.dataframe(df)
+                    st.dataframe(seite_auswaehlen(df, key="seite_bewerber"))
                     
                     # Individuelle Kandidatenauswahl 
-                    if 'Nachname' in df.columns and 'Vorname' in df.columns:
-                        # Liste der Kandidaten erstellen (Nachname, Vorname)
-                        kandidaten = [f"{row['Nachname']}, {row['Vorname']}" for _, row in df.iterrows()]
-                        
-                        # Kandidatenauswahl
+                    if kandidaten is not None:
+                        # Kandidatenauswahl über stabile Zeilen-IDs; die Präfixsuche begrenzt die Optionen
                         st.subheader("Einzelne Kandidaten bewerten")
-                        selected_kandidat = st.selectbox(
+                        suche = st.text_input("Kandidaten suchen (Anfang von „Nachname, Vorname“):",
+                                              key="kandidat_suche")
+                        treffer = kandidaten.suchen(suche, limit=MAX_AUSWAHL)
+                        if len(treffer) == MAX_AUSWAHL:
+                            st.caption(f"Es werden die ersten {MAX_AUSWAHL} Treffer angezeigt; Suche verfeinern.")
+                        elif not treffer:
+                            st.info("Kein Kandidat gefunden.")
+                        kandidat_idx = st.selectbox(
                             "Wählen Sie einen Kandidaten aus:",
-                            options=kandidaten,
+                            options=treffer,
+                            format_func=kandidaten.bezeichnung,
                             key="kandidat_auswahl"
                         )
                         
-                        if selected_kandidat:
-                            # Index des ausgewählten Kandidaten ermitteln
-                            nachname, vorname = selected_kandidat.split(", ")
-                            kandidat_idx = df[(df['Nachname'] == nachname) & (df['Vorname'] == vorname)].index[0]
+                        if kandidat_idx is not None:
                             kandidat_data = df.iloc[kandidat_idx]
                             
                             # Kandidatendetails anzeigen
@@ -318,14 +428,22 @@ elif page == "Bewerber bewerten":
                                     schul = kandidat_data['Schulabschluss']
                                     beruf = kandidat_data['Berufabschluss']
                                     
-                                    # Manuelle Prognose für diesen Kandidaten
-                                    score = prognose_tool_ethisch.prognose_manuell(
-                                        monatsgehalt_aktuell,
-                                        monatsgehalt_einstieg, 
-                                        quali,
-                                        schul,
-                                        beruf
-                                    )
+                                    # Score aus den Prognosen der gesamten Datei nachschlagen; ungültige
+                                    # Zeilen haben dort keinen Score, dann liefert die Einzelprognose
+                                    # die genaue Fehlermeldung
+                                    try:
+                                        ergebnisse = prognosen_lesen(datei_hash, modell_stand(), df)
+                                        score = float(ergebnisse['Eignungs-Score (%)'].iloc[kandidat_idx])
+                                    except ValueError:
+                                        score = float("nan")
+                                    if pd.isna(score):
+                                        score = prognose_tool_ethisch.prognose_manuell(
+                                            monatsgehalt_aktuell,
+                                            monatsgehalt_einstieg, 
+                                            quali,
+                                            schul,
+                                            beruf
+                                        )
                                     
                                     # Display result
                                     st.success(f"Eignungsprognose für {kandidat_data['Vorname']} {kandidat_data['Nachname']} erfolgreich erstellt!")
@@ -348,67 +466,98 @@ elif page == "Bewerber bewerten":
                                     st.progress(int(score) / 100)
                                     
                                     # Einfache Visualisierung
-                                    fig, ax = plt.subplots(figsize=(10, 2))
-                                    sns.barplot(x=[score], y=["Eignung"], ax=ax, palette=["green" if score >= 70 else "orange" if score >= 40 else "red"])
-                                    ax.set_xlim(0, 100)
-                                    ax.set_xlabel('Eignungs-Score (%)')
-                                    ax.set_ylabel('')
-                                    st.pyplot(fig)
+                                    st.image(eignung_diagramm(float(score)))
+                                    
+                                    # Erklärung aus dem Durchlauf über die gesamte Datei
+                                    erklaerungen = erklaerungen_lesen(datei_hash, modell_stand(), df)
+                                    zeile = erklaerungen.iloc[kandidat_idx]
+                                    if pd.isna(zeile['Basis (%)']):
+                                        beitraege_anzeigen(*prognose_tool_ethisch.erklaerung_manuell(
+                                            monatsgehalt_aktuell, monatsgehalt_einstieg, quali, schul, beruf
+                                        ))
+                                    else:
+                                        beitraege_anzeigen(zeile['Basis (%)'],
+                                                           zeile[prognose_tool_ethisch.FEATURES].astype(float))
                     else:
                         st.warning("Die Excel-Datei enthält keine Spalten für 'Nachname' und 'Vorname'. Eine individuelle Kandidatenbewertung ist nicht möglich.")
                     
                     # Make predictions button für alle Kandidaten
                     st.subheader("Alle Bewerber gleichzeitig bewerten")
                     if st.button("Eignungsprognosen für alle Bewerber erstellen", key="excel_predict"):
+                        st.session_state["prognose_fuer"] = datei_hash
+                    # Ergebnisse bleiben nach dem Klick sichtbar (weitere Interaktionen lesen aus dem Cache)
+                    if st.session_state.get("prognose_fuer") == datei_hash:
                         with st.spinner('Eignungsprognosen werden erstellt...'):
-                            # Benutze die neue Funktion für Excel-Prognosen
-                            ergebnisse = prognose_tool_ethisch.prognose_excel(tmp_path)
+                            ergebnisse = prognosen_lesen(datei_hash, modell_stand(), df)
                             
                             # Display results
                             st.success("Eignungsprognosen erfolgreich erstellt!")
+                            statistik = ergebnisse.attrs.get("inkrementell")
+                            if statistik:
+                                st.caption(f"{statistik['wiederverwendet']} von {statistik['zeilen']} Zeilen "
+                                           f"aus früheren Bewertungen übernommen, "
+                                           f"{statistik['berechnet']} Merkmalskombinationen neu bewertet.")
+                            drift = ergebnisse.attrs.get("drift")
+                            if drift:
+                                st.warning("Die Bewerberdaten weichen deutlich von den Trainingsdaten ab: "
+                                           + ", ".join(f"{name} ({status})" for name, status in drift.items())
+                                           + ". Die Prognosen sind mit Vorsicht zu interpretieren.")
+                            if 'Fehler' in ergebnisse.columns:
+                                st.warning(f"{int(ergebnisse['Eignungs-Score (%)'].isna().sum())} Zeilen mit "
+                                           "ungültigen Werten wurden nicht bewertet (siehe Spalte 'Fehler').")
                             st.write("Ergebnisse:")
                             
-                            # Rename column to reflect purpose
-                            if 'Prognose-Score (%)' in ergebnisse.columns:
-                                ergebnisse = ergebnisse.rename(columns={'Prognose-Score (%)': 'Eignungs-Score (%)'})
-                            
-                            # Display results with conditional formatting
-                            def color_score(val):
-                                color = ''
-                                if val < 40:
-                                    color = 'red'
-                                elif val < 70:
-                                    color = 'orange'
-                                else:
-                                    color = 'green'
-                                return f'background-color: {color}; color: white;'
-                            
-                            styled_output = ergebnisse.style.applymap(
-                                color_score, subset=['Eignungs-Score (%)']
+                            # Formatierung nur für die angezeigte Seite, spaltenweise statt pro Zelle
+                            styled_output = seite_auswaehlen(ergebnisse, key="seite_ergebnisse").style.apply(
+                                export.score_stile, subset=['Eignungs-Score (%)'], axis=0
                             )
                             
                             st.dataframe(styled_output)
                             
-                            # Download button for results
-                            csv = ergebnisse.to_csv(index=False).encode('utf-8')
-                            st.download_button(
-                                "Eignungsergebnisse als CSV herunterladen", 
-                                csv, 
-                                "bewerber_eignungsergebnisse.csv", 
-                                "text/csv", 
-                                key='download-csv'
-                            )
+                            # Beiträge der Merkmale für alle Bewerber (ein Durchlauf über die Datei)
+                            if st.checkbox("Einflussfaktoren für alle Bewerber anzeigen", key="erklaerungen_zeigen"):
+                                erklaerungen = erklaerungen_lesen(datei_hash, modell_stand(), df)
+                                st.caption("Beiträge in Prozentpunkten relativ zum Ausgangswert (Basis); "
+                                           "Basis + Beiträge ergeben den Eignungs-Score.")
+                                st.dataframe(seite_auswaehlen(erklaerungen, key="seite_erklaerungen"))
+                                wichtigkeiten = prognose_tool_ethisch.globale_wichtigkeiten("beitraege_mittel")
+                                if wichtigkeiten is not None:
+                                    st.write("Globale Bedeutung der Merkmale (mittlerer Betrag der Beiträge "
+                                             "in den Trainingsdaten):")
+                                    st.bar_chart(wichtigkeiten)
+                            
+                            # Export der Ergebnisse (Datei wird erst auf Anforderung geschrieben)
+                            format = st.selectbox("Exportformat", list(export.FORMATE), key="export_format")
+                            if st.button("Export erstellen", key="export_erstellen"):
+                                st.session_state["export_fuer"] = (datei_hash, format)
+                            if st.session_state.get("export_fuer") == (datei_hash, format):
+                                with st.spinner('Export wird erstellt...'):
+                                    pfad = export_datei(datei_hash, modell_stand(), format, ergebnisse)
+                                if os.path.exists(pfad):
+                                    with open(pfad, "rb") as datei:
+                                        st.download_button(
+                                            f"Eignungsergebnisse als {format.upper()} herunterladen",
+                                            datei,
+                                            f"bewerber_eignungsergebnisse{export.FORMATE[format]}",
+                                            export.MIME[format],
+                                            key=f'download-{format}'
+                                        )
+                                else:
+                                    # Temp-Datei wurde zwischenzeitlich gelöscht
+                                    export_datei.clear()
+                                    st.session_state.pop("export_fuer", None)
+                                    st.rerun()
                             
                             # Visualization
                             if 'Eignungs-Score (%)' in ergebnisse.columns:
                                 score_values = ergebnisse['Eignungs-Score (%)']
                                 
-                                fig, ax = plt.subplots(figsize=(10, 6))
-                                sns.histplot(score_values, bins=10, kde=True, ax=ax)
-                                ax.set_title('Verteilung der Eignungs-Scores')
-                                ax.set_xlabel('Eignungs-Score (%)')
-                                ax.set_ylabel('Anzahl der Bewerber')
-                                st.pyplot(fig)
+                                # Große Ergebnismengen als natives Diagramm (ohne Bild-Rendering)
+                                verteilung, png = verteilung_diagramm(datei_hash, modell_stand(), score_values.to_numpy())
+                                if png is None:
+                                    st.bar_chart(diagramme.als_tabelle(verteilung))
+                                else:
+                                    st.image(png)
                                 
                                 # Display statistics
                                 st.write(f"Durchschnittlicher Eignungs-Score: {score_values.mean():.2f}%")
@@ -417,10 +566,6 @@ elif page == "Bewerber bewerten":
                     
                 except Exception as e:
                     st.error(f"Fehler beim Verarbeiten der Datei: {e}")
-                
-                finally:
-                    # Clean up the temp file
-                    os.unlink(tmp_path)
 
 # Info page
 elif page == "Info":
@@ -460,7 +605,9 @@ elif page == "Info":
     als Ergebnis einen Eignungs-Score in Prozent an.
     
     ### Datenschutz:
-    Die hochgeladenen Bewerberdaten werden nur temporär verarbeitet und nicht dauerhaft gespeichert.
+    Die hochgeladenen Bewerberdaten werden nur lokal verarbeitet. Zur Beschleunigung wird eine
+    spaltenorientierte Kopie im größenbegrenzten lokalen Cache (`.prognose_cache`) abgelegt;
+    mit `PROGNOSE_CACHE_MAX_MB=0` wird nichts zwischengespeichert.
     """)
     
     st.info("""
@@ -469,6 +616,34 @@ elif page == "Info":
     Es wird empfohlen, die Ergebnisse im Kontext aller verfügbaren Bewerbungsunterlagen und Gespräche zu bewerten.
     """)
 
+# Diagnose: Laufzeiten je Stufe, Zähler und Modell-Cache (für Kapazitätsplanung)
+with st.expander("Diagnose", expanded=False):
+    diagnose = messung.bericht()
+    if diagnose["stufen"]:
+        st.dataframe(pd.DataFrame(diagnose["stufen"]).T.sort_values("gesamt_s", ascending=False))
+    else:
+        st.write("Noch keine Messwerte in diesem Prozess.")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("Zähler:")
+        st.json(diagnose["zaehler"])
+    with col2:
+        st.write("Modell-Cache:")
+        st.json(diagnose["modell_cache"])
+    if st.button("Messwerte zurücksetzen", key="diagnose_reset"):
+        messung.zuruecksetzen()
+
+# Drift-Überwachung: alle bewerteten Stapel des aktiven Modells gegen die Trainingsdaten
+# (das Protokoll wird nur auf Anforderung gelesen, nicht bei jedem Rerun)
+with st.expander("Datenüberwachung", expanded=False):
+    if st.button("Drift-Bericht erstellen", key="drift_bericht"):
+        vergleich = prognose_tool_ethisch.drift_bericht()
+        if vergleich is None:
+            st.write("Das aktive Modell hat keine Überwachungsbasis; sie wird beim nächsten Training angelegt.")
+        else:
+            st.caption(f"PSI ab {ueberwachung.PSI_BEOBACHTEN}: beobachten, ab {ueberwachung.PSI_DRIFT}: Drift.")
+            st.dataframe(vergleich.round(3))
+
 # Footer
 st.markdown("""---""")
 st.markdown(
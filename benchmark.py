@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+import einlesen
+import messung
+import modell_cache
+import modell_store
+import formula_score
+import prognose_tool_ethisch
+
+NACHNAMEN = ["Ackermann", "Baier", "Braun", "Fischer", "Groß", "Huber", "Klein", "Krüger",
+             "Lang", "Meier", "Öttinger", "Schmitz", "Sonne", "Walter", "Zummer"]
+# Zeitbudget für den Kaltstart (Prozessstart bis Ergebnis) in Sekunden
+KALTSTART_BUDGET_S = {"test_s": 1.5, "app_import_s": 1.0}
+# Module, die app.py beim ersten Rendern importiert (ohne Streamlit selbst)
+APP_MODULE = ["prognose_tool_ethisch", "einlesen", "trainings_jobs", "modell_store", "messung",
+              "kandidaten_index", "diagramme"]
+
+VORNAMEN = ["Anna", "Andreas", "Carola", "Daniel", "Emma", "Felix", "Greta", "Hans",
+            "Jana", "Kurt", "Lena", "Paul", "Sandra", "Thomas", "Torben"]
+
+
+# Synthetische HR-Daten mit dem Schema der mitgelieferten Arbeitsmappen.
+# Die Kündigungswahrscheinlichkeit hängt von Gehaltsentwicklung und Qualifikation
+# ab, damit das Modell eine nicht-triviale Struktur lernt.
+def erzeuge_daten(n, seed=42):
+    rng = np.random.default_rng(seed)
+    quali = rng.choice(["H", "S", "M", "A"], n, p=[0.2, 0.5, 0.2, 0.1])
+    schul = rng.choice(["MS", "AS", "OS"], n, p=[0.4, 0.4, 0.2])
+    beruf = rng.choice(["ST", "K", "O", "HW"], n, p=[0.3, 0.3, 0.15, 0.25])
+    einstieg = (rng.integers(10, 80, n) * 100).astype(np.int64)
+    wachstum = rng.choice([1.0, 1.1, 1.3, 1.6, 2.0], n, p=[0.3, 0.25, 0.2, 0.15, 0.1])
+    aktuell = (np.round(einstieg * wachstum / 100) * 100).astype(np.int64)
+
+    einstellung = pd.Timestamp("2024-06-01") - pd.to_timedelta(rng.integers(30, 25 * 365, n), unit="D")
+    risiko = 0.35 - 0.15 * (wachstum - 1.0) + np.where(quali == "A", 0.15, 0.0)
+    gekuendigt = rng.random(n) < np.clip(risiko, 0.02, 0.9)
+    dauer = pd.to_timedelta(rng.integers(30, 10 * 365, n), unit="D")
+    kuendigung = pd.Series(einstellung + dauer).where(gekuendigt)
+    fehlzeiten = np.where(rng.random(n) < 0.2, rng.integers(1, 8, n), np.nan)
+
+    return pd.DataFrame({
+        "Nachname": rng.choice(NACHNAMEN, n),
+        "Vorname": rng.choice(VORNAMEN, n),
+        "Geschlecht": rng.choice(["m", "w"], n),
+        "Geburtsdatum": pd.Timestamp("1960-01-01") + pd.to_timedelta(rng.integers(0, 40 * 365, n), unit="D"),
+        "Einstellungsdatum": einstellung,
+        "Kündigungsdatum": kuendigung,
+        "Fehlzeiten (Monaten)": fehlzeiten,
+        "Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt": aktuell,
+        "Monatsgehalt Einstieg": einstieg,
+        "Qualifikationstufe": quali,
+        "Schulabschluss": schul,
+        "Berufabschluss": beruf,
+        "Erläuterungen": np.full(n, np.nan, dtype=object),
+    })
+
+
+# Arbeitsmappe erzeugen bzw. aus einem früheren Lauf wiederverwenden
+def arbeitsmappe(n, verzeichnis, seed=42):
+    pfad = os.path.join(verzeichnis, f"synthetisch_{n}_{seed}.xlsx")
+    if not os.path.exists(pfad):
+        print(f"  Erzeuge {pfad} ...", file=sys.stderr)
+        erzeuge_daten(n, seed).to_excel(pfad, sheet_name="Tabelle1", index=False)
+    return pfad
+
+
+def _messen(funktion, *args, **kwargs):
+    start = time.perf_counter()
+    ergebnis = funktion(*args, **kwargs)
+    return time.perf_counter() - start, ergebnis
+
+
+# Ein Benchmark-Durchlauf für eine Datensatzgröße; alle Zeiten in Sekunden
+def benchmark_groesse(n, daten_verzeichnis, training=True, einzelaufrufe=200, prozesse=-1, chunk_size=50000):
+    ergebnis = {"zeilen": n}
+    pfad = arbeitsmappe(n, daten_verzeichnis)
+    ergebnis["dateigroesse_bytes"] = os.path.getsize(pfad)
+
+    ergebnis["read_excel_s"], _ = _messen(pd.read_excel, pfad, sheet_name="Tabelle1")
+    einlesen.cache_leeren()
+    ergebnis["einlesen_kalt_s"], df = _messen(einlesen.lese_tabelle, pfad)
+    ergebnis["einlesen_warm_s"], df = _messen(einlesen.lese_tabelle, pfad)
+
+    ergebnis["vorbereiten_s"], _ = _messen(prognose_tool_ethisch.vorbereiten_ethisch, df, True)
+    # Speicherspitze der Vorbereitung (tracemalloc, getrennt gemessen wegen des Overheads)
+    with messung.profil(cprofile=False, speicher=True) as profil:
+        prognose_tool_ethisch.vorbereiten_ethisch(df, False)
+    ergebnis["vorbereiten_spitze_mb"] = profil["speicher_spitze_bytes"] / 1024 / 1024
+
+    if training:
+        ergebnis["trainiere_modell_s"], _ = _messen(prognose_tool_ethisch.trainiere_modell, df)
+
+    ergebnis["prognose_excel_s"], _ = _messen(prognose_tool_ethisch.prognose_excel, df)
+    ergebnis["prognose_excel_zeilen_pro_s"] = n / ergebnis["prognose_excel_s"]
+    # Sharded im Prozesspool (inkl. Pool-Start); Faktor > 1 = schneller als sequentiell
+    ergebnis["prognose_excel_parallel_s"], _ = _messen(prognose_tool_ethisch.prognose_excel, df,
+                                                       prozesse=prozesse, chunk_size=chunk_size)
+    ergebnis["prognose_excel_parallel_speedup"] = ergebnis["prognose_excel_s"] / ergebnis["prognose_excel_parallel_s"]
+
+    ergebnis["erklaerung_excel_s"], _ = _messen(prognose_tool_ethisch.erklaerung_excel, df)
+
+    prognose_tool_ethisch.prognose_manuell(4500, 3500, "S", "MS", "HW")
+    latenzen = []
+    for i in range(einzelaufrufe):
+        zeile = df.iloc[i % n]
+        dauer, _ = _messen(prognose_tool_ethisch.prognose_manuell,
+                           zeile["Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt"],
+                           zeile["Monatsgehalt Einstieg"], zeile["Qualifikationstufe"],
+                           zeile["Schulabschluss"], zeile["Berufabschluss"])
+        latenzen.append(dauer)
+    ergebnis["prognose_manuell_p50_ms"] = float(np.percentile(latenzen, 50) * 1000)
+    ergebnis["prognose_manuell_p95_ms"] = float(np.percentile(latenzen, 95) * 1000)
+
+    ergebnis["formula_score_s"], _ = _messen(formula_score.berechne_score, df)
+    ergebnis["formula_score_zeilen_pro_s"] = n / ergebnis["formula_score_s"]
+    return ergebnis
+
+
+# Kaltstart in frischen Interpreter-Prozessen: CLI-Aufruf --test und die Imports
+# des Streamlit-Interfaces; gemessen wird das Minimum über mehrere Wiederholungen
+def kaltstart(pfad, wiederholungen=3):
+    verzeichnis = os.path.dirname(os.path.abspath(__file__))
+    befehle = {
+        "test_s": [sys.executable, "prognose_tool_ethisch.py", "--test", pfad],
+        "app_import_s": [sys.executable, "-c", "import " + ", ".join(APP_MODULE)],
+    }
+    umgebung = dict(os.environ, PROGNOSE_MODELL_DIR=modell_store.STORE_VERZEICHNIS,
+                    PROGNOSE_CACHE_DIR=einlesen.CACHE_VERZEICHNIS)
+    ergebnis = {}
+    for name, befehl in befehle.items():
+        dauern = []
+        for _ in range(wiederholungen):
+            start = time.perf_counter()
+            subprocess.run(befehl, cwd=verzeichnis, env=umgebung, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            dauern.append(time.perf_counter() - start)
+        ergebnis[name] = min(dauern)
+    return ergebnis
+
+
+# Gegenüberstellung mit einem früheren Bericht (Faktor > 1 = langsamer bzw. mehr Speicher)
+def vergleichen(bericht, alt):
+    zeilen = []
+    for groesse, werte in bericht["ergebnisse"].items():
+        alte_werte = alt.get("ergebnisse", {}).get(groesse, {})
+        for kennzahl, wert in werte.items():
+            if kennzahl.endswith(("_s", "_ms", "_mb")) and not kennzahl.endswith("_pro_s"):
+                if alte_werte.get(kennzahl):
+                    zeilen.append((groesse, kennzahl, alte_werte[kennzahl], wert, wert / alte_werte[kennzahl]))
+    return zeilen
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark des Prognose-Tools mit synthetischen HR-Daten")
+    parser.add_argument("--groessen", default="1000,100000,1000000",
+                        help="Kommagetrennte Zeilenzahlen (Standard: 1000,100000,1000000)")
+    parser.add_argument("--daten-verzeichnis", default=os.path.join(tempfile.gettempdir(), "prognose_benchmark"),
+                        help="Ablage der synthetischen Arbeitsmappen (werden wiederverwendet)")
+    parser.add_argument("--output", default="benchmark_bericht.json", help="JSON-Bericht")
+    parser.add_argument("--vergleich", help="Früherer JSON-Bericht zum Vergleich")
+    parser.add_argument("--ohne-training", action="store_true", help="trainiere_modell nicht messen")
+    parser.add_argument("--einzelaufrufe", type=int, default=200,
+                        help="Anzahl prognose_manuell-Aufrufe für die Latenzmessung")
+    parser.add_argument("--prozesse", type=int, default=-1,
+                        help="Prozesse für die sharded prognose_excel-Messung (Standard: -1 = alle Kerne)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Zeilen pro Shard (Standard: 50000)")
+    parser.add_argument("--kaltstart-wiederholungen", type=int, default=3,
+                        help="Wiederholungen der Kaltstartmessung (0 = nicht messen)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.daten_verzeichnis, exist_ok=True)
+    # Modellspeicher und Ingestion-Cache isolieren, damit der Lauf nichts überschreibt
+    arbeits_verzeichnis = tempfile.mkdtemp(prefix="prognose_benchmark_")
+    modell_store.STORE_VERZEICHNIS = os.path.join(arbeits_verzeichnis, "modelle")
+    einlesen.CACHE_VERZEICHNIS = os.path.join(arbeits_verzeichnis, "cache")
+    modell_cache.invalidieren()
+
+    bericht = {
+        "zeitpunkt": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "backend": prognose_tool_ethisch.BACKEND,
+        "ergebnisse": {},
+    }
+    groessen = [int(g) for g in args.groessen.split(",")]
+    try:
+        for n in groessen:
+            print(f"Benchmark mit {n} Zeilen ...", file=sys.stderr)
+            bericht["ergebnisse"][str(n)] = benchmark_groesse(
+                n, args.daten_verzeichnis, training=not args.ohne_training,
+                einzelaufrufe=args.einzelaufrufe, prozesse=args.prozesse, chunk_size=args.chunk_size)
+        if args.kaltstart_wiederholungen > 0:
+            print("Kaltstart ...", file=sys.stderr)
+            bericht["ergebnisse"]["kaltstart"] = kaltstart(
+                arbeitsmappe(min(groessen), args.daten_verzeichnis), args.kaltstart_wiederholungen)
+            bericht["kaltstart_budget_s"] = KALTSTART_BUDGET_S
+    finally:
+        shutil.rmtree(arbeits_verzeichnis, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(bericht, f, indent=2)
+    print(json.dumps(bericht["ergebnisse"], indent=2))
+
+    if "kaltstart" in bericht["ergebnisse"]:
+        print("\nKaltstart-Budget:")
+        for kennzahl, wert in bericht["ergebnisse"]["kaltstart"].items():
+            budget = KALTSTART_BUDGET_S[kennzahl]
+            print(f"  {kennzahl:<16} {wert:7.3f} s  (Budget {budget:.1f} s)  "
+                  f"{'OK' if wert <= budget else 'ÜBERSCHRITTEN'}")
+
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            alt = json.load(f)
+        print("\nVergleich (Faktor > 1 = langsamer bzw. mehr Speicher):")
+        for groesse, kennzahl, alt_wert, neu_wert, faktor in vergleichen(bericht, alt):
+            print(f"  {groesse:>8} {kennzahl:<32} {alt_wert:10.4f} -> {neu_wert:10.4f}  x{faktor:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import io
+import math
+import numpy as np
+
+# Diagramme für das Streamlit-Interface. Die Statistik (Histogramm, KDE) wird
+# einmal pro Ergebnismenge mit NumPy berechnet, gezeichnet wird nur noch das
+# Ergebnis. Gerendert wird über matplotlib.figure.Figure ohne pyplot: die Figur
+# wird nirgends global registriert, nach dem Export als PNG geleert und vom
+# Garbage Collector freigegeben (kein Figure-Leck in langlebigen Prozessen).
+
+# Ab dieser Anzahl Werte zeigt das Interface native Streamlit-Diagramme
+NATIV_AB = 100_000
+FARBE = "#4C72B0"
+
+
+def _eignungsfarbe(score):
+    return "green" if score >= 70 else "orange" if score >= 40 else "red"
+
+
+# Gauß-KDE (Bandbreite nach Scott) über ein Binning auf gleichmäßigem Gitter und
+# eine Faltung mit dem Kern: O(n + punkte²) statt O(n * punkte)
+def _kde(werte, punkte=200):
+    n = len(werte)
+    std = float(werte.std(ddof=1)) if n > 1 else 0.0
+    if std == 0.0:
+        return None, None
+    bandbreite = std * n ** (-1 / 5)
+    gitter = np.linspace(werte.min() - 3 * bandbreite, werte.max() + 3 * bandbreite, punkte)
+    schritt = gitter[1] - gitter[0]
+    zaehler, _ = np.histogram(werte, bins=punkte, range=(gitter[0] - schritt / 2, gitter[-1] + schritt / 2))
+    halb = int(math.ceil(4 * bandbreite / schritt))
+    kern_x = np.arange(-halb, halb + 1) * schritt
+    kern = np.exp(-0.5 * (kern_x / bandbreite) ** 2) / (bandbreite * math.sqrt(2 * math.pi))
+    dichte = np.convolve(zaehler, kern, mode="full")[halb:halb + punkte] / n
+    return gitter, dichte
+
+
+# Histogramm und KDE (auf Anzahlen skaliert) für eine Menge von Scores;
+# fehlende Werte werden ignoriert
+def verteilung(scores, bins=10, kde_punkte=200):
+    werte = np.asarray(scores, dtype=np.float64)
+    werte = werte[~np.isnan(werte)]
+    if len(werte) == 0:
+        return {"n": 0, "anzahlen": np.zeros(0), "grenzen": np.zeros(0), "kde_x": None, "kde_y": None}
+    anzahlen, grenzen = np.histogram(werte, bins=bins)
+    kde_x, kde_y = _kde(werte, kde_punkte)
+    if kde_y is not None:
+        kde_y = kde_y * len(werte) * (grenzen[1] - grenzen[0])
+    return {"n": len(werte), "anzahlen": anzahlen, "grenzen": grenzen, "kde_x": kde_x, "kde_y": kde_y}
+
+
+# Anzahlen je Klasse als Tabelle für native Diagramme (st.bar_chart)
+def als_tabelle(v):
+    import pandas as pd
+    beschriftung = [f"{a:.0f}–{b:.0f}" for a, b in zip(v["grenzen"][:-1], v["grenzen"][1:])]
+    return pd.DataFrame({"Anzahl der Bewerber": v["anzahlen"]}, index=beschriftung)
+
+
+def _figur(breite, hoehe):
+    from matplotlib.figure import Figure
+    return Figure(figsize=(breite, hoehe))
+
+
+def _png(fig):
+    puffer = io.BytesIO()
+    fig.savefig(puffer, format="png", bbox_inches="tight")
+    fig.clear()
+    return puffer.getvalue()
+
+
+def verteilung_png(v):
+    fig = _figur(10, 6)
+    ax = fig.subplots()
+    if v["n"]:
+        ax.bar(v["grenzen"][:-1], v["anzahlen"], width=np.diff(v["grenzen"]), align="edge",
+               color=FARBE, alpha=0.6, edgecolor="white")
+        if v["kde_y"] is not None:
+            ax.plot(v["kde_x"], v["kde_y"], color=FARBE)
+    ax.set_title('Verteilung der Eignungs-Scores')
+    ax.set_xlabel('Eignungs-Score (%)')
+    ax.set_ylabel('Anzahl der Bewerber')
+    return _png(fig)
+
+
+def eignung_png(score):
+    fig = _figur(10, 2)
+    ax = fig.subplots()
+    ax.barh(["Eignung"], [score], color=_eignungsfarbe(score))
+    ax.set_xlim(0, 100)
+    ax.set_xlabel('Eignungs-Score (%)')
+    ax.set_ylabel('')
+    return _png(fig)
+
+
+def wichtigkeit_png(features, wichtigkeiten):
+    reihenfolge = np.argsort(wichtigkeiten)
+    fig = _figur(10, 6)
+    ax = fig.subplots()
+    ax.barh([features[i] for i in reihenfolge], np.asarray(wichtigkeiten)[reihenfolge], color=FARBE)
+    ax.set_xlabel('Importance')
+    ax.set_title('Bedeutung der Merkmale für die Eignungsprognose')
+    return _png(fig)
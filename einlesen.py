@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import io
+import glob
+import hashlib
+import pandas as pd
+
+import messung
+
+CACHE_VERZEICHNIS = os.environ.get("PROGNOSE_CACHE_DIR", ".prognose_cache")
+# PROGNOSE_CACHE_MAX_MB=0 deaktiviert den Cache
+CACHE_MAX_BYTES = int(os.environ.get("PROGNOSE_CACHE_MAX_MB", "512")) * 1024 * 1024
+SHEET_NAME = "Tabelle1"
+# Herkunftsspalten beim Zusammenführen mehrerer Dateien bzw. Tabellenblätter
+QUELLE_SPALTE = "Quelldatei"
+BLATT_SPALTE = "Tabellenblatt"
+EXCEL_ENDUNGEN = (".xlsx", ".xlsm", ".xls")
+
+# Formatversion fließt in den Schlüssel ein, damit alte Cache-Dateien nach
+# Änderungen an der Typkonvertierung nicht mehr verwendet werden
+_FORMAT_VERSION = "1"
+
+
+# Quelle (Pfad, Bytes oder Datei-Objekt, z. B. Streamlit-Upload) als Bytes lesen
+def _als_bytes(quelle):
+    if isinstance(quelle, (bytes, bytearray)):
+        return bytes(quelle)
+    if hasattr(quelle, "getvalue"):
+        return quelle.getvalue()
+    if hasattr(quelle, "read"):
+        return quelle.read()
+    with open(quelle, "rb") as f:
+        return f.read()
+
+
+def _schluessel(inhalt, sheet_name):
+    h = hashlib.sha256(inhalt)
+    h.update(f"|{sheet_name}|{_FORMAT_VERSION}".encode("utf-8"))
+    return h.hexdigest()
+
+
+# Stabiler Hash über Inhalt und Spalten eines DataFrames
+def datensatz_hash(df):
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    h.update("|".join(map(str, df.columns)).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Spalten mit gemischten Python-Typen (z. B. Datum und Text) lassen sich nicht
+# spaltenorientiert speichern und werden als Text abgelegt
+def _typisieren(df):
+    df = df.copy()
+    for spalte in df.columns:
+        if df[spalte].dtype == object and pd.api.types.infer_dtype(df[spalte], skipna=True).startswith("mixed"):
+            df[spalte] = df[spalte].where(df[spalte].isna(), df[spalte].astype(str))
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+# Größenbegrenzte LRU-Verdrängung über die Änderungszeit der Cache-Dateien,
+# einschließlich der Unterverzeichnisse (z. B. Teildateien des Score-Speichers)
+def _verdraengen(behalten=None):
+    dateien = [os.path.join(wurzel, n) for wurzel, _, namen in os.walk(CACHE_VERZEICHNIS)
+               for n in namen if n.endswith(".parquet")]
+    eintraege = []
+    for pfad in dateien:
+        try:
+            stat = os.stat(pfad)
+        except FileNotFoundError:
+            continue
+        eintraege.append((stat.st_mtime, stat.st_size, pfad))
+    gesamt = sum(e[1] for e in eintraege)
+    for _, groesse, pfad in sorted(eintraege):
+        if gesamt <= CACHE_MAX_BYTES:
+            break
+        if pfad == behalten:
+            continue
+        try:
+            os.remove(pfad)
+            gesamt -= groesse
+        except FileNotFoundError:
+            pass
+
+
+# Nur die angeforderten (und vorhandenen) Spalten aus der Parquet-Datei lesen;
+# fehlende Spalten fallen erst beim Zugriff des Aufrufers auf
+def _parquet_lesen(pfad, spalten=None):
+    if spalten is not None:
+        import pyarrow.parquet as pq
+        vorhanden = set(pq.read_schema(pfad).names)
+        spalten = [s for s in spalten if s in vorhanden]
+    return pd.read_parquet(pfad, columns=spalten)
+
+
+# Excel-Tabelle einlesen; die Arbeitsmappe wird nur beim ersten Mal geparst,
+# danach wird die Parquet-Kopie aus dem Cache verwendet.
+# spalten: nur diese Spalten zurückgeben (der Cache enthält immer alle)
+def lese_tabelle(quelle, sheet_name=SHEET_NAME, spalten=None):
+    if isinstance(quelle, pd.DataFrame):
+        return quelle
+    inhalt = _als_bytes(quelle)
+    messung.zaehlen("bytes_gelesen", len(inhalt))
+    cache_pfad = os.path.join(CACHE_VERZEICHNIS, _schluessel(inhalt, sheet_name) + ".parquet")
+
+    if os.path.exists(cache_pfad):
+        try:
+            with messung.stufe("einlesen_parquet"):
+                df = _parquet_lesen(cache_pfad, spalten)
+            os.utime(cache_pfad)
+            messung.zaehlen("einlesen_cache_treffer")
+            return df
+        except Exception:
+            # Beschädigte oder unlesbare Cache-Datei: neu erzeugen
+            pass
+
+    messung.zaehlen("einlesen_cache_fehlschlaege")
+    with messung.stufe("einlesen_excel"):
+        df = pd.read_excel(io.BytesIO(inhalt), sheet_name=sheet_name)
+    if CACHE_MAX_BYTES <= 0:
+        return df if spalten is None else df[[s for s in spalten if s in df.columns]]
+    try:
+        os.makedirs(CACHE_VERZEICHNIS, exist_ok=True)
+        df = _typisieren(df)
+        tmp_pfad = f"{cache_pfad}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_pfad, index=False)
+        os.replace(tmp_pfad, cache_pfad)
+        _verdraengen(behalten=cache_pfad)
+        # Erster und jeder weitere Aufruf liefern dieselben Spaltentypen
+        df = _parquet_lesen(cache_pfad, spalten)
+    except (ImportError, OSError):
+        # Ohne pyarrow oder bei nicht beschreibbarem Verzeichnis wird nicht gecacht
+        if spalten is not None:
+            df = df[[s for s in spalten if s in df.columns]]
+    return df
+
+
+# Eingabe in eine sortierte Liste von Dateien auflösen: einzelner Pfad,
+# Verzeichnis (alle Dateien mit passender Endung), Glob-Muster oder Liste davon.
+# Bytes und Datei-Objekte werden unverändert durchgereicht.
+def dateien(quelle, endungen=EXCEL_ENDUNGEN):
+    if isinstance(quelle, (list, tuple)):
+        return [datei for teil in quelle for datei in dateien(teil, endungen)]
+    if not isinstance(quelle, (str, os.PathLike)):
+        return [quelle]
+    pfad = os.fspath(quelle)
+    if os.path.isdir(pfad):
+        treffer = sorted(os.path.join(pfad, n) for n in os.listdir(pfad)
+                         if n.lower().endswith(endungen) and not n.startswith("~$"))
+    elif glob.has_magic(pfad):
+        treffer = sorted(t for t in glob.glob(pfad) if os.path.isfile(t))
+    else:
+        return [pfad]
+    if not treffer:
+        raise FileNotFoundError(f"Keine Dateien gefunden für '{pfad}'")
+    return treffer
+
+
+def _blatt_lesen(aufgabe):
+    pfad, sheet_name, spalten = aufgabe
+    try:
+        return lese_tabelle(pfad, sheet_name=sheet_name, spalten=spalten)
+    except ValueError as fehler:
+        raise ValueError(f"{pfad}: {fehler}") from fehler
+
+
+# Mehrere Arbeitsmappen und/oder Tabellenblätter einlesen und zu einem DataFrame
+# zusammenführen. quelle: wie bei dateien(); sheet_name: ein Blatt oder Liste von
+# Blättern (gelesen werden nur diese). Die Mappen werden im Prozesspool geparst
+# (prozesse: -1 = alle Kerne); jeder Worker füllt den Parquet-Cache, sodass
+# spätere Aufrufe auch sequentiell schnell sind. Bei mehr als einer Datei bzw.
+# einem Blatt erhält das Ergebnis die Spalten QUELLE_SPALTE bzw. BLATT_SPALTE
+# (namen: Bezeichnungen der Quellen, Standard: Dateiname).
+def lese_mehrere(quelle, sheet_name=SHEET_NAME, spalten=None, prozesse=-1, namen=None):
+    pfade = dateien(quelle)
+    blaetter = list(sheet_name) if isinstance(sheet_name, (list, tuple)) else [sheet_name]
+    if len(pfade) == 1 and len(blaetter) == 1:
+        return lese_tabelle(pfade[0], sheet_name=blaetter[0], spalten=spalten)
+
+    if namen is None:
+        namen = [os.path.basename(pfad) if isinstance(pfad, str) else f"Quelle {i + 1}"
+                 for i, pfad in enumerate(pfade)]
+    aufgaben = [(pfad, blatt, spalten) for pfad in pfade for blatt in blaetter]
+    herkunft = [(name, blatt) for name in namen for blatt in blaetter]
+    if prozesse in (None, -1):
+        prozesse = os.cpu_count() or 1
+    prozesse = min(prozesse, len(aufgaben))
+    with messung.stufe("einlesen_mehrere"):
+        if prozesse > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=prozesse) as pool:
+                teile = list(pool.map(_blatt_lesen, aufgaben))
+        else:
+            teile = [_blatt_lesen(aufgabe) for aufgabe in aufgaben]
+
+    for nummer, (aufgabe, (name, blatt)) in enumerate(zip(aufgaben, herkunft)):
+        teil = teile[nummer]
+        if teil is aufgabe[0]:
+            # Übergebener DataFrame: nicht den des Aufrufers verändern
+            teil = teile[nummer] = teil.copy()
+        if len(pfade) > 1:
+            teil.insert(0, QUELLE_SPALTE, name)
+        if len(blaetter) > 1:
+            teil.insert(1 if len(pfade) > 1 else 0, BLATT_SPALTE, str(blatt))
+    return pd.concat(teile, ignore_index=True)
+
+
+def cache_leeren():
+    try:
+        for name in os.listdir(CACHE_VERZEICHNIS):
+            if name.endswith(".parquet") or name.endswith(".tmp"):
+                os.remove(os.path.join(CACHE_VERZEICHNIS, name))
+    except FileNotFoundError:
+        pass
+
+
+# Zeilen blockweise lesen, ohne die ganze Datei in den Speicher zu laden.
+# Unterstützt CSV (read_csv mit chunksize), Parquet (Row Groups/Batches) und
+# xlsx (openpyxl im read-only-Modus).
+def lese_bloecke(pfad, chunk_size=50000, sheet_name=SHEET_NAME, spalten=None):
+    endung = os.path.splitext(str(pfad))[1].lower()
+    if endung == ".csv":
+        yield from pd.read_csv(pfad, chunksize=chunk_size, usecols=spalten)
+    elif endung == ".parquet":
+        import pyarrow.parquet as pq
+        datei = pq.ParquetFile(pfad)
+        for batch in datei.iter_batches(batch_size=chunk_size, columns=spalten):
+            yield batch.to_pandas()
+    elif endung in (".xlsx", ".xlsm"):
+        yield from _xlsx_bloecke(pfad, chunk_size, sheet_name, spalten)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat für Streaming: '{endung}'")
+
+
+def _xlsx_bloecke(pfad, chunk_size, sheet_name, spalten):
+    import openpyxl
+    mappe = openpyxl.load_workbook(pfad, read_only=True, data_only=True)
+    try:
+        # Wie pd.read_excel: ein fehlendes Blatt ist ein Fehler, kein Rückfall auf das erste
+        if sheet_name not in mappe.sheetnames:
+            raise ValueError(f"{pfad}: Worksheet named '{sheet_name}' not found")
+        blatt = mappe[sheet_name]
+        zeilen = blatt.iter_rows(values_only=True)
+        kopf = [str(k) if k is not None else f"Unnamed: {i}" for i, k in enumerate(next(zeilen, ()))]
+        auswahl = list(range(len(kopf))) if spalten is None else [kopf.index(s) for s in spalten]
+        namen = [kopf[i] for i in auswahl]
+
+        puffer = []
+        for zeile in zeilen:
+            if all(v is None for v in zeile):
+                continue
+            puffer.append([zeile[i] if i < len(zeile) else None for i in auswahl])
+            if len(puffer) >= chunk_size:
+                yield pd.DataFrame(puffer, columns=namen)
+                puffer = []
+        if puffer:
+            yield pd.DataFrame(puffer, columns=namen)
+    finally:
+        mappe.close()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import numpy as np
+
+import wald_engine
+
+
+# Beiträge der Merkmale zu einer Prognose des Random Forests, zerlegt entlang der
+# Entscheidungspfade (Saabas): jeder Split auf Merkmal f verschiebt die
+# Wahrscheinlichkeit vom Eltern- zum Kindknoten, die Verschiebung wird f
+# zugeschrieben. Für einen Baum gilt Blattwert = Wurzelwert + Summe der Beiträge,
+# für den Wald entsprechend gemittelt. Da der Pfad eines Blattes feststeht, wird
+# der Beitragsvektor einmal je Knoten vorberechnet (ebenenweise über alle Bäume
+# des kompilierten Walds gleichzeitig); eine Erklärung ist dann nur noch die
+# Blattsuche aus wald_engine plus ein Tabellenzugriff je Baum, für alle Zeilen
+# eines Blocks auf einmal.
+class Erklaerer:
+    def __init__(self, wald, n_features, klasse=1):
+        self.wald = wald
+        self.n_features = int(n_features)
+        knoten = np.arange(len(wald.feature))
+        innen = np.asarray(wald.links) != knoten
+        p = np.asarray(wald.blatt_proba)[:, klasse]
+
+        beitrag = np.zeros((len(knoten), self.n_features), dtype=np.float64)
+        ebene = np.asarray(wald.wurzeln)
+        while len(ebene):
+            eltern = ebene[innen[ebene]]
+            merkmal = np.asarray(wald.feature)[eltern]
+            kinder = []
+            for seite in (wald.links, wald.rechts):
+                kind = np.asarray(seite)[eltern]
+                beitrag[kind] = beitrag[eltern]
+                beitrag[kind, merkmal] += p[kind] - p[eltern]
+                kinder.append(kind)
+            ebene = np.concatenate(kinder)
+        self.beitrag = beitrag
+        # Mittlerer Wurzelwert: Prognose ohne Kenntnis der Merkmale
+        self.basis = float(p[np.asarray(wald.wurzeln)].mean())
+
+    # Rückgabe: (Basiswert, Beiträge als Matrix Zeilen x Merkmale);
+    # Basiswert + Zeilensumme entspricht predict_proba(X)[:, klasse]
+    def erklaeren(self, X):
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        beitraege = np.zeros((X.shape[0], self.n_features), dtype=np.float64)
+        for start in range(0, X.shape[0], wald_engine.BLOCKGROESSE):
+            block = slice(start, start + wald_engine.BLOCKGROESSE)
+            blaetter = self.wald.blaetter(X[block])
+            summe = beitraege[block]
+            for b in range(blaetter.shape[1]):
+                summe += self.beitrag[blaetter[:, b]]
+        beitraege /= len(self.wald.wurzeln)
+        return self.basis, beitraege
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import sys
+import numpy as np
+
+# Export der Ergebnisse in CSV, Parquet oder xlsx. Geschrieben wird blockweise
+# direkt in die Zieldatei, es entsteht keine zweite Kopie des Ergebnisses als
+# Text bzw. Bytes im Speicher. Die Einfärbung der Scores erfolgt regelbasiert:
+# in xlsx als bedingte Formatierung (wertet Excel aus), in der Oberfläche
+# spaltenweise über np.select statt eines Python-Aufrufs pro Zelle.
+
+FORMATE = {"csv": ".csv", "parquet": ".parquet", "xlsx": ".xlsx"}
+MIME = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+BLOCKGROESSE = 50000
+
+# Farbregeln für Scores: unter 40 rot, unter 70 orange, sonst grün
+SCHWELLEN = [(40, "red", "FFFF0000"), (70, "orange", "FFFFA500")]
+FARBE_SONST = ("green", "FF008000")
+
+
+def _score_spalte(spalten):
+    treffer = [s for s in spalten if str(s).endswith("Score (%)")]
+    return treffer[0] if treffer else None
+
+
+# CSS je Zelle einer Score-Spalte, vektorisiert (für Styler.apply mit axis=0)
+def score_stile(werte):
+    werte = np.asarray(werte, dtype=np.float64)
+    farben = np.select([werte < grenze for grenze, _, _ in SCHWELLEN],
+                       [farbe for _, farbe, _ in SCHWELLEN], default=FARBE_SONST[0])
+    stile = np.char.add(np.char.add("background-color: ", farben), "; color: white;")
+    return np.where(np.isnan(werte), "", stile)
+
+
+class _CsvSchreiber:
+    def __init__(self, ziel):
+        self._eigene_datei = ziel is not None
+        self._datei = open(ziel, "w", encoding="utf-8", newline="") if ziel is not None else sys.stdout
+        self._kopf = True
+
+    def schreiben(self, block):
+        block.to_csv(self._datei, index=False, header=self._kopf)
+        self._kopf = False
+
+    def schliessen(self):
+        if self._eigene_datei:
+            self._datei.close()
+
+
+class _ParquetSchreiber:
+    def __init__(self, ziel):
+        self._ziel = ziel
+        self._schreiber = None
+
+    def schreiben(self, block):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._schreiber is None:
+            tabelle = pa.Table.from_pandas(block, preserve_index=False)
+            self._schreiber = pq.ParquetWriter(self._ziel, tabelle.schema)
+        else:
+            tabelle = pa.Table.from_pandas(block, schema=self._schreiber.schema, preserve_index=False)
+        self._schreiber.write_table(tabelle)
+
+    def schliessen(self):
+        if self._schreiber is not None:
+            self._schreiber.close()
+
+
+# xlsx im write-only-Modus von openpyxl (Zeilen werden direkt serialisiert);
+# die Score-Spalte erhält beim Schließen drei bedingte Formatierungsregeln
+class _XlsxSchreiber:
+    def __init__(self, ziel):
+        from openpyxl import Workbook
+        self._ziel = ziel
+        self._mappe = Workbook(write_only=True)
+        self._blatt = self._mappe.create_sheet("Ergebnisse")
+        self._spalten = None
+        self._zeilen = 0
+
+    def schreiben(self, block):
+        if self._spalten is None:
+            self._spalten = list(block.columns)
+            self._blatt.append([str(s) for s in self._spalten])
+        # NaN/NaT als leere Zellen, NumPy-Skalare als Python-Werte
+        werte = block.astype(object).where(block.notna(), None)
+        for zeile in werte.itertuples(index=False, name=None):
+            self._blatt.append(zeile)
+        self._zeilen += len(block)
+
+    def _formatieren(self):
+        from openpyxl.formatting.rule import FormulaRule
+        from openpyxl.styles import Font, PatternFill
+        from openpyxl.utils import get_column_letter
+        spalte = _score_spalte(self._spalten or [])
+        if spalte is None or self._zeilen == 0:
+            return
+        buchstabe = get_column_letter(self._spalten.index(spalte) + 1)
+        bereich = f"{buchstabe}2:{buchstabe}{self._zeilen + 1}"
+        zelle = f"{buchstabe}2"
+        regeln = [(f"{zelle}<{grenze}", argb) for grenze, _, argb in SCHWELLEN] + [("TRUE", FARBE_SONST[1])]
+        for bedingung, argb in regeln:
+            self._blatt.conditional_formatting.add(bereich, FormulaRule(
+                formula=[f"AND(ISNUMBER({zelle}),{bedingung})"], stopIfTrue=True,
+                fill=PatternFill(start_color=argb, end_color=argb, fill_type="solid"),
+                font=Font(color="FFFFFFFF")))
+
+    def schliessen(self):
+        self._formatieren()
+        self._mappe.save(self._ziel)
+
+
+def _format(ziel, format):
+    if format is None:
+        endung = os.path.splitext(str(ziel))[1].lower()
+        format = next((f for f, e in FORMATE.items() if e == endung), "csv")
+    if format not in FORMATE:
+        raise ValueError(f"Unbekanntes Exportformat: '{format}' (möglich: {', '.join(FORMATE)})")
+    return format
+
+
+# Schreiber für blockweisen Export: schreiben(block) beliebig oft, dann schliessen().
+# Ohne Ziel wird CSV auf die Standardausgabe geschrieben.
+def schreiber(ziel=None, format=None):
+    format = "csv" if ziel is None and format is None else _format(ziel, format)
+    if format == "parquet":
+        return _ParquetSchreiber(ziel)
+    if format == "xlsx":
+        return _XlsxSchreiber(ziel)
+    return _CsvSchreiber(ziel)
+
+
+# Ganzes Ergebnis blockweise exportieren; Rückgabe: Pfad der Zieldatei
+def exportieren(ergebnis, ziel, format=None, blockgroesse=BLOCKGROESSE):
+    format = _format(ziel, format)
+    tmp_ziel = f"{ziel}.{os.getpid()}.tmp"
+    try:
+        s = schreiber(tmp_ziel, format)
+        try:
+            # Mindestens ein Block, damit auch ein leeres Ergebnis die Kopfzeile erhält
+            for start in range(0, max(len(ergebnis), 1), blockgroesse):
+                s.schreiben(ergebnis.iloc[start:start + blockgroesse])
+        finally:
+            s.schliessen()
+        os.replace(tmp_ziel, ziel)
+    except BaseException:
+        if os.path.exists(tmp_ziel):
+            os.remove(tmp_ziel)
+        raise
+    return ziel
@@ -1,76 +1,106 @@
 import pandas as pd
 import numpy as np
 
-# === Datei laden ===
-file_path = "Datensatz HR-20240416 - Zusatzinfos.xlsx"
-excel_file = pd.ExcelFile(file_path)
-df = excel_file.parse(excel_file.sheet_names[0])
+import validierung
 
 # === Scoring-Funktionen ===
+# Alle Komponenten arbeiten spaltenweise auf dem gesamten DataFrame und liefern
+# eine Series mit gleichem Index. Eingaben werden über validierung normalisiert;
+# nicht interpretierbare Werte ergeben wie bisher 0.0.
+# Gegenüber der früheren zeilenweisen Berechnung ändern sich dadurch bewusst die
+# Scores für uneinheitliche Eingaben (Abgleich in test_formula_score.py):
+# - Codes mit Leerraum, Kleinschreibung oder "O" für "OS" zählen statt 0
+# - Gehälter mit Dezimalkomma und Tausenderpunkt ("4.500,50") werden gelesen
+# - Fehlzeiten als Text ("2") werden gelesen, statt die Kontinuität auf 0 zu setzen
+# - Datumstext TT.MM.JJJJ wird als Tag.Monat gelesen (bisher Monat.Tag)
+# - ein fehlendes Gehalt (None wie NaN) ergibt 0.4 wie bisher bei NaN (bisher 0.0 bei None)
+
+Q_MAP = {'H': 0.5, 'M': 0.5, 'S': 0.5, 'A': 0.5}
+S_MAP = {'OS': 0.25, 'MS': 0.6, 'AS': 1.0}
+B_MAP = {'O': 0.3, 'K': 0.6, 'ST': 1.0, 'HW': 0.6}
+
+GEHALT_AKTUELL = validierung.GEHALT_AKTUELL
+GEHALT_EINSTIEG = validierung.GEHALT_EINSTIEG
+
+
+# Hilfsfunktion: Gewicht je Code, unbekannte oder fehlende Codes ergeben 0
+def _gewichte(spalte, gewichte):
+    werte, _ = validierung.kategorie(spalte, list(gewichte), validierung.ALIASE.get(spalte.name))
+    tabelle = np.append([gewichte[k] for k in werte.cat.categories], 0.0)
+    return pd.Series(tabelle[werte.cat.codes.to_numpy()], index=spalte.index)
+
 
 # 1. Qualifikation
-def qualifikations_score(row):
-    q_map = {'H': 0.5, 'M': 0.5, 'S': 0.5, 'A': 0.5}
-    s_map = {'OS': 0.25, 'MS': 0.6, 'AS': 1.0}
-    b_map = {'O': 0.3, 'K': 0.6, 'ST': 1.0, 'HW': 0.6}
-    
-    q = q_map.get(str(row['Qualifikationstufe']).strip(), 0)
-    s = s_map.get(str(row['Schulabschluss']).strip(), 0)
-    b = b_map.get(str(row['Berufabschluss']).strip(), 0)
-    
-    return np.mean([q, s, b])
+def qualifikations_score(df):
+    q = _gewichte(df['Qualifikationstufe'], Q_MAP)
+    s = _gewichte(df['Schulabschluss'], S_MAP)
+    b = _gewichte(df['Berufabschluss'], B_MAP)
+    return (q + s + b) / 3
+
 
 # 2. Leistung (Gehaltsentwicklung)
-def leistungs_score(row):
-    try:
-        gehalt_aktuell = float(str(row['Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt']).replace(",", "."))
-        gehalt_einstieg = float(str(row['Monatsgehalt Einstieg']).replace(",", "."))
-        if gehalt_einstieg <= 0:
-            return 0.0
+def leistungs_score(df):
+    gehalt_aktuell, fehler_aktuell = validierung.zahlen(df[GEHALT_AKTUELL])
+    gehalt_einstieg, fehler_einstieg = validierung.zahlen(df[GEHALT_EINSTIEG])
+    with np.errstate(divide="ignore", invalid="ignore"):
         ratio = gehalt_aktuell / gehalt_einstieg
-        if ratio > 1.5:
-            return 1.0
-        elif ratio > 1.2:
-            return 0.7
-        else:
-            return 0.4
-    except:
-        return 0.0
+    score = np.select(
+        [fehler_aktuell | fehler_einstieg, gehalt_einstieg <= 0, ratio > 1.5, ratio > 1.2],
+        [0.0, 0.0, 1.0, 0.7],
+        default=0.4,
+    )
+    return pd.Series(score, index=df.index)
+
 
 # 3. Kontinuität (Verbleibsdauer & Fehlzeiten)
-def kontinuität_score(row):
-    try:
-        eintritt = pd.to_datetime(row['Einstellungsdatum'])
-        austritt = pd.to_datetime(row['Kündigungsdatum']) if pd.notnull(row['Kündigungsdatum']) else pd.Timestamp.now()
-        dauer_jahre = (austritt - eintritt).days / 365.25
-        if dauer_jahre > 5:
-            score = 1.0
-        elif dauer_jahre > 2:
-            score = 0.6
-        else:
-            score = 0.3
-
-        fehlzeit = row['Fehlzeiten (Monaten)']
-        if pd.notnull(fehlzeit) and fehlzeit > 3:
-            score -= 0.2
-        return max(score, 0.0)
-    except:
-        return 0.0
+def kontinuität_score(df, stichtag=None):
+    stichtag = pd.Timestamp.now() if stichtag is None else pd.Timestamp(stichtag)
+    eintritt, fehler_eintritt = validierung.daten(df['Einstellungsdatum'])
+    austritt, fehler_austritt = validierung.daten(df['Kündigungsdatum'])
+    austritt = austritt.fillna(stichtag)
+    dauer_jahre = (austritt - eintritt).dt.days / 365.25
+
+    score = pd.Series(
+        np.select([dauer_jahre > 5, dauer_jahre > 2], [1.0, 0.6], default=0.3),
+        index=df.index,
+    )
+
+    fehlzeit, fehler_fehlzeit = validierung.zahlen(df['Fehlzeiten (Monaten)'])
+    score = score - np.where(fehlzeit > 3, 0.2, 0.0)
+    score = score.clip(lower=0.0)
+    return score.where(~(fehler_eintritt | fehler_austritt | fehler_fehlzeit), 0.0)
+
 
 # === Score berechnen ===
+# Die Eingaben werden einmal geprüft und normalisiert; Komponenten mit
+# ungültigen Werten zählen 0. mit_bericht=True liefert zusätzlich den
+# Fehlerbericht je Zeile (siehe validierung.bericht).
+
+def berechne_score(df, stichtag=None, mit_bericht=False):
+    geprueft, fehler = validierung.pruefen(df)
+    leistung = leistungs_score(geprueft).where(
+        ~fehler[[GEHALT_AKTUELL, GEHALT_EINSTIEG]].any(axis=1), 0.0)
+    kontinuitaet = kontinuität_score(geprueft, stichtag).where(
+        ~fehler[['Einstellungsdatum', 'Kündigungsdatum', 'Fehlzeiten (Monaten)']].any(axis=1), 0.0)
+    score = (100 * ((qualifikations_score(geprueft) + leistung + kontinuitaet) / 3)).round(1)
+    if mit_bericht:
+        return score, validierung.bericht(df, fehler)
+    return score
+
 
-def berechne_score(row):
-    return round(100 * np.mean([
-        qualifikations_score(row),
-        leistungs_score(row),
-        kontinuität_score(row)
-    ]), 1)
+if __name__ == "__main__":
+    # === Datei laden ===
+    file_path = "Datensatz HR-20240416 - Zusatzinfos.xlsx"
+    excel_file = pd.ExcelFile(file_path)
+    df = excel_file.parse(excel_file.sheet_names[0])
 
-df['Score (%)'] = df.apply(berechne_score, axis=1)
+    df['Score (%)'], fehlerbericht = berechne_score(df, mit_bericht=True)
+    if not fehlerbericht.empty:
+        print("Ungültige Werte:", validierung.fehlertext(fehlerbericht))
 
-# === Ergebnis anzeigen ===
+    # === Ergebnis anzeigen ===
 
-print(df[['Vorname', 'Nachname', 'Qualifikationstufe', 
-          'Monatsgehalt Einstieg', 'Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt', 
-          'Fehlzeiten (Monaten)', 'Einstellungsdatum', 
-          'Kündigungsdatum', 'Score (%)']].head(10))
+    print(df[['Vorname', 'Nachname', 'Qualifikationstufe',
+              'Monatsgehalt Einstieg', 'Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt',
+              'Fehlzeiten (Monaten)', 'Einstellungsdatum',
+              'Kündigungsdatum', 'Score (%)']].head(10))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+
+# Index über die Kandidaten einer Bewerberdatei, einmal pro Upload aufgebaut.
+# Kandidaten werden über ihre Zeilenposition (stabile ID) angesprochen, nicht über
+# den Namen: doppelte Namen und Namen mit ", " sind damit unproblematisch.
+#   finden(nachname, vorname)  Hash-Index, O(1) je Abfrage
+#   suchen(praefix, limit)     Präfixsuche (ohne Groß-/Kleinschreibung) per binärer
+#                              Suche über die sortierten Bezeichnungen
+class KandidatenIndex:
+    def __init__(self, df):
+        nachname = df["Nachname"].astype(str).str.strip()
+        vorname = df["Vorname"].astype(str).str.strip()
+        self.bezeichnungen = (nachname + ", " + vorname).to_numpy(dtype=object)
+        schluessel = pd.MultiIndex.from_arrays([nachname.str.lower().to_numpy(), vorname.str.lower().to_numpy()])
+        self._namen = pd.Series(np.arange(len(df)), index=schluessel).groupby(level=[0, 1]).indices
+        self._doppelt = schluessel.duplicated(keep=False)
+        klein = np.array([b.lower() for b in self.bezeichnungen], dtype=object)
+        self._reihenfolge = np.argsort(klein, kind="stable")
+        self._sortiert = klein[self._reihenfolge]
+
+    def __len__(self):
+        return len(self.bezeichnungen)
+
+    # Anzeigename; doppelte Namen werden um die Zeilennummer ergänzt
+    def bezeichnung(self, zeile):
+        name = self.bezeichnungen[zeile]
+        return f"{name} (Zeile {zeile + 1})" if self._doppelt[zeile] else name
+
+    def finden(self, nachname, vorname):
+        schluessel = (str(nachname).strip().lower(), str(vorname).strip().lower())
+        treffer = self._namen.get(schluessel)
+        return [] if treffer is None else sorted(int(z) for z in treffer)
+
+    # Zeilen, deren Bezeichnung mit praefix beginnt (in alphabetischer Reihenfolge)
+    def suchen(self, praefix="", limit=None):
+        praefix = praefix.strip().lower()
+        if praefix:
+            start = np.searchsorted(self._sortiert, praefix, side="left")
+            ende = np.searchsorted(self._sortiert, praefix + "\U0010ffff", side="left")
+        else:
+            start, ende = 0, len(self._sortiert)
+        if limit is not None:
+            ende = min(ende, start + limit)
+        return [int(z) for z in self._reihenfolge[start:ende]]
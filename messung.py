@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import io
+import time
+import threading
+from contextlib import contextmanager
+
+# Leichtgewichtige Instrumentierung der Hot Paths (Einlesen, Vorbereiten,
+# Modell laden, Prognose). Pro Stufe werden Aufrufe, Gesamt-/Maximaldauer und
+# verarbeitete Zeilen gezählt; dazu frei benannte Zähler (z. B. gelesene Bytes).
+# Kosten pro Messung: zwei perf_counter-Aufrufe und ein Lock.
+
+_lock = threading.Lock()
+_stufen = {}
+_zaehler = {}
+
+
+@contextmanager
+def stufe(name, zeilen=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        dauer = time.perf_counter() - start
+        with _lock:
+            eintrag = _stufen.setdefault(name, {"aufrufe": 0, "gesamt_s": 0.0, "max_s": 0.0, "zeilen": 0})
+            eintrag["aufrufe"] += 1
+            eintrag["gesamt_s"] += dauer
+            eintrag["max_s"] = max(eintrag["max_s"], dauer)
+            if zeilen is not None:
+                eintrag["zeilen"] += int(zeilen)
+
+
+def zaehlen(name, wert=1):
+    with _lock:
+        _zaehler[name] = _zaehler.get(name, 0) + wert
+
+
+def bericht():
+    import modell_cache
+    with _lock:
+        stufen = {name: dict(werte) for name, werte in _stufen.items()}
+        zaehler = dict(_zaehler)
+    for werte in stufen.values():
+        werte["mittel_ms"] = werte["gesamt_s"] / werte["aufrufe"] * 1000 if werte["aufrufe"] else 0.0
+    return {"stufen": stufen, "zaehler": zaehler, "modell_cache": modell_cache.cache_statistik()}
+
+
+def zuruecksetzen():
+    with _lock:
+        _stufen.clear()
+        _zaehler.clear()
+
+
+def bericht_text(b=None):
+    b = b or bericht()
+    zeilen = ["Stufe                    Aufrufe   gesamt [s]  mittel [ms]   max [s]     Zeilen"]
+    for name, w in sorted(b["stufen"].items(), key=lambda e: -e[1]["gesamt_s"]):
+        zeilen.append(f"{name:<24} {w['aufrufe']:>7} {w['gesamt_s']:>12.4f} {w['mittel_ms']:>12.3f} "
+                      f"{w['max_s']:>9.4f} {w['zeilen']:>10}")
+    for name, wert in sorted(b["zaehler"].items()):
+        zeilen.append(f"{name}: {wert}")
+    zeilen.append("Modell-Cache: " + ", ".join(f"{k}={v}" for k, v in b["modell_cache"].items()))
+    if "profil" in b:
+        zeilen.append(b["profil"])
+    if "speicher_spitze_bytes" in b:
+        zeilen.append(f"Speicher-Spitze (tracemalloc): {b['speicher_spitze_bytes'] / 1024 / 1024:.1f} MB")
+    return "\n".join(zeilen)
+
+
+# Optionales Profiling: cProfile (Top-Funktionen nach kumulierter Zeit) und/oder
+# tracemalloc (Spitzenverbrauch). Das übergebene Dict wird nach dem Block befüllt.
+@contextmanager
+def profil(cprofile=True, speicher=True, top=25):
+    ergebnis = {}
+    profiler = None
+    if speicher:
+        import tracemalloc
+        tracemalloc.start()
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield ergebnis
+    finally:
+        if profiler is not None:
+            import pstats
+            profiler.disable()
+            puffer = io.StringIO()
+            pstats.Stats(profiler, stream=puffer).sort_stats("cumulative").print_stats(top)
+            ergebnis["profil"] = puffer.getvalue()
+        if speicher:
+            import tracemalloc
+            ergebnis["speicher_spitze_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
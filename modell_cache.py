@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import hashlib
+import threading
+import time
+import messung
+import modell_store
+import wald_engine
+import score_tabelle
+import erklaerung
+import ueberwachung
+
+
+# Prozessweiter Modell-Cache: das Modell wird nur einmal pro Prozess deserialisiert.
+# Schlüssel ist (Pfad, mtime, Größe); ein neues Training legt eine neue Version im
+# Modellspeicher an bzw. überschreibt die Datei und invalidiert damit den Eintrag.
+# Mit mit_hash=True wird zusätzlich der Dateiinhalt gehasht (sicher gegen Kopien
+# mit identischem Zeitstempel).
+class ModellCache:
+    def __init__(self, mit_hash=False):
+        self.mit_hash = mit_hash
+        self._lock = threading.Lock()
+        self._eintraege = {}
+        self._artefakte = {}
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.ladezeit_gesamt = 0.0
+        self.ladezeit_letzte = 0.0
+
+    def _schluessel(self, pfad):
+        stat = os.stat(pfad)
+        schluessel = (stat.st_mtime_ns, stat.st_size)
+        if self.mit_hash:
+            with open(pfad, "rb") as f:
+                schluessel += (hashlib.sha256(f.read()).hexdigest(),)
+        return schluessel
+
+    def laden(self, pfad=None):
+        if pfad is None:
+            pfad = modell_store.modell_pfad()
+        pfad = os.path.abspath(pfad)
+        schluessel = self._schluessel(pfad)
+        with self._lock:
+            eintrag = self._eintraege.get(pfad)
+            if eintrag is not None and eintrag[0] == schluessel:
+                self.treffer += 1
+                return eintrag[1]
+
+            import joblib
+            start = time.perf_counter()
+            with messung.stufe("modell_laden"):
+                if pfad.endswith(".joblib"):
+                    model = joblib.load(pfad, mmap_mode="r")
+                else:
+                    model = joblib.load(pfad)
+            dauer = time.perf_counter() - start
+
+            self._eintraege[pfad] = (schluessel, model)
+            self.fehlschlaege += 1
+            self.ladezeit_letzte = dauer
+            self.ladezeit_gesamt += dauer
+            return model
+
+    # Abgeleitete Artefakte eines Modells (z. B. kompilierter Wald, Score-Tabelle).
+    # Liegen sie im Versionsverzeichnis des Modellspeichers, werden sie per mmap
+    # geladen, ohne das Modell selbst zu deserialisieren (Versionen sind
+    # unveränderlich, Schlüssel ist der Stand der Modelldatei); sonst werden sie
+    # mit erzeugen(model) berechnet (None = nicht verfügbar).
+    def _artefakt(self, name, pfad, laden, erzeugen):
+        if pfad is None:
+            pfad = modell_store.modell_pfad()
+        pfad = os.path.abspath(pfad)
+        schluessel = self._schluessel(pfad)
+        with self._lock:
+            eintrag = self._artefakte.get((name, pfad))
+            if eintrag is not None and eintrag[0] == schluessel:
+                self.treffer += 1
+                return eintrag[1]
+        start = time.perf_counter()
+        verzeichnis = os.path.join(os.path.dirname(pfad), name)
+        if os.path.basename(pfad).startswith("model.joblib") and os.path.isdir(verzeichnis):
+            artefakt = laden(verzeichnis)
+        else:
+            artefakt = erzeugen(self.laden(pfad)) if erzeugen is not None else None
+        dauer = time.perf_counter() - start
+        with self._lock:
+            self._artefakte[(name, pfad)] = (schluessel, artefakt)
+            self.fehlschlaege += 1
+            self.ladezeit_letzte = dauer
+            self.ladezeit_gesamt += dauer
+        return artefakt
+
+    def laden_wald(self, pfad=None):
+        return self._artefakt("wald", pfad, wald_engine.KompilierterWald.laden,
+                              wald_engine.KompilierterWald.aus_modell)
+
+    def laden_tabelle(self, pfad=None, erzeugen=None):
+        return self._artefakt("tabelle", pfad, score_tabelle.ScoreTabelle.laden, erzeugen)
+
+    # Überwachungsbasis (Profil der Trainingsdaten); None für Modelle ohne Basis
+    def laden_basis(self, pfad=None):
+        return self._artefakt("ueberwachung", pfad, ueberwachung.Profil.laden, None)
+
+    # Erklärer zum kompilierten Wald; wird neu aufgebaut, sobald sich der Wald ändert
+    def laden_erklaerer(self, n_features, pfad=None):
+        wald = self.laden_wald(pfad)
+        schluessel = ("erklaerung", os.path.abspath(pfad or modell_store.modell_pfad()))
+        with self._lock:
+            eintrag = self._artefakte.get(schluessel)
+            if eintrag is not None and eintrag[1].wald is wald:
+                self.treffer += 1
+                return eintrag[1]
+        erklaerer = erklaerung.Erklaerer(wald, n_features)
+        with self._lock:
+            self._artefakte[schluessel] = (None, erklaerer)
+            self.fehlschlaege += 1
+        return erklaerer
+
+    # Artefakt vorgeben, z. B. im Worker-Prozess per mmap aus einem Verzeichnis geladen
+    def setzen(self, name, artefakt, pfad=None):
+        pfad = os.path.abspath(pfad or modell_store.modell_pfad())
+        schluessel = self._schluessel(pfad)
+        with self._lock:
+            self._artefakte[(name, pfad)] = (schluessel, artefakt)
+
+    def invalidieren(self, pfad=None):
+        with self._lock:
+            if pfad is None:
+                self._eintraege.clear()
+                self._artefakte.clear()
+            else:
+                pfad = os.path.abspath(pfad)
+                self._eintraege.pop(pfad, None)
+                self._artefakte = {k: v for k, v in self._artefakte.items() if k[1] != pfad}
+
+    def statistik(self):
+        with self._lock:
+            return {
+                "treffer": self.treffer,
+                "fehlschlaege": self.fehlschlaege,
+                "ladezeit_gesamt_s": round(self.ladezeit_gesamt, 6),
+                "ladezeit_letzte_s": round(self.ladezeit_letzte, 6),
+                "eintraege": len(self._eintraege),
+                "artefakte": len(self._artefakte),
+            }
+
+
+# Globale Instanz für CLI und Streamlit-Interface
+_cache = ModellCache()
+
+
+# Ohne Pfad wird die aktuelle Version aus dem Modellspeicher geladen
+def lade_modell(pfad=None):
+    return _cache.laden(pfad)
+
+
+def lade_wald(pfad=None):
+    return _cache.laden_wald(pfad)
+
+
+def lade_tabelle(pfad=None, erzeugen=None):
+    return _cache.laden_tabelle(pfad, erzeugen)
+
+
+def lade_basis(pfad=None):
+    return _cache.laden_basis(pfad)
+
+
+def lade_erklaerer(n_features, pfad=None):
+    return _cache.laden_erklaerer(n_features, pfad)
+
+
+def artefakt_setzen(name, artefakt, pfad=None):
+    _cache.setzen(name, artefakt, pfad)
+
+
+def invalidieren(pfad=None):
+    _cache.invalidieren(pfad)
+
+
+def cache_statistik():
+    return _cache.statistik()
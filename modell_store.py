@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import json
+import time
+import uuid
+import shutil
+import wald_engine
+
+# Bisheriges Einzelmodell; wird nur verwendet, solange der Store leer ist
+MODELL_PFAD = "prognose_model_ethisch.pkl"
+
+STORE_VERZEICHNIS = os.environ.get("PROGNOSE_MODELL_DIR", "modelle")
+_ZEIGER = "CURRENT"
+_MODELL_DATEI = "model.joblib"
+_MODELL_DATEI_KOMPRIMIERT = "model.joblib.z"
+_META_DATEI = "meta.json"
+
+
+# Versionierter Modellspeicher:
+#   modelle/<version>/model.joblib   unkomprimiert, per mmap_mode ladbar
+#   modelle/<version>/meta.json      Metadaten (Datensatz-Hash, Features, Metriken, ...)
+#   modelle/<version>/wald/*.npy     flache Knotenarrays für wald_engine (per mmap geteilt)
+#   modelle/<version>/<artefakt>/    weitere abgeleitete Artefakte, z. B. die Score-Tabelle
+#   modelle/CURRENT                  Zeiger auf die aktive Version inkl. Historie
+# Versionen sind unveränderlich; Zeigerwechsel erfolgen atomar per os.replace.
+
+def _atomar_schreiben(pfad, text):
+    tmp_pfad = f"{pfad}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_pfad, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_pfad, pfad)
+
+
+def _zeiger_lesen():
+    try:
+        with open(os.path.join(STORE_VERZEICHNIS, _ZEIGER), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": None, "historie": []}
+
+
+def _zeiger_schreiben(version, historie):
+    _atomar_schreiben(os.path.join(STORE_VERZEICHNIS, _ZEIGER),
+                      json.dumps({"version": version, "historie": historie}))
+
+
+def _versions_pfad(version):
+    return os.path.join(STORE_VERZEICHNIS, version)
+
+
+# Modell als neue Version ablegen; mit aktivieren=True wird sie sofort aktuell.
+# komprimieren=True spart Platz, das Artefakt ist dann aber nicht mehr mmap-fähig.
+# artefakte: {Name: Objekt mit speichern(verzeichnis)} für abgeleitete Daten
+def speichern(model, metadaten=None, aktivieren=True, komprimieren=False, artefakte=None):
+    os.makedirs(STORE_VERZEICHNIS, exist_ok=True)
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    import joblib
+    tmp_verzeichnis = os.path.join(STORE_VERZEICHNIS, f".{version}.tmp")
+    os.makedirs(tmp_verzeichnis)
+    try:
+        if komprimieren:
+            joblib.dump(model, os.path.join(tmp_verzeichnis, _MODELL_DATEI_KOMPRIMIERT), compress=3)
+        else:
+            joblib.dump(model, os.path.join(tmp_verzeichnis, _MODELL_DATEI))
+        if hasattr(model, "estimators_"):
+            wald_engine.KompilierterWald.aus_modell(model).speichern(os.path.join(tmp_verzeichnis, "wald"))
+        for name, artefakt in (artefakte or {}).items():
+            artefakt.speichern(os.path.join(tmp_verzeichnis, name))
+        meta = dict(metadaten or {})
+        meta.update({"version": version, "erstellt": time.strftime("%Y-%m-%d %H:%M:%S"),
+                     "komprimiert": komprimieren})
+        with open(os.path.join(tmp_verzeichnis, _META_DATEI), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False, default=str)
+        os.rename(tmp_verzeichnis, _versions_pfad(version))
+    except BaseException:
+        shutil.rmtree(tmp_verzeichnis, ignore_errors=True)
+        raise
+    if aktivieren:
+        aktivieren_version(version)
+    return version
+
+
+def aktuelle_version():
+    return _zeiger_lesen()["version"]
+
+
+# Version mit ladbarem Modellartefakt (unvollständige oder gelöschte Versionen nicht)
+def _vorhanden(version):
+    return any(os.path.isfile(os.path.join(_versions_pfad(version), datei))
+               for datei in (_MODELL_DATEI, _MODELL_DATEI_KOMPRIMIERT))
+
+
+def aktivieren_version(version):
+    if not _vorhanden(version):
+        raise ValueError(f"Unbekannte Modellversion: '{version}'")
+    zeiger = _zeiger_lesen()
+    historie = zeiger["historie"]
+    if zeiger["version"] is not None and zeiger["version"] != version:
+        historie = historie + [zeiger["version"]]
+    _zeiger_schreiben(version, historie)
+
+
+# Auf die zuvor aktive Version zurückschalten; Versionen ohne Modellartefakt
+# werden übersprungen und aus der Historie entfernt
+def zurueckrollen():
+    historie = list(_zeiger_lesen()["historie"])
+    while historie:
+        vorherige = historie.pop()
+        if _vorhanden(vorherige):
+            _zeiger_schreiben(vorherige, historie)
+            return vorherige
+    raise ValueError("Keine vorherige Modellversion vorhanden.")
+
+
+def versionen():
+    try:
+        namen = sorted(n for n in os.listdir(STORE_VERZEICHNIS)
+                       if os.path.isfile(os.path.join(STORE_VERZEICHNIS, n, _META_DATEI)))
+    except FileNotFoundError:
+        return []
+    return [metadaten(n) for n in namen]
+
+
+def metadaten(version=None):
+    version = version or aktuelle_version()
+    if version is None:
+        return {}
+    with open(os.path.join(_versions_pfad(version), _META_DATEI), encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Pfad zum Artefakt der Version (Standard: aktuelle Version, sonst Altmodell)
+def modell_pfad(version=None):
+    version = version or aktuelle_version()
+    if version is None:
+        return MODELL_PFAD
+    pfad = os.path.join(_versions_pfad(version), _MODELL_DATEI)
+    if os.path.exists(pfad):
+        return pfad
+    return os.path.join(_versions_pfad(version), _MODELL_DATEI_KOMPRIMIERT)
+
+
+def modell_vorhanden():
+    return os.path.exists(modell_pfad())
+
+
+# Modell laden; unkomprimierte Artefakte werden per Default memory-mapped
+def laden(version=None, mmap_mode="r"):
+    import joblib
+    pfad = modell_pfad(version)
+    if pfad.endswith(".z") or pfad == MODELL_PFAD:
+        return joblib.load(pfad)
+    return joblib.load(pfad, mmap_mode=mmap_mode)
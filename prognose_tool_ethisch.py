@@ -1,83 +1,603 @@
 #!/usr/bin/env python3
 # coding: utf-8
 
+import os
+import sys
+import time
+import functools
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-import joblib
-
-# Globale LabelEncoder zur Reproduzierbarkeit für Streamlit-Interface
-le_quali = LabelEncoder().fit(["H", "S", "M", "A"])
-le_schul = LabelEncoder().fit(["MS", "AS", "OS"])
-le_beruf = LabelEncoder().fit(["ST", "K", "O", "HW"])
+import modell_cache
+import modell_store
+import score_tabelle
+import score_speicher
+import einlesen
+import messung
+import validierung
+import export
+import erklaerung
+import wald_engine
+import ueberwachung
 
 # Nur reduzierte Features (ethisch vertretbar)
-def vorbereiten_ethisch(df, is_training=True):
-    df = df.copy()
-    df["Schulabschluss"] = df["Schulabschluss"].replace({"O": "OS"})
-    if "Kündigungsdatum" in df.columns:
-        df["IstGekündigt"] = df["Kündigungsdatum"].notnull().astype(int)
+FEATURES = ["Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt", "Monatsgehalt Einstieg",
+            "Qualifikationstufe", "Schulabschluss", "Berufabschluss"]
+# Klassen je Kategorie, sortiert wie bei LabelEncoder.fit (Code = Position);
+# so muss sklearn für Prognosen aus dem Modellspeicher nicht importiert werden
+KATEGORIEN = {
+    "Qualifikationstufe": np.array(sorted(["H", "S", "M", "A"])),
+    "Schulabschluss": np.array(sorted(["MS", "AS", "OS"])),
+    "Berufabschluss": np.array(sorted(["ST", "K", "O", "HW"])),
+}
+_ENCODER_NAMEN = {"le_quali": "Qualifikationstufe", "le_schul": "Schulabschluss", "le_beruf": "Berufabschluss"}
+
+# Die bisherigen globalen LabelEncoder bleiben erreichbar, werden aber erst beim
+# ersten Zugriff erzeugt (importiert sklearn nur bei Bedarf)
+def __getattr__(name):
+    if name in _ENCODER_NAMEN:
+        from sklearn.preprocessing import LabelEncoder
+        encoder = LabelEncoder().fit(KATEGORIEN[_ENCODER_NAMEN[name]])
+        globals()[name] = encoder
+        return encoder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    df["Qualifikationstufe"] = le_quali.transform(df["Qualifikationstufe"].astype(str))
-    df["Schulabschluss"] = le_schul.transform(df["Schulabschluss"].astype(str))
-    df["Berufabschluss"] = le_beruf.transform(df["Berufabschluss"].astype(str))
+# Prüfschema der Modellmerkmale für validierung (Gehälter Zahlen, Rest Codes in Modellreihenfolge)
+SCHEMA = {spalte: list(KATEGORIEN[spalte]) if spalte in KATEGORIEN else validierung.ZAHL for spalte in FEATURES}
 
-    features = ["Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt", "Monatsgehalt Einstieg",
-                "Qualifikationstufe", "Schulabschluss", "Berufabschluss"]
+# Merkmalsmatrix aus Rohdaten (Gehälter numerisch, Kategorien als Codes).
+# Die Eingaben werden in einem Durchlauf über validierung geprüft und
+# normalisiert (Leerraum, Dezimalkomma, Groß-/Kleinschreibung, O -> OS).
+# Alle Merkmale landen direkt in einer zusammenhängenden float32-Matrix (dem
+# Eingabeformat aller Backends); der DataFrame ist nur eine Sicht darauf, es wird
+# weder der Eingaberahmen kopiert noch vor der Prognose erneut konvertiert.
+# strikt=True: ungültige Werte führen zu einem validierung.Eingabefehler; sonst enthält X nur
+# die gültigen Zeilen. Rückgabe: (X, Maske der gültigen Zeilen, Fehlerbericht oder None)
+def _merkmale(df, strikt=True):
+    geprueft, fehler = validierung.pruefen(df, SCHEMA, pflicht=FEATURES)
+    gueltig = ~fehler.to_numpy().any(axis=1)
+    bericht = None
+    if not gueltig.all():
+        bericht = validierung.bericht(df, fehler, SCHEMA)
+        if strikt:
+            raise validierung.Eingabefehler(f"Ungültige Eingabedaten: {validierung.fehlertext(bericht)}")
+    werte = np.empty((int(gueltig.sum()), len(FEATURES)), dtype=np.float32)
+    for pos, spalte in enumerate(FEATURES):
+        if spalte in KATEGORIEN:
+            spaltenwerte = geprueft[spalte].cat.codes.to_numpy()
+        else:
+            spaltenwerte = geprueft[spalte].to_numpy()
+        werte[:, pos] = spaltenwerte if bericht is None else spaltenwerte[gueltig]
+    index = df.index if bericht is None else df.index[gueltig]
+    return pd.DataFrame(werte, index=index, columns=FEATURES, copy=False), gueltig, bericht
 
+# Zeilen mit ungültigen Merkmalen werden übersprungen (siehe _vorbereiten für den Bericht)
+def vorbereiten_ethisch(df, is_training=True):
+    X, ziel, _, _ = _vorbereiten(df, is_training)
+    return X, ziel
+
+def _vorbereiten(df, is_training):
+    with messung.stufe("vorbereiten", zeilen=len(df)):
+        X, gueltig, bericht = _merkmale(df, strikt=False)
     if is_training:
-        return df[features], df["IstGekündigt"]
+        y = df["Kündigungsdatum"].notnull().astype(int).rename("IstGekündigt")
+        return X, y[gueltig], gueltig, bericht
     else:
-        return df[features], df[["Nachname", "Vorname"]] if "Nachname" in df.columns else df[features]
+        # Namen nur der gültigen Zeilen, damit sie denselben Index wie X haben
+        return X, df.loc[gueltig, ["Nachname", "Vorname"]].copy() if "Nachname" in df.columns else X, gueltig, bericht
+
+# Standard-Suchraum für die optionale Hyperparameter-Suche
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 5, 10],
+    "min_samples_leaf": [1, 3],
+}
+
+ERKLAERUNG_STICHPROBE = 10000
 
 # Modelltraining
-def trainiere_modell(train_excel):
-    df_train = pd.read_excel(train_excel, sheet_name=None)["Tabelle1"]
-    X, y = vorbereiten_ethisch(df_train, is_training=True)
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X, y)
-    joblib.dump(model, "prognose_model_ethisch.pkl")
-    print("Modell trainiert und gespeichert als 'prognose_model_ethisch.pkl'.")
+# n_jobs: Anzahl Kerne für das Baumtraining bzw. die CV-Folds (-1 = alle Kerne)
+# suche: kreuzvalidierte Gittersuche über param_grid, Folds laufen im Prozesspool
+# warm_start: dem vorhandenen Modell zusatz_baeume weitere Bäume hinzufügen
+# fortschritt: optionaler Callback fortschritt(phase, anteil) für Statusanzeigen
+# train_excel: Datei, Verzeichnis, Glob-Muster oder Liste davon; sheet_name: Blatt
+# oder Liste von Blättern (siehe einlesen.lese_mehrere)
+def trainiere_modell(train_excel, n_jobs=-1, suche=False, param_grid=None, cv=5,
+                     warm_start=False, zusatz_baeume=50, fortschritt=None, sheet_name=einlesen.SHEET_NAME):
+    from sklearn.ensemble import RandomForestClassifier
+    melden = fortschritt or (lambda phase, anteil: None)
+    zeiten = {}
+    metriken = {}
+    melden("Einlesen", 0.0)
+    start = time.perf_counter()
+    df_train = einlesen.lese_mehrere(train_excel, sheet_name=sheet_name)
+    zeiten["Einlesen"] = time.perf_counter() - start
+
+    melden("Vorbereiten", 0.1)
+    start = time.perf_counter()
+    X, y, _, bericht = _vorbereiten(df_train, is_training=True)
+    zeiten["Vorbereiten"] = time.perf_counter() - start
+    if bericht is not None:
+        print(f"{len(df_train) - len(X)} Zeilen mit ungültigen Werten werden nicht verwendet: "
+              f"{validierung.fehlertext(bericht)}")
+
+    if warm_start and not modell_store.modell_vorhanden():
+        print("Kein vorhandenes Modell gefunden, es wird neu trainiert.")
+        warm_start = False
+
+    melden("Training", 0.2)
+    if warm_start:
+        start = time.perf_counter()
+        model = modell_store.laden(mmap_mode=None)
+        model.set_params(warm_start=True, n_jobs=n_jobs, oob_score=True,
+                         n_estimators=model.n_estimators + zusatz_baeume)
+        model.fit(X, y)
+        zeiten["Training (warm start)"] = time.perf_counter() - start
+    elif suche:
+        from sklearn.model_selection import GridSearchCV
+        start = time.perf_counter()
+        # Parallelisiert wird über die Folds; die Wälder selbst laufen dann einzeln
+        gitter = GridSearchCV(RandomForestClassifier(random_state=42, n_jobs=1, oob_score=True),
+                              param_grid or PARAM_GRID, cv=cv, n_jobs=n_jobs)
+        gitter.fit(X, y)
+        model = gitter.best_estimator_
+        zeiten["Hyperparameter-Suche"] = time.perf_counter() - start
+        metriken["cv_score"] = float(gitter.best_score_)
+        print(f"Beste Parameter: {gitter.best_params_} (CV-Score {gitter.best_score_:.3f})")
+    else:
+        start = time.perf_counter()
+        # oob_score: Out-of-Bag-Prognosen für die Überwachungsbasis (die Bäume bleiben unverändert)
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs, oob_score=True)
+        model.fit(X, y)
+        zeiten["Training"] = time.perf_counter() - start
+
+    # Für Einzelprognosen ist paralleles predict_proba langsamer als sequentiell
+    model.set_params(n_jobs=None, warm_start=False)
+
+    metriken["trainingsgenauigkeit"] = float(model.score(X, y))
+
+    melden("Score-Tabelle", 0.8)
+    start = time.perf_counter()
+    tabelle = _tabelle_erzeugen(model)
+    zeiten["Score-Tabelle"] = time.perf_counter() - start
+    if tabelle is None:
+        print(f"Score-Tabelle übersprungen (mehr als {score_tabelle.MAX_ZELLEN} Zellen); "
+              "Prognosen über den kompilierten Wald.", file=sys.stderr)
+
+    # Globale Bedeutung der Merkmale: Impurity-Wichtigkeit des Walds und mittlerer
+    # Betrag der Beiträge über die Trainingsdaten (in Prozentpunkten des Scores;
+    # bei großen Datensätzen über jede k-te Zeile, höchstens ERKLAERUNG_STICHPROBE)
+    erklaerer = erklaerung.Erklaerer(wald_engine.KompilierterWald.aus_modell(model), len(FEATURES))
+    stichprobe = X.iloc[::max(1, -(-len(X) // ERKLAERUNG_STICHPROBE))]
+    beitraege = erklaerer.erklaeren(stichprobe)[1]
+    beitraege_mittel = np.abs(beitraege).mean(axis=0) * 100 if len(stichprobe) else np.zeros(len(FEATURES))
+    wichtigkeiten = {
+        "impurity": dict(zip(FEATURES, map(float, model.feature_importances_))),
+        "beitraege_mittel": dict(zip(FEATURES, map(float, beitraege_mittel))),
+    }
+    # Basis für die Drift-Überwachung: Verteilungen aller Trainingszeilen und die
+    # Scores aus den Out-of-Bag-Prognosen. Prognosen auf den Trainingszeilen selbst
+    # wären überangepasst, neue Daten aus derselben Verteilung würden als Drift gelten.
+    oob_scores = None
+    oob = getattr(model, "oob_decision_function_", None)
+    if oob is not None:
+        oob_scores = ((1 - oob[:, 1]) * 100).round(2)
+        metriken["oob_genauigkeit"] = float(model.oob_score_)
+        # Nur für die Basis benötigt; nicht mit dem Modell speichern (eine Zeile je Trainingszeile)
+        del model.oob_decision_function_
+    artefakte = {"ueberwachung": ueberwachung.Profil.aus_training(
+        X, {spalte: list(klassen) for spalte, klassen in KATEGORIEN.items()},
+        scores=oob_scores, ungueltig=len(df_train) - len(X))}
+    if tabelle is not None:
+        artefakte["tabelle"] = tabelle
+
+    melden("Speichern", 0.9)
+    start = time.perf_counter()
+    # Neue Version im Modellspeicher; der Zeiger wird atomar umgesetzt
+    version = modell_store.speichern(model, {
+        "datensatz_hash": einlesen.datensatz_hash(df_train),
+        "zeilen": int(len(X)),
+        "zeilen_ungueltig": int(len(df_train) - len(X)),
+        "features": list(FEATURES),
+        "encoder_klassen": {spalte: [str(k) for k in klassen] for spalte, klassen in KATEGORIEN.items()},
+        "parameter": {k: v for k, v in model.get_params().items() if k != "n_jobs"},
+        "metriken": metriken,
+        "wichtigkeiten": wichtigkeiten,
+        "trainingszeit_s": round(sum(zeiten.values()), 3),
+        "warm_start": bool(warm_start),
+    }, artefakte=artefakte)
+    zeiten["Speichern"] = time.perf_counter() - start
+    melden("Abgeschlossen", 1.0)
+
+    print(f"Modell trainiert und gespeichert als Version '{version}'.")
+    for phase, dauer in zeiten.items():
+        print(f"  {phase}: {dauer:.3f} s")
+    return model
+
+# Inferenz-Backend: "sklearn", "kompiliert" (wald_engine, flache Knotenarrays),
+# "tabelle" (vorberechnete Score-Tabelle, score_tabelle) oder "auto": Tabelle, falls
+# beim Training erzeugt, sonst kompiliert für kleine Stapel und sklearn für große
+BACKEND = os.environ.get("PROGNOSE_BACKEND", "auto")
+KOMPILIERT_MAX_ZEILEN = 1024
+
+# Eingabebereich der Oberfläche: Gehälter 2000–20000 € in Schritten von 100 €
+GEHALT_RASTER = np.arange(2000, 20001, 100)
+
+# Score-Tabelle über den diskreten Eingaberaum (Gehälter stetig, Rest kategorisch).
+# Bei wenigen Schwellen deckt sie alle Gehälter ab; bei stetigen Trainingsgehältern
+# wäre das Gitter zu groß, dann nur die Gehaltsintervalle des Oberflächenrasters
+# (die übrigen Zeilen bewertet der Wald).
+def _tabelle_erzeugen(model):
+    stetige = [FEATURES.index(s) for s in FEATURES if s not in KATEGORIEN]
+    diskrete = {FEATURES.index(s): len(klassen) for s, klassen in KATEGORIEN.items()}
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(model, stetige=stetige, diskrete=diskrete)
+    if tabelle is None:
+        tabelle = score_tabelle.ScoreTabelle.aus_modell(
+            model, stetige=stetige, diskrete=diskrete, raster=[GEHALT_RASTER] * len(stetige))
+    return tabelle
+
+# Kündigungswahrscheinlichkeit (Klasse 1) je Zeile der Merkmalsmatrix
+def _kuendigungs_proba(X):
+    if BACKEND in ("auto", "tabelle"):
+        tabelle = modell_cache.lade_tabelle(erzeugen=_tabelle_erzeugen if BACKEND == "tabelle" else None)
+        if tabelle is not None:
+            with messung.stufe("prognose_tabelle", zeilen=len(X)):
+                proba = tabelle.proba(X)
+            # Gehälter außerhalb der abgedeckten Intervalle über den Wald
+            fehlend = np.isnan(proba)
+            if fehlend.any():
+                proba[fehlend] = _wald_proba(X[fehlend])
+            return proba
+    return _wald_proba(X)
+
+def _wald_proba(X):
+    if BACKEND == "kompiliert" or (BACKEND != "sklearn" and len(X) <= KOMPILIERT_MAX_ZEILEN):
+        wald = modell_cache.lade_wald()
+        with messung.stufe("prognose_kompiliert", zeilen=len(X)):
+            return wald.predict_proba(X)[:, 1]
+    model = modell_cache.lade_modell()
+    with messung.stufe("prognose_sklearn", zeilen=len(X)):
+        return model.predict_proba(X)[:, 1]
+
+# Eignungs-Score (%) aus einer fertigen Merkmalsmatrix, ein Modellaufruf je Stapel
+def _eignungs_scores(X):
+    prognosen = _kuendigungs_proba(X)
+    return ((1 - prognosen) * 100).round(2)
+
+# Rohdaten in DataFrame mit den Feature-Spalten überführen
+# (Liste von Dicts, Liste von Zeilen, NumPy-Array oder DataFrame)
+def _als_frame(records):
+    if isinstance(records, pd.DataFrame):
+        return records
+    if isinstance(records, dict):
+        records = [records]
+    if isinstance(records, np.ndarray):
+        return pd.DataFrame(np.atleast_2d(records), columns=FEATURES)
+    records = list(records)
+    if records and isinstance(records[0], dict):
+        return pd.DataFrame.from_records(records, columns=FEATURES)
+    return pd.DataFrame(records, columns=FEATURES)
+
+# Stapelprognose für viele Bewerber in einem Durchlauf
+def prognose_batch(records):
+    df = _als_frame(records)
+    if len(df) == 0:
+        return np.empty(0)
+    return _eignungs_scores(_merkmale(df)[0])
 
 # Einzelprognose für Streamlit
 def prognose_manuell(monatsgehalt_aktuell, monatsgehalt_einstieg, quali, schul, beruf):
-    model = joblib.load("prognose_model_ethisch.pkl")
-    daten = pd.DataFrame([[
-        monatsgehalt_aktuell,
-        monatsgehalt_einstieg,
-        le_quali.transform([quali])[0],
-        le_schul.transform([schul])[0],
-        le_beruf.transform([beruf])[0]
-    ]], columns=["Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt", "Monatsgehalt Einstieg",
-                 "Qualifikationstufe", "Schulabschluss", "Berufabschluss"])
-
-    p = model.predict_proba(daten)[:, 1]
-    eignung_score = round((1 - p[0]) * 100, 2)
-    return eignung_score
-
-# Prognose über Excel-Testdatei
-def prognose_excel(test_excel):
-    df_test = pd.read_excel(test_excel, sheet_name=None)["Tabelle1"]
-    X_test, namen = vorbereiten_ethisch(df_test, is_training=False)
-    model = joblib.load("prognose_model_ethisch.pkl")
-    prognosen = model.predict_proba(X_test)[:, 1]
-    score = ((1 - prognosen) * 100).round(2)
-    if isinstance(namen, pd.DataFrame):
-        namen["Prognose-Score (%)"] = score
-        return namen
+    return prognose_batch([[monatsgehalt_aktuell, monatsgehalt_einstieg, quali, schul, beruf]])[0]
+
+# Sharded Bewertung im Prozesspool: die Merkmalsmatrix wird in Blöcke zu
+# chunk_size Zeilen geteilt und pool.map erhält die Reihenfolge. Die Worker
+# deserialisieren das sklearn-Modell nicht (das kopiert alle Baumarrays je
+# Prozess), sondern laden kompilierten Wald und ggf. Score-Tabelle per mmap und
+# teilen sie damit schreibgeschützt; bitgleich zu sklearn, daher gilt das auch
+# für das Backend "sklearn". Die Arrays kommen aus dem Versionsverzeichnis des
+# Modellspeichers, sonst (Altmodell, erst zur Laufzeit erzeugte Tabelle) werden
+# sie einmal in ein temporäres Verzeichnis geschrieben.
+def _worker_artefakte(tmp_verzeichnis):
+    pfad = os.path.abspath(modell_store.modell_pfad())
+    artefakte = {"wald": modell_cache.lade_wald()}
+    if BACKEND in ("auto", "tabelle"):
+        tabelle = modell_cache.lade_tabelle(erzeugen=_tabelle_erzeugen if BACKEND == "tabelle" else None)
+        if tabelle is not None:
+            artefakte["tabelle"] = tabelle
+    verzeichnisse = {}
+    for name, artefakt in artefakte.items():
+        verzeichnis = os.path.join(os.path.dirname(pfad), name)
+        if not (os.path.basename(pfad).startswith("model.joblib") and os.path.isdir(verzeichnis)):
+            verzeichnis = os.path.join(tmp_verzeichnis, name)
+            artefakt.speichern(verzeichnis)
+        verzeichnisse[name] = verzeichnis
+    return verzeichnisse
+
+def _worker_start(store_verzeichnis, verzeichnisse):
+    global BACKEND, KOMPILIERT_MAX_ZEILEN
+    modell_store.STORE_VERZEICHNIS = store_verzeichnis
+    modell_cache.artefakt_setzen("wald", wald_engine.KompilierterWald.laden(verzeichnisse["wald"], mmap_mode="r"))
+    BACKEND = "kompiliert"
+    if "tabelle" in verzeichnisse:
+        modell_cache.artefakt_setzen(
+            "tabelle", score_tabelle.ScoreTabelle.laden(verzeichnisse["tabelle"], mmap_mode="r"))
+        BACKEND = "tabelle"
+    # Zeilen außerhalb der Tabelle ebenfalls über den Wald, nie über sklearn
+    KOMPILIERT_MAX_ZEILEN = np.inf
+
+def _block_scores(block):
+    return _eignungs_scores(pd.DataFrame(block, columns=FEATURES))
+
+def _scores_parallel(X, prozesse=-1, chunk_size=50000):
+    if prozesse in (None, -1):
+        prozesse = os.cpu_count() or 1
+    if prozesse <= 1 or len(X) <= chunk_size:
+        return _eignungs_scores(X)
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    # float32 wie in den Backends, damit die Ergebnisse bitgleich bleiben
+    werte = np.asarray(X, dtype=np.float32)
+    bloecke = [werte[start:start + chunk_size] for start in range(0, len(werte), chunk_size)]
+    with messung.stufe("prognose_parallel", zeilen=len(X)), tempfile.TemporaryDirectory() as tmp:
+        with ProcessPoolExecutor(max_workers=min(prozesse, len(bloecke)), initializer=_worker_start,
+                                 initargs=(modell_store.STORE_VERZEICHNIS, _worker_artefakte(tmp))) as pool:
+            return np.concatenate(list(pool.map(_block_scores, bloecke)))
+
+# Herkunfts- und Namensspalten als Grundgerüst eines Ergebnisframes
+def _kopf(df):
+    if "Nachname" not in df.columns:
+        return pd.DataFrame(index=df.index)
+    herkunft = [s for s in (einlesen.QUELLE_SPALTE, einlesen.BLATT_SPALTE) if s in df.columns]
+    return df[herkunft + ["Nachname", "Vorname"]].copy()
+
+# Ergebnisframe (Namen + Score) für einen Block Bewerberdaten
+# inkrementell: nur neue/geänderte Merkmalskombinationen bewerten (score_speicher);
+# die Statistik steht danach in ergebnis.attrs["inkrementell"]
+# prozesse > 1 (-1 = alle Kerne): Bewertung in Blöcken zu chunk_size Zeilen im Prozesspool
+# Zeilen mit ungültigen Werten erhalten keinen Score; mit fehlerspalte=True wird
+# die Meldung je Zeile in der Spalte "Fehler" ausgegeben.
+# profil: ueberwachung.Profil, das um diesen Block fortgeschrieben wird (optional)
+# Rückgabe: (Ergebnis, Fehlerbericht oder None)
+def _ergebnis(df, inkrementell=False, prozesse=1, chunk_size=50000, fehlerspalte=True, profil=None):
+    X_test, _, gueltig, bericht = _vorbereiten(df, is_training=False)
+    statistik = None
+    rechnen = _eignungs_scores
+    if prozesse != 1:
+        rechnen = functools.partial(_scores_parallel, prozesse=prozesse, chunk_size=chunk_size)
+    if inkrementell:
+        scores, statistik = score_speicher.bewerten(X_test, rechnen)
     else:
-        return pd.DataFrame({"Prognose-Score (%)": score})
-    
+        scores = rechnen(X_test)
+    score = np.full(len(df), np.nan)
+    score[gueltig] = scores
+    if profil is not None:
+        profil.erfassen(X_test, scores, ungueltig=len(df) - len(X_test))
+
+    ergebnis = _kopf(df)
+    ergebnis["Prognose-Score (%)"] = score
+    if bericht is not None and fehlerspalte:
+        ergebnis["Fehler"] = validierung.fehler_je_zeile(bericht, df.index)
+    if statistik is not None:
+        ergebnis.attrs["inkrementell"] = statistik
+    return ergebnis, bericht
+
+# Prognose über Excel-Testdatei; ungültige Zeilen brechen die Bewertung nicht ab,
+# sondern erhalten eine Fehlermeldung (mit_bericht=True: zusätzlich der
+# Fehlerbericht aus validierung.bericht bzw. None). Mehrere Dateien/Blätter werden
+# zu einem Lauf zusammengeführt, das Ergebnis enthält dann die Herkunftsspalten.
+# Hat das Modell eine Überwachungsbasis, wird der Stapel protokolliert und die
+# Auffälligkeiten gegenüber den Trainingsdaten stehen in ergebnis.attrs["drift"].
+def prognose_excel(test_excel, inkrementell=False, prozesse=1, chunk_size=50000, mit_bericht=False,
+                   sheet_name=einlesen.SHEET_NAME):
+    df_test = einlesen.lese_mehrere(test_excel, sheet_name=sheet_name, spalten=["Nachname", "Vorname"] + FEATURES)
+    profil = _ueberwachungsprofil()
+    ergebnis, bericht = _ergebnis(df_test, inkrementell=inkrementell, prozesse=prozesse, chunk_size=chunk_size,
+                                  profil=profil)
+    if profil is not None:
+        ergebnis.attrs["drift"] = _ueberwachung_abschliessen(profil, _quelle(test_excel))
+    return (ergebnis, bericht) if mit_bericht else ergebnis
+
+# Drift-Überwachung (ueberwachung.py): leeres Profil mit den Klassen der Basis des
+# aktiven Modells; None, wenn abgeschaltet oder das Modell keine Basis hat
+def _ueberwachungsprofil():
+    if not ueberwachung.AKTIV:
+        return None
+    basis = modell_cache.lade_basis()
+    return basis.leer() if basis is not None else None
+
+# Stapel protokollieren und mit der Basis vergleichen; Rückgabe: {Variable: Status}
+# für Variablen mit Status "beobachten" oder "drift"
+def _ueberwachung_abschliessen(profil, quelle=None):
+    ueberwachung.protokollieren(score_speicher.modell_kennung(), profil, quelle)
+    return ueberwachung.auffaelligkeiten(ueberwachung.vergleichen(modell_cache.lade_basis(), profil))
+
+def _quelle(eingabe):
+    if isinstance(eingabe, (list, tuple)):
+        return ", ".join(str(teil) for teil in eingabe)
+    return str(eingabe) if isinstance(eingabe, (str, os.PathLike)) else None
+
+# Drift-Bericht für das aktive Modell über alle (bzw. die letzten n) protokollierten
+# Stapel; None, wenn das Modell keine Überwachungsbasis hat
+def drift_bericht(letzte=None):
+    basis = modell_cache.lade_basis()
+    if basis is None:
+        return None
+    profil = ueberwachung.zeitraum(score_speicher.modell_kennung(), basis, letzte)
+    return ueberwachung.vergleichen(basis, profil)
+
+# Erklärung der Eignungs-Scores: Beitrag jedes Merkmals in Prozentpunkten (positiv =
+# erhöht die Eignung), zerlegt über die Entscheidungspfade aller Bäume
+# (erklaerung.Erklaerer). Basis + Summe der Beiträge ergibt den ungerundeten Score.
+# Rückgabe: (Basis in %, Beiträge als DataFrame mit den FEATURES als Spalten)
+def _eignungs_beitraege(X):
+    basis, beitraege = modell_cache.lade_erklaerer(len(FEATURES)).erklaeren(X)
+    return (1 - basis) * 100, pd.DataFrame(-100 * beitraege, index=X.index, columns=FEATURES)
+
+# Erklärungen für alle Bewerber einer Datei in einem Durchlauf; ungültige Zeilen
+# bleiben leer (die Meldungen liefert prognose_excel)
+def erklaerung_excel(test_excel, sheet_name=einlesen.SHEET_NAME):
+    df = einlesen.lese_mehrere(test_excel, sheet_name=sheet_name, spalten=["Nachname", "Vorname"] + FEATURES)
+    X, _, gueltig, _ = _vorbereiten(df, is_training=False)
+    basis, beitraege = _eignungs_beitraege(X)
+    werte = np.full((len(df), len(FEATURES)), np.nan)
+    werte[gueltig] = beitraege.to_numpy()
+    ergebnis = _kopf(df)
+    ergebnis["Basis (%)"] = np.where(gueltig, round(basis, 2), np.nan)
+    for pos, spalte in enumerate(FEATURES):
+        ergebnis[spalte] = werte[:, pos].round(2)
+    return ergebnis
+
+# Erklärung für einen einzelnen Bewerber: (Basis in %, Beiträge als Series)
+def erklaerung_manuell(monatsgehalt_aktuell, monatsgehalt_einstieg, quali, schul, beruf):
+    X = _merkmale(_als_frame([[monatsgehalt_aktuell, monatsgehalt_einstieg, quali, schul, beruf]]))[0]
+    basis, beitraege = _eignungs_beitraege(X)
+    return basis, beitraege.iloc[0]
+
+# Globale Bedeutung der Merkmale des aktiven Modells aus den beim Training
+# gespeicherten Metadaten (art: "impurity" oder "beitraege_mittel"); für das
+# Altmodell bzw. ältere Versionen wird "impurity" aus dem geladenen Modell gelesen,
+# "beitraege_mittel" ist dort nicht verfügbar (None)
+def globale_wichtigkeiten(art="impurity"):
+    gespeichert = modell_store.metadaten().get("wichtigkeiten", {}).get(art)
+    if gespeichert is not None:
+        return pd.Series(gespeichert).reindex(FEATURES)
+    if art != "impurity":
+        return None
+    return pd.Series(modell_cache.lade_modell().feature_importances_, index=FEATURES)
+
+# Streaming-Prognose für sehr große Dateien: blockweise lesen, bewerten und
+# direkt in die Ausgabe schreiben (CSV, Parquet oder xlsx, ohne Ausgabe: CSV auf stdout).
+# Der Speicherbedarf hängt nur von chunk_size ab, nicht von der Dateigröße.
+# Mehrere Eingabedateien (Verzeichnis, Glob, Liste) werden nacheinander in dieselbe
+# Ausgabe geschrieben, mit der Quelldatei (bzw. dem Tabellenblatt) als erster Spalte.
+def prognose_stream(eingabe, ausgabe=None, chunk_size=50000, sheet_name=einlesen.SHEET_NAME):
+    zeilen = 0
+    ungueltig = 0
+    pfade = einlesen.dateien(eingabe, endungen=einlesen.EXCEL_ENDUNGEN + (".csv", ".parquet"))
+    blaetter = list(sheet_name) if isinstance(sheet_name, (list, tuple)) else [sheet_name]
+    teile = [(pfad, blatt) for pfad in pfade
+             for blatt in (blaetter if str(pfad).lower().endswith(einlesen.EXCEL_ENDUNGEN) else blaetter[:1])]
+    profil = _ueberwachungsprofil()
+    schreiber = export.schreiber(ausgabe)
+    try:
+        for pfad, blatt in teile:
+            for block in einlesen.lese_bloecke(pfad, chunk_size=chunk_size, sheet_name=blatt):
+                if len(blaetter) > 1:
+                    block.insert(0, einlesen.BLATT_SPALTE, str(blatt))
+                if len(pfade) > 1:
+                    block.insert(0, einlesen.QUELLE_SPALTE, os.path.basename(pfad))
+                # Ohne Fehlerspalte, damit alle Blöcke dasselbe Schema haben; Meldungen gehen nach stderr
+                ergebnis, bericht = _ergebnis(block, fehlerspalte=False, profil=profil)
+                if bericht is not None:
+                    ungueltig += int(ergebnis["Prognose-Score (%)"].isna().sum())
+                    print(validierung.fehlertext(bericht), file=sys.stderr)
+                schreiber.schreiben(ergebnis)
+                zeilen += len(ergebnis)
+    finally:
+        schreiber.schliessen()
+    if ungueltig:
+        print(f"{ungueltig} Zeilen mit ungültigen Werten ohne Score.", file=sys.stderr)
+    if profil is not None and zeilen:
+        _drift_melden(_ueberwachung_abschliessen(profil, _quelle(eingabe)))
+    return zeilen
+
+def _drift_melden(auffaelligkeiten):
+    if auffaelligkeiten:
+        print("Abweichungen von den Trainingsdaten: "
+              + ", ".join(f"{name} ({status})" for name, status in auffaelligkeiten.items()), file=sys.stderr)
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Prognose-Tool (ethisch reduzierte Kriterien)")
-    parser.add_argument("--train", help="Pfad zur Trainings-Excel-Datei")
-    parser.add_argument("--test", help="Pfad zur Test-Excel-Datei (optional)")
+    parser.add_argument("--train", nargs="+",
+                        help="Trainings-Excel-Datei(en), Verzeichnis oder Glob-Muster")
+    parser.add_argument("--test", nargs="+",
+                        help="Test-Excel-Datei(en), Verzeichnis oder Glob-Muster (optional)")
+    parser.add_argument("--sheet", nargs="+", default=[einlesen.SHEET_NAME],
+                        help=f"Zu lesende(s) Tabellenblatt/-blätter (Standard: {einlesen.SHEET_NAME})")
+    parser.add_argument("--stream", action="store_true",
+                        help="Testdatei blockweise bewerten (xlsx, csv oder parquet)")
+    parser.add_argument("--chunk-size", type=int, default=50000,
+                        help="Zeilen pro Block im Streaming-Modus bzw. pro Shard bei --prozesse (Standard: 50000)")
+    parser.add_argument("--prozesse", type=int, default=1,
+                        help="Prozesse für die Bewertung mit --test (Standard: 1, -1 = alle Kerne); "
+                             "die Worker teilen kompilierten Wald bzw. Score-Tabelle per mmap")
+    parser.add_argument("--output",
+                        help="Ergebnisse exportieren statt ausgeben (.csv, .parquet oder .xlsx, Format nach Endung)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="Anzahl Kerne für das Training (Standard: -1 = alle)")
+    parser.add_argument("--suche", action="store_true",
+                        help="Kreuzvalidierte Hyperparameter-Suche vor dem Training")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Vorhandenem Modell weitere Bäume hinzufügen statt neu zu trainieren")
+    parser.add_argument("--zusatz-baeume", type=int, default=50,
+                        help="Anzahl zusätzlicher Bäume bei --warm-start (Standard: 50)")
+    parser.add_argument("--backend", choices=["auto", "sklearn", "kompiliert", "tabelle"],
+                        help="Inferenz-Backend (Standard: auto bzw. PROGNOSE_BACKEND)")
+    parser.add_argument("--drift", action="store_true",
+                        help="Drift-Bericht: protokollierte Stapel des aktiven Modells gegen die Trainingsdaten")
+    parser.add_argument("--drift-letzte", type=int,
+                        help="Für --drift nur die letzten N Stapel auswerten")
+    parser.add_argument("--erklaeren", action="store_true",
+                        help="Statt der Scores die Beiträge der Merkmale je Bewerber ausgeben (Prozentpunkte)")
+    parser.add_argument("--inkrementell", action="store_true",
+                        help="Nur neue oder geänderte Zeilen bewerten, übrige Scores aus dem Score-Speicher")
+    parser.add_argument("--profile", action="store_true",
+                        help="Laufzeiten je Stufe, cProfile und Speicherspitze ausgeben (stderr)")
+    parser.add_argument("--versionen", action="store_true", help="Gespeicherte Modellversionen auflisten")
+    parser.add_argument("--aktivieren", metavar="VERSION", help="Modellversion als aktuell setzen")
+    parser.add_argument("--rollback", action="store_true", help="Auf die zuvor aktive Modellversion zurückschalten")
     args = parser.parse_args()
 
-    if args.train:
-        trainiere_modell(args.train)
-    if args.test:
-        df_ergebnisse = prognose_excel(args.test)
-        print(df_ergebnisse.to_string(index=False))
\ No newline at end of file
+    if args.backend:
+        BACKEND = args.backend
+    if args.aktivieren:
+        modell_store.aktivieren_version(args.aktivieren)
+        print(f"Aktive Modellversion: '{args.aktivieren}'")
+    if args.rollback:
+        print(f"Aktive Modellversion: '{modell_store.zurueckrollen()}'")
+    if args.versionen:
+        aktuell = modell_store.aktuelle_version()
+        for meta in modell_store.versionen():
+            markierung = "*" if meta["version"] == aktuell else " "
+            print(f"{markierung} {meta['version']}  {meta.get('erstellt', '')}  "
+                  f"Zeilen: {meta.get('zeilen', '?')}  Metriken: {meta.get('metriken', {})}")
+
+    from contextlib import nullcontext
+    with (messung.profil() if args.profile else nullcontext({})) as profil:
+        blaetter = args.sheet[0] if len(args.sheet) == 1 else args.sheet
+        if args.train:
+            trainiere_modell(args.train, n_jobs=args.n_jobs, suche=args.suche,
+                             warm_start=args.warm_start, zusatz_baeume=args.zusatz_baeume, sheet_name=blaetter)
+        if args.test and args.stream:
+            anzahl = prognose_stream(args.test, args.output, chunk_size=args.chunk_size, sheet_name=blaetter)
+            if args.output:
+                print(f"{anzahl} Bewerber bewertet, Ergebnisse gespeichert in '{args.output}'.")
+        elif args.test and args.erklaeren:
+            df_erklaerung = erklaerung_excel(args.test, sheet_name=blaetter)
+            if args.output:
+                export.exportieren(df_erklaerung, args.output)
+                print(f"{len(df_erklaerung)} Bewerber erklärt, Ergebnisse gespeichert in '{args.output}'.")
+            else:
+                print(df_erklaerung.to_string(index=False))
+        elif args.test:
+            df_ergebnisse = prognose_excel(args.test, inkrementell=args.inkrementell, prozesse=args.prozesse,
+                                           chunk_size=args.chunk_size, sheet_name=blaetter)
+            if args.output:
+                export.exportieren(df_ergebnisse, args.output)
+                print(f"{len(df_ergebnisse)} Bewerber bewertet, Ergebnisse gespeichert in '{args.output}'.")
+            else:
+                print(df_ergebnisse.to_string(index=False))
+            _drift_melden(df_ergebnisse.attrs.get("drift"))
+            if args.inkrementell:
+                statistik = df_ergebnisse.attrs["inkrementell"]
+                print(f"{statistik['wiederverwendet']} von {statistik['zeilen']} Zeilen wiederverwendet, "
+                      f"{statistik['berechnet']} Merkmalskombinationen neu bewertet.", file=sys.stderr)
+        if args.drift:
+            vergleich = drift_bericht(args.drift_letzte)
+            if vergleich is None:
+                print("Das aktive Modell hat keine Überwachungsbasis; sie wird beim nächsten Training angelegt.")
+            else:
+                print(vergleich.round(3).to_string())
+
+    if args.profile:
+        print(messung.bericht_text({**messung.bericht(), **profil}), file=sys.stderr)
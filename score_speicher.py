@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import time
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+import einlesen
+import messung
+import modell_store
+
+# Ohne PROGNOSE_SCORE_DIR liegt der Speicher im Ingestion-Cache unter "scores"
+SCORE_VERZEICHNIS = os.environ.get("PROGNOSE_SCORE_DIR")
+# Obergrenze je Modellversion; beim Überschreiten werden die ältesten Einträge
+# verworfen, bis drei Viertel der Grenze erreicht sind
+MAX_EINTRAEGE = 2_000_000
+# Ab so vielen Teildateien werden sie zu einer zusammengefasst
+MAX_TEILE = 32
+
+
+# Persistenter Score-Speicher für die inkrementelle Bewertung. Jede Zeile wird
+# über das Tupel ihrer Merkmale (nach der Kodierung) per 64-Bit-Hash
+# identifiziert; da die Prognose nur von diesen Merkmalen abhängt, kann ein
+# gespeicherter Score für denselben Fingerabdruck und dieselbe Modellversion
+# unverändert wiederverwendet werden. Pro Version ein Verzeichnis; jeder Stapel
+# hängt nur seine neuen Einträge als eigene Parquet-Datei (fingerabdruck, score)
+# an, statt den ganzen Speicher neu zu schreiben. Sobald eine andere Version
+# bewertet (neues Training, Rollback), wird der Speicher der übrigen gelöscht.
+def _verzeichnis():
+    return SCORE_VERZEICHNIS or os.path.join(einlesen.CACHE_VERZEICHNIS, "scores")
+
+
+# Kennung des aktiven Modells: Version im Modellspeicher, sonst Stand des Altmodells
+def modell_kennung():
+    version = modell_store.aktuelle_version()
+    if version is not None:
+        return version
+    stat = os.stat(modell_store.modell_pfad())
+    return f"alt-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+# Ein Fingerabdruck pro Zeile der Merkmalsmatrix; die Werte werden vorher
+# einheitlich als float64 dargestellt, damit 3500 und 3500.0 gleich gehasht werden
+def fingerabdruecke(X):
+    werte = np.asarray(X, dtype=np.float64)
+    return pd.util.hash_pandas_object(pd.DataFrame(werte), index=False).to_numpy()
+
+
+class ScoreSpeicher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Kennung -> (Namen der gelesenen Teildateien, Scores)
+        self._geladen = {}
+
+    def _verzeichnis(self, kennung):
+        return os.path.join(_verzeichnis(), kennung)
+
+    # Teildateien in Schreibreihenfolge (der Name beginnt mit dem Zeitstempel)
+    def _teile(self, kennung):
+        try:
+            return sorted(n for n in os.listdir(self._verzeichnis(kennung)) if n.endswith(".parquet"))
+        except FileNotFoundError:
+            return []
+
+    # Neue Teildateien werden zu den bereits gelesenen hinzugefügt; fehlt eine
+    # gelesene (zusammengefasst oder vom Cache verdrängt), wird neu gelesen
+    def _laden(self, kennung):
+        teile = self._teile(kennung)
+        gelesen, scores = self._geladen.get(kennung, ((), None))
+        if scores is not None and tuple(teile[:len(gelesen)]) == gelesen:
+            if len(teile) == len(gelesen):
+                return scores
+            neu, stuecke = teile[len(gelesen):], [scores]
+        else:
+            gelesen, neu, stuecke = (), teile, []
+        for name in neu:
+            try:
+                df = pd.read_parquet(os.path.join(self._verzeichnis(kennung), name))
+            except FileNotFoundError:
+                continue
+            stuecke.append(pd.Series(df["score"].to_numpy(), index=pd.Index(df["fingerabdruck"].to_numpy())))
+            gelesen += (name,)
+        if stuecke:
+            scores = pd.concat(stuecke)
+            # Gleichzeitige Prozesse können denselben Fingerabdruck anhängen
+            scores = scores[~scores.index.duplicated(keep="last")]
+        else:
+            scores = pd.Series(dtype=np.float64, index=pd.Index([], dtype=np.uint64))
+        self._geladen[kennung] = (gelesen, scores)
+        return scores
+
+    def _schreiben(self, kennung, scores):
+        verzeichnis = self._verzeichnis(kennung)
+        os.makedirs(verzeichnis, exist_ok=True)
+        pfad = os.path.join(verzeichnis, f"{time.time_ns():020d}-{os.getpid()}.parquet")
+        tmp_pfad = f"{pfad}.tmp"
+        pd.DataFrame({"fingerabdruck": scores.index.to_numpy(), "score": scores.to_numpy()}).to_parquet(
+            tmp_pfad, index=False)
+        os.replace(tmp_pfad, pfad)
+
+    # Neue Einträge als Teildatei anhängen; bei zu vielen Teilen oder Einträgen
+    # alles (ohne die ältesten Einträge) in eine Datei zusammenfassen
+    def _anhaengen(self, kennung, neue):
+        self._veraltete_entfernen(kennung)
+        self._schreiben(kennung, neue)
+        gespeichert = self._laden(kennung)
+        gelesen = self._geladen[kennung][0]
+        if len(gelesen) > MAX_TEILE or len(gespeichert) > MAX_EINTRAEGE:
+            if len(gespeichert) > MAX_EINTRAEGE:
+                gespeichert = gespeichert.iloc[-(MAX_EINTRAEGE * 3 // 4):]
+            self._schreiben(kennung, gespeichert)
+            for name in gelesen:
+                try:
+                    os.remove(os.path.join(self._verzeichnis(kennung), name))
+                except FileNotFoundError:
+                    pass
+            self._geladen.pop(kennung, None)
+
+    # Speicher anderer Modellversionen (und der früheren Einzeldateien) löschen
+    def _veraltete_entfernen(self, kennung):
+        try:
+            namen = os.listdir(_verzeichnis())
+        except FileNotFoundError:
+            return
+        for name in namen:
+            if name != kennung:
+                self._entfernen(name)
+
+    def _entfernen(self, name):
+        pfad = os.path.join(_verzeichnis(), name)
+        if os.path.isdir(pfad):
+            shutil.rmtree(pfad, ignore_errors=True)
+        else:
+            try:
+                os.remove(pfad)
+            except FileNotFoundError:
+                pass
+        self._geladen.pop(name, None)
+
+    # Scores für alle Zeilen von X; rechnen(X_teil) wird nur für Zeilen ohne
+    # gespeicherten Score aufgerufen (jede neue Merkmalskombination einmal).
+    # Rückgabe: (Scores, {"zeilen", "wiederverwendet", "berechnet"})
+    def bewerten(self, X, rechnen, kennung=None):
+        kennung = kennung or modell_kennung()
+        fp = fingerabdruecke(X)
+        with self._lock:
+            gespeichert = self._laden(kennung)
+            pos = gespeichert.index.get_indexer(fp)
+        treffer = pos >= 0
+        scores = np.empty(len(fp), dtype=np.float64)
+        scores[treffer] = gespeichert.to_numpy()[pos[treffer]]
+
+        neu = np.flatnonzero(~treffer)
+        berechnet = 0
+        if len(neu):
+            neue_fp, erste, rueck = np.unique(fp[neu], return_index=True, return_inverse=True)
+            teil = X.iloc[neu[erste]] if isinstance(X, pd.DataFrame) else np.asarray(X)[neu[erste]]
+            neue_scores = np.asarray(rechnen(teil), dtype=np.float64)
+            scores[neu] = neue_scores[rueck]
+            berechnet = len(neue_fp)
+            with self._lock:
+                try:
+                    self._anhaengen(kennung, pd.Series(neue_scores, index=neue_fp))
+                except OSError:
+                    # Nicht beschreibbares Verzeichnis: Ergebnis trotzdem liefern
+                    pass
+
+        statistik = {"zeilen": len(fp), "wiederverwendet": int(treffer.sum()), "berechnet": berechnet}
+        messung.zaehlen("scores_wiederverwendet", statistik["wiederverwendet"])
+        messung.zaehlen("scores_berechnet", berechnet)
+        return scores, statistik
+
+    def leeren(self, kennung=None):
+        with self._lock:
+            if kennung is not None:
+                self._entfernen(kennung)
+                return
+            self._geladen.clear()
+            try:
+                namen = os.listdir(_verzeichnis())
+            except FileNotFoundError:
+                return
+            for name in namen:
+                self._entfernen(name)
+
+
+# Globale Instanz für CLI und Streamlit-Interface
+_speicher = ScoreSpeicher()
+
+
+def bewerten(X, rechnen, kennung=None):
+    return _speicher.bewerten(X, rechnen, kennung)
+
+
+def leeren(kennung=None):
+    _speicher.leeren(kennung)
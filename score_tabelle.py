@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Obergrenze für die Tabellengröße (Zellen); darüber wird keine Tabelle erzeugt
+MAX_ZELLEN = 5_000_000
+
+
+# Vorberechnete Ausgabe des Random Forest über den gesamten diskreten Eingaberaum.
+# Die kategorischen Merkmale haben nur wenige Codes, die stetigen (Gehälter) gehen
+# nur über Schwellenvergleiche in die Bäume ein: zwischen zwei benachbarten
+# Schwellen ist die Modellausgabe konstant. Pro Kombination der Kategorien wird
+# daher ein Gitter über die Schwellenintervalle materialisiert; eine Abfrage
+# besteht aus einer binären Suche pro Gehalt und einem Array-Zugriff.
+# Bei stetigen Trainingsgehältern gibt es sehr viele Schwellen; dann wird das
+# Gitter auf die Intervalle beschränkt, in denen die Werte eines Rasters liegen
+# (z. B. die Eingabewerte der Oberfläche). Innerhalb eines Intervalls bleibt die
+# Tabelle exakt, Zeilen außerhalb der abgedeckten Intervalle ergeben NaN.
+class ScoreTabelle:
+    def __init__(self, werte, schwellen, stetige, diskrete, n_features, intervalle=None):
+        self.werte = werte
+        self.schwellen = schwellen
+        # Je stetigem Merkmal die abgedeckten Intervallnummern (aufsteigend)
+        self.intervalle = intervalle if intervalle is not None else [np.arange(len(s) + 1) for s in schwellen]
+        self.stetige = list(stetige)
+        self.diskrete = {int(k): int(v) for k, v in diskrete.items()}
+        self.n_features = int(n_features)
+
+    @property
+    def _form(self):
+        return tuple(self.diskrete.values()) + tuple(len(i) for i in self.intervalle)
+
+    # stetige: Indizes der stetigen Merkmale; diskrete: {Index: Anzahl Codes};
+    # raster: je stetigem Merkmal Werte, deren Intervalle abgedeckt werden
+    # (None = alle Intervalle). Rückgabe None, wenn die Tabelle zu groß würde.
+    @classmethod
+    def aus_modell(cls, model, stetige, diskrete, klasse=1, max_zellen=MAX_ZELLEN, raster=None):
+        schwellen = []
+        for f in stetige:
+            werte = [baum.tree_.threshold[baum.tree_.feature == f] for baum in model.estimators_]
+            schwellen.append(np.unique(np.concatenate(werte)).astype(np.float64))
+
+        intervalle = []
+        for pos, s in enumerate(schwellen):
+            if raster is None or raster[pos] is None:
+                intervalle.append(np.arange(len(s) + 1))
+            else:
+                punkte = np.asarray(raster[pos], dtype=np.float32).astype(np.float64)
+                intervalle.append(np.unique(np.searchsorted(s, punkte, side="left")))
+
+        form = tuple(diskrete.values()) + tuple(len(i) for i in intervalle)
+        if int(np.prod(form)) > max_zellen:
+            return None
+
+        # Repräsentant je Intervall (t[i-1], t[i]]: größter float32-Wert <= t[i];
+        # für das letzte Intervall der kleinste float32-Wert > t[-1]
+        vertreter = []
+        for s in schwellen:
+            r = s.astype(np.float32)
+            r = np.where(r.astype(np.float64) > s, np.nextafter(r, np.float32(-np.inf)), r)
+            letzter = np.float32(s[-1]) if len(s) else np.float32(0)
+            while len(s) and letzter <= s[-1]:
+                letzter = np.nextafter(letzter, np.float32(np.inf))
+            vertreter.append(np.append(r, letzter).astype(np.float32)[intervalle[len(vertreter)]])
+
+        gitter = np.indices(form).reshape(len(form), -1)
+        X = np.empty((gitter.shape[1], model.n_features_in_), dtype=np.float32)
+        for pos, f in enumerate(diskrete):
+            X[:, f] = gitter[pos]
+        for pos, f in enumerate(stetige):
+            X[:, f] = vertreter[pos][gitter[len(diskrete) + pos]]
+
+        spalten = getattr(model, "feature_names_in_", None)
+        werte = np.empty(X.shape[0], dtype=np.float64)
+        spalte = list(model.classes_).index(klasse)
+        for start in range(0, X.shape[0], 100_000):
+            block = X[start:start + 100_000]
+            if spalten is not None:
+                block = pd.DataFrame(block, columns=spalten)
+            werte[start:start + 100_000] = model.predict_proba(block)[:, spalte]
+
+        return cls(werte, schwellen, stetige, diskrete, model.n_features_in_, intervalle)
+
+    # Wahrscheinlichkeit der Zielklasse für alle Zeilen von X (Merkmalsmatrix mit Codes);
+    # NaN für Zeilen, deren Gehälter in keinem abgedeckten Intervall liegen
+    def proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        indizes = []
+        for f, n in self.diskrete.items():
+            codes = X[:, f].astype(np.int64)
+            if (codes < 0).any() or (codes >= n).any():
+                raise ValueError(f"Code außerhalb des Wertebereichs in Merkmal {f}")
+            indizes.append(codes)
+        abgedeckt = np.ones(X.shape[0], dtype=bool)
+        for pos, f in enumerate(self.stetige):
+            intervall = np.searchsorted(self.schwellen[pos], X[:, f].astype(np.float64), side="left")
+            stelle = np.searchsorted(self.intervalle[pos], intervall)
+            stelle = np.minimum(stelle, len(self.intervalle[pos]) - 1)
+            abgedeckt &= self.intervalle[pos][stelle] == intervall
+            indizes.append(stelle)
+        if abgedeckt.all():
+            return self.werte[np.ravel_multi_index(indizes, self._form)]
+        proba = np.full(X.shape[0], np.nan)
+        proba[abgedeckt] = self.werte[np.ravel_multi_index([i[abgedeckt] for i in indizes], self._form)]
+        return proba
+
+    def speichern(self, verzeichnis):
+        os.makedirs(verzeichnis, exist_ok=True)
+        np.save(os.path.join(verzeichnis, "werte.npy"), self.werte)
+        for pos, s in enumerate(self.schwellen):
+            np.save(os.path.join(verzeichnis, f"schwellen_{pos}.npy"), s)
+            np.save(os.path.join(verzeichnis, f"intervalle_{pos}.npy"), self.intervalle[pos])
+        with open(os.path.join(verzeichnis, "tabelle.json"), "w", encoding="utf-8") as f:
+            json.dump({"stetige": self.stetige, "diskrete": self.diskrete,
+                       "n_features": self.n_features}, f)
+
+    @classmethod
+    def laden(cls, verzeichnis, mmap_mode="r"):
+        with open(os.path.join(verzeichnis, "tabelle.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        werte = np.load(os.path.join(verzeichnis, "werte.npy"), mmap_mode=mmap_mode)
+        schwellen = [np.load(os.path.join(verzeichnis, f"schwellen_{pos}.npy"))
+                     for pos in range(len(meta["stetige"]))]
+        # Ältere Tabellen ohne Intervalldateien decken alle Intervalle ab
+        intervalle = None
+        if os.path.exists(os.path.join(verzeichnis, "intervalle_0.npy")):
+            intervalle = [np.load(os.path.join(verzeichnis, f"intervalle_{pos}.npy"))
+                          for pos in range(len(meta["stetige"]))]
+        return cls(werte, schwellen, meta["stetige"], meta["diskrete"], meta["n_features"], intervalle)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import asyncio
+import json
+import time
+
+import prognose_tool_ethisch
+import modell_store
+import validierung
+
+# Kurzschlüssel (wie die Parameter von prognose_manuell) zusätzlich zu den Spaltennamen
+ALIASE = {
+    "monatsgehalt_aktuell": "Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt",
+    "monatsgehalt_einstieg": "Monatsgehalt Einstieg",
+    "quali": "Qualifikationstufe",
+    "schul": "Schulabschluss",
+    "beruf": "Berufabschluss",
+}
+
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error"}
+MAX_BODY = 32 * 1024 * 1024
+
+
+def _normalisieren(bewerber):
+    if not isinstance(bewerber, dict):
+        raise validierung.Eingabefehler("Bewerber muss ein JSON-Objekt sein")
+    datensatz = {ALIASE.get(k, k): v for k, v in bewerber.items()}
+    fehlend = [f for f in prognose_tool_ethisch.FEATURES if f not in datensatz]
+    if fehlend:
+        raise validierung.Eingabefehler(f"Fehlende Felder: {fehlend}")
+    return datensatz
+
+
+# Sammelt gleichzeitige Einzelanfragen innerhalb eines Zeitfensters zu einem
+# Stapel und bewertet ihn mit einem einzigen Modellaufruf (im Thread-Pool, damit
+# die Event-Loop weiter Anfragen annimmt).
+class MikroBatcher:
+    def __init__(self, fenster_ms=5.0, max_batch=256):
+        self.fenster = fenster_ms / 1000.0
+        self.max_batch = max_batch
+        self._warteschlange = asyncio.Queue()
+        self._task = None
+        self.stapel = 0
+        self.anfragen = 0
+
+    def starten(self):
+        self._task = asyncio.get_running_loop().create_task(self._schleife())
+
+    async def stoppen(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def bewerten(self, datensatz):
+        zukunft = asyncio.get_running_loop().create_future()
+        await self._warteschlange.put((datensatz, zukunft))
+        return await zukunft
+
+    async def _schleife(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            eintraege = [await self._warteschlange.get()]
+            frist = loop.time() + self.fenster
+            while len(eintraege) < self.max_batch:
+                rest = frist - loop.time()
+                if rest <= 0:
+                    break
+                try:
+                    eintraege.append(await asyncio.wait_for(self._warteschlange.get(), rest))
+                except asyncio.TimeoutError:
+                    break
+
+            self.stapel += 1
+            self.anfragen += len(eintraege)
+            datensaetze = [d for d, _ in eintraege]
+            try:
+                scores = await loop.run_in_executor(None, prognose_tool_ethisch.prognose_batch, datensaetze)
+                ergebnisse = [(float(s), None) for s in scores]
+            except Exception:
+                # Fehlerhaften Datensatz isolieren, damit der Rest des Stapels bewertet wird
+                ergebnisse = await loop.run_in_executor(None, _einzeln_bewerten, datensaetze)
+            for (_, zukunft), (score, fehler) in zip(eintraege, ergebnisse):
+                if zukunft.done():
+                    continue
+                if fehler is None:
+                    zukunft.set_result(score)
+                else:
+                    # Ausnahme unverändert weitergeben: Eingabefehler -> 400, sonst 500
+                    zukunft.set_exception(fehler)
+
+
+def _einzeln_bewerten(datensaetze):
+    ergebnisse = []
+    for datensatz in datensaetze:
+        try:
+            ergebnisse.append((float(prognose_tool_ethisch.prognose_batch([datensatz])[0]), None))
+        except Exception as e:
+            ergebnisse.append((None, e))
+    return ergebnisse
+
+
+# Lokaler JSON-über-HTTP-Dienst (HTTP/1.1 mit Keep-Alive, nur Standardbibliothek)
+#   POST /score        {"quali": "S", ...}         -> {"score": 71.17}
+#   POST /score/batch  {"bewerber": [{...}, ...]}  -> {"scores": [...]}
+#   GET  /health                                   -> Status, Modellversion, Zähler
+class ScoringServer:
+    def __init__(self, host="127.0.0.1", port=8080, fenster_ms=5.0, max_batch=256):
+        self.host = host
+        self.port = port
+        self.batcher = MikroBatcher(fenster_ms, max_batch)
+        self._server = None
+        self.gestartet = None
+
+    async def starten(self):
+        # Modell vorab laden, damit die erste Anfrage nicht die Ladezeit trägt
+        await asyncio.get_running_loop().run_in_executor(
+            None, prognose_tool_ethisch.prognose_batch,
+            [[3500, 3500, "S", "MS", "K"]])
+        self.batcher.starten()
+        self._server = await asyncio.start_server(self._verbindung, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.gestartet = time.time()
+        return self
+
+    async def stoppen(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stoppen()
+
+    async def _verbindung(self, reader, writer):
+        try:
+            while True:
+                anfrage = await self._anfrage_lesen(reader)
+                if anfrage is None:
+                    break
+                methode, pfad, kopf, body = anfrage
+                status, antwort = await self._verarbeiten(methode, pfad, body)
+                schliessen = kopf.get("connection", "").lower() == "close"
+                self._antwort_schreiben(writer, status, antwort, schliessen)
+                await writer.drain()
+                if schliessen:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            self._antwort_schreiben(writer, 400, {"fehler": str(e)}, True)
+        finally:
+            writer.close()
+
+    async def _anfrage_lesen(self, reader):
+        zeile = await reader.readline()
+        if not zeile:
+            return None
+        teile = zeile.decode("latin-1").split()
+        if len(teile) != 3:
+            raise ValueError("Ungültige Anfragezeile")
+        methode, pfad, _ = teile
+        kopf = {}
+        while True:
+            zeile = await reader.readline()
+            if zeile in (b"\r\n", b"\n", b""):
+                break
+            name, _, wert = zeile.decode("latin-1").partition(":")
+            kopf[name.strip().lower()] = wert.strip()
+        laenge = int(kopf.get("content-length", "0"))
+        if laenge > MAX_BODY:
+            raise ValueError("Anfrage zu groß")
+        body = await reader.readexactly(laenge) if laenge else b""
+        return methode, pfad.split("?", 1)[0], kopf, body
+
+    def _antwort_schreiben(self, writer, status, antwort, schliessen):
+        daten = json.dumps(antwort, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(daten)}\r\n"
+            f"Connection: {'close' if schliessen else 'keep-alive'}\r\n\r\n".encode("latin-1") + daten)
+
+    async def _verarbeiten(self, methode, pfad, body):
+        if pfad == "/health":
+            if methode != "GET":
+                return 405, {"fehler": "Nur GET erlaubt"}
+            return 200, {
+                "status": "ok",
+                "modellversion": modell_store.aktuelle_version(),
+                "stapel": self.batcher.stapel,
+                "anfragen": self.batcher.anfragen,
+                "laufzeit_s": round(time.time() - self.gestartet, 1),
+            }
+        if pfad not in ("/score", "/score/batch"):
+            return 404, {"fehler": f"Unbekannter Pfad: {pfad}"}
+        if methode != "POST":
+            return 405, {"fehler": "Nur POST erlaubt"}
+
+        try:
+            daten = json.loads(body or b"null")
+        except json.JSONDecodeError as e:
+            return 400, {"fehler": f"Ungültiges JSON: {e}"}
+
+        try:
+            if pfad == "/score":
+                return 200, {"score": await self.batcher.bewerten(_normalisieren(daten))}
+
+            bewerber = daten.get("bewerber") if isinstance(daten, dict) else daten
+            if not isinstance(bewerber, list):
+                return 400, {"fehler": "Erwartet wird eine Liste 'bewerber'"}
+            if not bewerber:
+                return 200, {"scores": []}
+            datensaetze = [_normalisieren(b) for b in bewerber]
+            scores = await asyncio.get_running_loop().run_in_executor(
+                None, prognose_tool_ethisch.prognose_batch, datensaetze)
+            return 200, {"scores": [float(s) for s in scores]}
+        except validierung.Eingabefehler as e:
+            return 400, {"fehler": str(e)}
+        except Exception as e:
+            # Fehler im Modell bzw. Backend, nicht in der Anfrage
+            return 500, {"fehler": f"Interner Fehler: {e}"}
+
+
+async def _main(args):
+    server = await ScoringServer(args.host, args.port, args.fenster_ms, args.max_batch).starten()
+    print(f"Scoring-Dienst läuft auf http://{server.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stoppen()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Lokaler HTTP-Scoring-Dienst für das Prognose-Tool")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port (Standard: 8080)")
+    parser.add_argument("--fenster-ms", type=float, default=5.0,
+                        help="Zeitfenster für Mikro-Batching in Millisekunden (Standard: 5)")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Maximale Stapelgröße beim Mikro-Batching (Standard: 256)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import benchmark
+import einlesen
+import erklaerung
+import modell_store
+import prognose_tool_ethisch
+import wald_engine
+
+
+def _daten(n, seed):
+    return prognose_tool_ethisch._vorbereiten(benchmark.erzeuge_daten(n, seed=seed), True)[:2]
+
+
+@pytest.fixture(scope="module")
+def modell():
+    X, y = _daten(2000, seed=1)
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+
+
+def test_basis_plus_beitraege_ergibt_prognose(modell, monkeypatch):
+    monkeypatch.setattr(wald_engine, "BLOCKGROESSE", 64)
+    X, _ = _daten(500, seed=2)
+    erklaerer = erklaerung.Erklaerer(wald_engine.KompilierterWald.aus_modell(modell), X.shape[1])
+    basis, beitraege = erklaerer.erklaeren(X)
+    assert beitraege.shape == X.shape
+    np.testing.assert_allclose(basis + beitraege.sum(axis=1), modell.predict_proba(X)[:, 1], atol=1e-12)
+
+
+def test_nicht_genutztes_merkmal_ohne_beitrag():
+    X, y = _daten(1000, seed=3)
+    modell = RandomForestClassifier(n_estimators=10, random_state=0).fit(X.iloc[:, :2].assign(leer=0.0), y)
+    erklaerer = erklaerung.Erklaerer(wald_engine.KompilierterWald.aus_modell(modell), 3)
+    _, beitraege = erklaerer.erklaeren(X.iloc[:50, :2].assign(leer=0.0))
+    assert (beitraege[:, 2] == 0).all()
+
+
+# Mit dem mitgelieferten Altmodell: Basis + Beiträge entsprechen dem Eignungs-Score
+def test_erklaerung_excel_wie_prognose(tmp_path, monkeypatch):
+    monkeypatch.setattr(modell_store, "STORE_VERZEICHNIS", str(tmp_path / "modelle"))
+    monkeypatch.setattr(einlesen, "CACHE_VERZEICHNIS", str(tmp_path / "cache"))
+    datei = "Datensatz HR-20240606 - Testdaten Stand 11062024.xlsx"
+    erklaert = prognose_tool_ethisch.erklaerung_excel(datei)
+    scores = prognose_tool_ethisch.prognose_excel(datei)["Prognose-Score (%)"]
+    summe = erklaert["Basis (%)"] + erklaert[prognose_tool_ethisch.FEATURES].sum(axis=1)
+    np.testing.assert_allclose(summe, scores, atol=0.05)
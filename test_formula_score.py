@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import formula_score
+
+GEHALT_AKTUELL = formula_score.GEHALT_AKTUELL
+GEHALT_EINSTIEG = formula_score.GEHALT_EINSTIEG
+STICHTAG = pd.Timestamp("2024-06-11")
+
+
+# Frühere zeilenweise Berechnung (df.apply) als Referenz, mit festem Stichtag
+def _alt_qualifikation(row):
+    q_map = {'H': 0.5, 'M': 0.5, 'S': 0.5, 'A': 0.5}
+    s_map = {'OS': 0.25, 'MS': 0.6, 'AS': 1.0}
+    b_map = {'O': 0.3, 'K': 0.6, 'ST': 1.0, 'HW': 0.6}
+    q = q_map.get(str(row['Qualifikationstufe']).strip(), 0)
+    s = s_map.get(str(row['Schulabschluss']).strip(), 0)
+    b = b_map.get(str(row['Berufabschluss']).strip(), 0)
+    return np.mean([q, s, b])
+
+
+def _alt_leistung(row):
+    try:
+        gehalt_aktuell = float(str(row[GEHALT_AKTUELL]).replace(",", "."))
+        gehalt_einstieg = float(str(row[GEHALT_EINSTIEG]).replace(",", "."))
+        if gehalt_einstieg <= 0:
+            return 0.0
+        ratio = gehalt_aktuell / gehalt_einstieg
+        if ratio > 1.5:
+            return 1.0
+        elif ratio > 1.2:
+            return 0.7
+        else:
+            return 0.4
+    except:
+        return 0.0
+
+
+def _alt_kontinuitaet(row):
+    try:
+        eintritt = pd.to_datetime(row['Einstellungsdatum'])
+        austritt = pd.to_datetime(row['Kündigungsdatum']) if pd.notnull(row['Kündigungsdatum']) else STICHTAG
+        dauer_jahre = (austritt - eintritt).days / 365.25
+        if dauer_jahre > 5:
+            score = 1.0
+        elif dauer_jahre > 2:
+            score = 0.6
+        else:
+            score = 0.3
+        fehlzeit = row['Fehlzeiten (Monaten)']
+        if pd.notnull(fehlzeit) and fehlzeit > 3:
+            score -= 0.2
+        return max(score, 0.0)
+    except:
+        return 0.0
+
+
+def _alt_score(df):
+    return df.apply(lambda row: round(100 * np.mean([
+        _alt_qualifikation(row), _alt_leistung(row), _alt_kontinuitaet(row)]), 1), axis=1)
+
+
+@pytest.mark.parametrize("df", [
+    pd.read_excel("Datensatz HR-20240416 - Zusatzinfos.xlsx"),
+    pd.read_excel("Datensatz HR-20240606 - Testdaten Stand 11062024.xlsx"),
+    benchmark.erzeuge_daten(5000, seed=3),
+], ids=["training", "test", "synthetisch"])
+def test_wie_zeilenweise_berechnung(df):
+    # Einzige Abweichung auf diesen Daten: "O" zählt als "OS" (Testdaten, 3 Zeilen)
+    erwartet = _alt_score(df.replace({"Schulabschluss": {"O": "OS"}}))
+    pd.testing.assert_series_equal(formula_score.berechne_score(df, STICHTAG), erwartet,
+                                   check_names=False)
+
+
+# Uneinheitliche Eingaben: die bewussten Abweichungen (siehe formula_score) und
+# Fälle, die unverändert bleiben
+@pytest.mark.parametrize("spalte, wert, abweichend", [
+    ("Schulabschluss", "O", True),
+    ("Schulabschluss", " os ", True),
+    (GEHALT_AKTUELL, "4.500,50", True),
+    (GEHALT_AKTUELL, None, True),
+    ("Fehlzeiten (Monaten)", "2", True),
+    ("Einstellungsdatum", "01.02.2020", False),
+    (GEHALT_AKTUELL, np.nan, False),
+    (GEHALT_AKTUELL, "4500,5", False),
+    ("Qualifikationstufe", "x", False),
+    (GEHALT_EINSTIEG, "abc", False),
+])
+def test_uneinheitliche_eingaben(spalte, wert, abweichend):
+    df = benchmark.erzeuge_daten(1, seed=3).astype(object)
+    df.loc[0, GEHALT_EINSTIEG] = 3000
+    df.loc[0, GEHALT_AKTUELL] = 4500
+    df.loc[0, "Fehlzeiten (Monaten)"] = np.nan
+    df.loc[0, spalte] = wert
+    neu, alt = formula_score.berechne_score(df, STICHTAG).iloc[0], _alt_score(df).iloc[0]
+    assert (neu != alt) == abweichend
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import modell_cache
+import modell_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(modell_store, "STORE_VERZEICHNIS", str(tmp_path / "modelle"))
+    modell_cache.invalidieren()
+    yield
+    modell_cache.invalidieren()
+
+
+def _modell(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((60, 3))
+    return RandomForestClassifier(n_estimators=3, random_state=seed).fit(X, X[:, 0] > 0.5)
+
+
+def test_leerer_store_nutzt_altmodell():
+    assert modell_store.aktuelle_version() is None
+    assert modell_store.modell_pfad() == modell_store.MODELL_PFAD
+    assert modell_store.versionen() == []
+
+
+def test_speichern_aktiviert_neue_version():
+    a = modell_store.speichern(_modell(1), {"zeilen": 60})
+    b = modell_store.speichern(_modell(2))
+    assert modell_store.aktuelle_version() == b
+    assert [m["version"] for m in modell_store.versionen()] == sorted([a, b])
+    assert modell_store.metadaten(a)["zeilen"] == 60
+    assert os.path.isdir(os.path.join(modell_store.STORE_VERZEICHNIS, b, "wald"))
+    assert not [n for n in os.listdir(modell_store.STORE_VERZEICHNIS) if n.endswith(".tmp")]
+
+
+def test_ohne_aktivieren_bleibt_zeiger():
+    a = modell_store.speichern(_modell(1))
+    modell_store.speichern(_modell(2), aktivieren=False)
+    assert modell_store.aktuelle_version() == a
+
+
+def test_aktivieren_und_zurueckrollen():
+    a = modell_store.speichern(_modell(1))
+    b = modell_store.speichern(_modell(2))
+    c = modell_store.speichern(_modell(3))
+    modell_store.aktivieren_version(a)
+    assert modell_store.aktuelle_version() == a
+    assert modell_store.zurueckrollen() == c
+    assert modell_store.zurueckrollen() == b
+    assert modell_store.zurueckrollen() == a
+    with pytest.raises(ValueError):
+        modell_store.zurueckrollen()
+    assert modell_store.aktuelle_version() == a
+
+
+def test_zurueckrollen_ueberspringt_fehlende_versionen():
+    a = modell_store.speichern(_modell(1))
+    b = modell_store.speichern(_modell(2))
+    modell_store.speichern(_modell(3))
+    os.remove(os.path.join(modell_store.STORE_VERZEICHNIS, b, "model.joblib"))
+    assert modell_store.zurueckrollen() == a
+
+    os.remove(os.path.join(modell_store.STORE_VERZEICHNIS, a, "model.joblib"))
+    c = modell_store.speichern(_modell(4))
+    with pytest.raises(ValueError):
+        modell_store.zurueckrollen()
+    assert modell_store.aktuelle_version() == c
+
+
+def test_aktivieren_unbekannter_version():
+    modell_store.speichern(_modell(1))
+    with pytest.raises(ValueError):
+        modell_store.aktivieren_version("gibt-es-nicht")
+
+
+def test_cache_folgt_dem_zeiger():
+    a = modell_store.speichern(_modell(1))
+    modell_store.speichern(_modell(2))
+    X = np.random.default_rng(0).random((20, 3))
+    np.testing.assert_array_equal(modell_cache.lade_modell().predict_proba(X), _modell(2).predict_proba(X))
+    modell_store.aktivieren_version(a)
+    np.testing.assert_array_equal(modell_cache.lade_modell().predict_proba(X), _modell(1).predict_proba(X))
+    np.testing.assert_array_equal(modell_cache.lade_wald().predict_proba(X), _modell(1).predict_proba(X))
+
+
+def test_komprimiert():
+    version = modell_store.speichern(_modell(1), komprimieren=True)
+    assert modell_store.modell_pfad(version).endswith(".z")
+    X = np.random.default_rng(0).random((20, 3))
+    np.testing.assert_array_equal(modell_store.laden(version).predict_proba(X), _modell(1).predict_proba(X))
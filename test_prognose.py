@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import einlesen
+import modell_cache
+import modell_store
+import prognose_tool_ethisch
+
+
+# Ohne Modellspeicher wird mit dem mitgelieferten Altmodell bewertet
+@pytest.fixture(autouse=True)
+def leerer_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(modell_store, "STORE_VERZEICHNIS", str(tmp_path / "modelle"))
+    monkeypatch.setattr(einlesen, "CACHE_VERZEICHNIS", str(tmp_path / "cache"))
+
+
+# Bewerberdatei mit einigen ungültigen Zeilen
+def _bewerber(pfad, n, seed, blaetter=(einlesen.SHEET_NAME,)):
+    with pd.ExcelWriter(pfad) as writer:
+        for nummer, blatt in enumerate(blaetter):
+            df = benchmark.erzeuge_daten(n, seed=seed + nummer).astype({"Monatsgehalt Einstieg": object})
+            df.loc[3, "Qualifikationstufe"] = "X"
+            df.loc[5, "Monatsgehalt Einstieg"] = "abc"
+            df.to_excel(writer, sheet_name=blatt, index=False)
+    return pfad
+
+
+@pytest.mark.parametrize("backend", ["sklearn", "auto", "kompiliert", "tabelle"])
+def test_worker_teilen_die_arrays_statt_des_modells(backend, monkeypatch):
+    X, _, _, _ = prognose_tool_ethisch._vorbereiten(benchmark.erzeuge_daten(1500, seed=4), True)
+    monkeypatch.setattr(prognose_tool_ethisch, "BACKEND", backend)
+    erwartet = prognose_tool_ethisch._eignungs_scores(X)
+
+    # Die Worker erben den Patch (fork): ein Laden des sklearn-Modells schlägt fehl
+    def verboten(*args, **kwargs):
+        raise AssertionError("sklearn-Modell im Worker geladen")
+    monkeypatch.setattr(modell_cache, "lade_modell", verboten)
+    scores = prognose_tool_ethisch._scores_parallel(X, prozesse=2, chunk_size=400)
+    np.testing.assert_array_equal(scores, erwartet)
+
+
+@pytest.mark.parametrize("endung", [".csv", ".parquet"])
+def test_stream_wie_prognose_excel(tmp_path, endung):
+    pfad = _bewerber(tmp_path / "bewerber.xlsx", 40, seed=5)
+    ausgabe = tmp_path / f"ergebnis{endung}"
+    assert prognose_tool_ethisch.prognose_stream(str(pfad), str(ausgabe), chunk_size=7) == 40
+
+    erwartet = prognose_tool_ethisch.prognose_excel(str(pfad)).drop(columns="Fehler").reset_index(drop=True)
+    gestreamt = pd.read_csv(ausgabe) if endung == ".csv" else pd.read_parquet(ausgabe)
+    assert erwartet["Prognose-Score (%)"].isna().sum() == 2
+    pd.testing.assert_frame_equal(gestreamt, erwartet, check_dtype=False)
+
+
+def test_stream_mehrere_dateien_und_blaetter(tmp_path):
+    blaetter = [einlesen.SHEET_NAME, "Nachmeldungen"]
+    pfade = [str(_bewerber(tmp_path / f"bewerber_{i}.xlsx", 15, seed=10 * i, blaetter=blaetter))
+             for i in range(2)]
+    ausgabe = tmp_path / "ergebnis.parquet"
+    assert prognose_tool_ethisch.prognose_stream(pfade, str(ausgabe), chunk_size=4, sheet_name=blaetter) == 60
+
+    erwartet = prognose_tool_ethisch.prognose_excel(pfade, sheet_name=blaetter).drop(columns="Fehler")
+    pd.testing.assert_frame_equal(pd.read_parquet(ausgabe), erwartet.reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import score_speicher
+
+
+@pytest.fixture
+def speicher(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_speicher, "SCORE_VERZEICHNIS", str(tmp_path / "scores"))
+    return score_speicher.ScoreSpeicher()
+
+
+class Zaehler:
+    def __init__(self):
+        self.zeilen = []
+
+    def __call__(self, X):
+        self.zeilen.append(len(X))
+        return np.asarray(X, dtype=np.float64).sum(axis=1)
+
+
+def _matrix(werte):
+    return pd.DataFrame(np.asarray(werte, dtype=np.float32))
+
+
+def test_fingerabdruck_unabhaengig_vom_typ():
+    a = score_speicher.fingerabdruecke(np.array([[3500, 1]], dtype=np.int64))
+    b = score_speicher.fingerabdruecke(np.array([[3500.0, 1.0]], dtype=np.float32))
+    c = score_speicher.fingerabdruecke(np.array([[3501.0, 1.0]]))
+    assert a[0] == b[0] != c[0]
+
+
+def test_nur_neue_zeilen_bewerten(speicher):
+    rechnen = Zaehler()
+    X = _matrix([[1, 2], [3, 4], [1, 2]])
+    scores, statistik = speicher.bewerten(X, rechnen, kennung="v1")
+    np.testing.assert_array_equal(scores, [3, 7, 3])
+    assert statistik == {"zeilen": 3, "wiederverwendet": 0, "berechnet": 2}
+
+    # Eine geänderte Zeile, zwei bekannte
+    scores, statistik = speicher.bewerten(_matrix([[1, 2], [3, 5], [3, 4]]), rechnen, kennung="v1")
+    np.testing.assert_array_equal(scores, [3, 8, 7])
+    assert statistik == {"zeilen": 3, "wiederverwendet": 2, "berechnet": 1}
+    assert rechnen.zeilen == [2, 1]
+
+
+def test_gespeichert_ueber_prozessgrenzen(speicher):
+    speicher.bewerten(_matrix([[1, 2], [3, 4]]), Zaehler(), kennung="v1")
+    rechnen = Zaehler()
+    _, statistik = score_speicher.ScoreSpeicher().bewerten(_matrix([[3, 4]]), rechnen, kennung="v1")
+    assert statistik["wiederverwendet"] == 1 and rechnen.zeilen == []
+
+
+def test_neue_version_bewertet_neu_und_loescht_alte(speicher):
+    X = _matrix([[1, 2], [3, 4]])
+    speicher.bewerten(X, Zaehler(), kennung="v1")
+    rechnen = Zaehler()
+    _, statistik = speicher.bewerten(X, rechnen, kennung="v2")
+    assert statistik["berechnet"] == 2 and rechnen.zeilen == [2]
+    assert os.listdir(score_speicher._verzeichnis()) == ["v2"]
+
+    # Rückkehr zu v1 (Rollback): der alte Speicher ist verworfen
+    _, statistik = speicher.bewerten(X, Zaehler(), kennung="v1")
+    assert statistik["berechnet"] == 2
+
+
+def test_teile_zusammenfassen_und_begrenzen(speicher, monkeypatch):
+    monkeypatch.setattr(score_speicher, "MAX_TEILE", 3)
+    monkeypatch.setattr(score_speicher, "MAX_EINTRAEGE", 8)
+    for start in range(0, 20, 2):
+        speicher.bewerten(_matrix([[start, 0], [start + 1, 0]]), Zaehler(), kennung="v1")
+    verzeichnis = os.path.join(score_speicher._verzeichnis(), "v1")
+    assert len(os.listdir(verzeichnis)) <= 3
+    gespeichert = score_speicher.ScoreSpeicher()._laden("v1")
+    assert len(gespeichert) <= 8
+    # Die jüngsten Einträge bleiben erhalten
+    _, statistik = speicher.bewerten(_matrix([[19, 0]]), Zaehler(), kennung="v1")
+    assert statistik["wiederverwendet"] == 1
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import benchmark
+import prognose_tool_ethisch
+import score_tabelle
+
+FEATURES = prognose_tool_ethisch.FEATURES
+STETIGE = [FEATURES.index(s) for s in FEATURES if s not in prognose_tool_ethisch.KATEGORIEN]
+DISKRETE = {FEATURES.index(s): len(k) for s, k in prognose_tool_ethisch.KATEGORIEN.items()}
+
+
+def _daten(n, seed, stetig=False):
+    df = benchmark.erzeuge_daten(n, seed=seed)
+    if stetig:
+        rng = np.random.default_rng(seed)
+        for spalte in (FEATURES[i] for i in STETIGE):
+            df[spalte] = df[spalte] + rng.integers(0, 100, n)
+    return prognose_tool_ethisch._vorbereiten(df, True)[:2]
+
+
+@pytest.fixture(scope="module")
+def modell():
+    X, y = _daten(2000, seed=1)
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def modell_stetig():
+    X, y = _daten(3000, seed=1, stetig=True)
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+
+
+def test_volle_tabelle_wie_predict_proba(modell):
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(modell, STETIGE, DISKRETE)
+    X, _ = _daten(3000, seed=2, stetig=True)
+    np.testing.assert_array_equal(tabelle.proba(X), modell.predict_proba(X)[:, 1])
+
+
+def test_zu_gross(modell_stetig):
+    assert score_tabelle.ScoreTabelle.aus_modell(modell_stetig, STETIGE, DISKRETE, max_zellen=1000) is None
+
+
+def test_raster_exakt_oder_nan(modell_stetig):
+    raster = np.arange(2000, 20001, 100)
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(modell_stetig, STETIGE, DISKRETE, raster=[raster, raster])
+    X, _ = _daten(3000, seed=2, stetig=True)
+    proba = tabelle.proba(X)
+    abgedeckt = ~np.isnan(proba)
+    np.testing.assert_array_equal(proba[abgedeckt], modell_stetig.predict_proba(X[abgedeckt])[:, 1])
+
+    # Gehälter auf dem Raster sind immer abgedeckt
+    X_raster, _ = _daten(3000, seed=3)
+    auf_raster = X_raster.iloc[:, STETIGE].isin(raster).all(axis=1).to_numpy()
+    assert auf_raster.any() and not np.isnan(tabelle.proba(X_raster)[auf_raster]).any()
+
+
+def test_speichern_und_laden(modell_stetig, tmp_path):
+    raster = np.arange(2000, 20001, 100)
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(modell_stetig, STETIGE, DISKRETE, raster=[raster, raster])
+    tabelle.speichern(tmp_path)
+    X, _ = _daten(500, seed=4, stetig=True)
+    np.testing.assert_array_equal(score_tabelle.ScoreTabelle.laden(tmp_path).proba(X), tabelle.proba(X))
+
+
+def test_alte_tabelle_ohne_intervalle(modell, tmp_path):
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(modell, STETIGE, DISKRETE)
+    tabelle.speichern(tmp_path)
+    for pos in range(len(STETIGE)):
+        os.remove(tmp_path / f"intervalle_{pos}.npy")
+    X, _ = _daten(500, seed=4)
+    np.testing.assert_array_equal(score_tabelle.ScoreTabelle.laden(tmp_path).proba(X), tabelle.proba(X))
+
+
+def test_unbekannter_code(modell):
+    tabelle = score_tabelle.ScoreTabelle.aus_modell(modell, STETIGE, DISKRETE)
+    X = np.zeros((1, len(FEATURES)), dtype=np.float32)
+    X[0, STETIGE] = 4000
+    X[0, next(iter(DISKRETE))] = 7
+    with pytest.raises(ValueError):
+        tabelle.proba(X)
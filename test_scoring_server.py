@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+import modell_store
+import prognose_tool_ethisch
+import scoring_server
+
+BEWERBER = [
+    {"monatsgehalt_aktuell": 4500, "monatsgehalt_einstieg": 3500, "quali": "S", "schul": "MS", "beruf": "K"},
+    {"monatsgehalt_aktuell": 9000, "monatsgehalt_einstieg": 5000, "quali": "A", "schul": "AS", "beruf": "ST"},
+    {"monatsgehalt_aktuell": 2500, "monatsgehalt_einstieg": 2500, "quali": "H", "schul": "O", "beruf": "HW"},
+]
+UNGUELTIG = {**BEWERBER[0], "quali": "X"}
+
+
+# Ohne Modellspeicher bewertet der Dienst mit dem mitgelieferten Altmodell
+@pytest.fixture(autouse=True)
+def leerer_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(modell_store, "STORE_VERZEICHNIS", str(tmp_path / "modelle"))
+
+
+def _erwartet(bewerber):
+    return [round(float(s), 2) for s in prognose_tool_ethisch.prognose_batch(
+        [{scoring_server.ALIASE[k]: v for k, v in b.items()} for b in bewerber])]
+
+
+async def _anfrage(port, methode, pfad, daten=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if daten is None else json.dumps(daten).encode("utf-8")
+    writer.write(f"{methode} {pfad} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    antwort = await reader.read()
+    writer.close()
+    kopf, _, inhalt = antwort.partition(b"\r\n\r\n")
+    return int(kopf.split()[1]), json.loads(inhalt)
+
+
+def _mit_server(ablauf, **optionen):
+    async def ausfuehren():
+        server = await scoring_server.ScoringServer(port=0, **optionen).starten()
+        try:
+            return await ablauf(server)
+        finally:
+            await server.stoppen()
+    return asyncio.run(ausfuehren())
+
+
+def test_score_und_batch():
+    async def ablauf(server):
+        einzeln = [await _anfrage(server.port, "POST", "/score", b) for b in BEWERBER]
+        stapel = await _anfrage(server.port, "POST", "/score/batch", {"bewerber": BEWERBER})
+        return einzeln, stapel
+
+    einzeln, stapel = _mit_server(ablauf)
+    erwartet = _erwartet(BEWERBER)
+    assert [status for status, _ in einzeln] == [200] * len(BEWERBER)
+    assert [round(a["score"], 2) for _, a in einzeln] == erwartet
+    assert stapel[0] == 200
+    assert [round(s, 2) for s in stapel[1]["scores"]] == erwartet
+
+
+def test_fehlerhafter_datensatz_im_mikro_batch():
+    async def ablauf(server):
+        anfragen = [_anfrage(server.port, "POST", "/score", b) for b in BEWERBER + [UNGUELTIG]]
+        return await asyncio.gather(*anfragen), server.batcher.stapel
+
+    # Großes Zeitfenster: alle Anfragen landen im selben Stapel
+    ergebnisse, stapel = _mit_server(ablauf, fenster_ms=500)
+    assert stapel == 1
+    assert [status for status, _ in ergebnisse] == [200, 200, 200, 400]
+    assert [round(a["score"], 2) for _, a in ergebnisse[:3]] == _erwartet(BEWERBER)
+    assert "Qualifikationstufe" in ergebnisse[3][1]["fehler"]
+
+
+def test_batch_mit_fehlern():
+    async def ablauf(server):
+        return [
+            await _anfrage(server.port, "POST", "/score/batch", {"bewerber": [BEWERBER[0], UNGUELTIG]}),
+            await _anfrage(server.port, "POST", "/score/batch", {"bewerber": [{"quali": "S"}]}),
+            await _anfrage(server.port, "POST", "/score/batch", {"bewerber": []}),
+            await _anfrage(server.port, "POST", "/score/batch", {"liste": 1}),
+        ]
+
+    ergebnisse = _mit_server(ablauf)
+    assert [status for status, _ in ergebnisse] == [400, 400, 200, 400]
+    assert ergebnisse[2][1] == {"scores": []}
+
+
+def test_health_und_routing():
+    async def ablauf(server):
+        await _anfrage(server.port, "POST", "/score", BEWERBER[0])
+        return [
+            await _anfrage(server.port, "GET", "/health"),
+            await _anfrage(server.port, "POST", "/health"),
+            await _anfrage(server.port, "GET", "/score"),
+            await _anfrage(server.port, "GET", "/unbekannt"),
+        ]
+
+    (status, gesundheit), *uebrige = _mit_server(ablauf)
+    assert status == 200
+    assert gesundheit["status"] == "ok"
+    assert gesundheit["modellversion"] is None
+    assert gesundheit["anfragen"] == 1 and gesundheit["stapel"] == 1
+    assert [status for status, _ in uebrige] == [405, 405, 404]
+
+
+# Fehler im Modell bzw. Backend sind Serverfehler, keine ungültigen Anfragen
+def test_interner_fehler_ergibt_500(monkeypatch):
+    def defekt(X):
+        raise RuntimeError("Backend nicht verfügbar")
+
+    async def ablauf(server):
+        monkeypatch.setattr(prognose_tool_ethisch, "_eignungs_scores", defekt)
+        return await asyncio.gather(
+            _anfrage(server.port, "POST", "/score", BEWERBER[0]),
+            _anfrage(server.port, "POST", "/score", UNGUELTIG),
+            _anfrage(server.port, "POST", "/score/batch", {"bewerber": BEWERBER}),
+            _anfrage(server.port, "POST", "/score/batch", {"bewerber": [UNGUELTIG]}),
+        )
+
+    ergebnisse = _mit_server(ablauf, fenster_ms=200)
+    assert [status for status, _ in ergebnisse] == [500, 400, 500, 400]
+    assert "Backend nicht verfügbar" in ergebnisse[0][1]["fehler"]
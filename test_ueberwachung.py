@@ -0,0 +1,119 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ueberwachung
+
+KATEGORIEN = {"Stufe": ["A", "B", "C"]}
+
+
+def _daten(n, seed, verschiebung=0.0, anteile=(0.5, 0.3, 0.2)):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "Gehalt": rng.normal(4000 + verschiebung, 800, n),
+        "Stufe": rng.choice(3, n, p=anteile).astype(np.float32),
+    })
+    scores = np.clip(rng.normal(60 + verschiebung / 100, 15, n), 0, 100)
+    return X, scores
+
+
+@pytest.fixture(scope="module")
+def basis():
+    X, scores = _daten(20000, seed=1)
+    return ueberwachung.Profil.aus_training(X, KATEGORIEN, scores=scores)
+
+
+def _profil(basis, *args, **kwargs):
+    X, scores = _daten(*args, **kwargs)
+    return basis.leer().erfassen(X, scores)
+
+
+def test_psi_identischer_verteilungen():
+    zaehler = np.array([10, 20, 30, 40])
+    assert ueberwachung.psi(zaehler, zaehler) == 0.0
+    assert ueberwachung.psi(zaehler, zaehler * 7) == pytest.approx(0.0, abs=1e-3)
+
+
+def test_psi_bekannter_wert():
+    erwartet = np.array([500, 500]) - 0.5
+    beobachtet = np.array([800, 200]) - 0.5
+    assert ueberwachung.psi(erwartet, beobachtet) == pytest.approx(0.3 * np.log(4), rel=1e-9)
+
+
+def test_gleiche_verteilung_ohne_drift(basis):
+    vergleich = ueberwachung.vergleichen(basis, _profil(basis, 5000, seed=2))
+    assert (vergleich["PSI"] < ueberwachung.PSI_BEOBACHTEN).all()
+    assert set(vergleich["Status"]) == {"ok"}
+    assert ueberwachung.auffaelligkeiten(vergleich) == {}
+
+
+def test_basis_mit_sich_selbst(basis):
+    vergleich = ueberwachung.vergleichen(basis, basis)
+    np.testing.assert_allclose(vergleich["PSI"], 0.0, atol=1e-12)
+
+
+def test_verschobene_verteilung_meldet_drift(basis):
+    vergleich = ueberwachung.vergleichen(basis, _profil(basis, 5000, seed=2, verschiebung=1500,
+                                                        anteile=(0.1, 0.3, 0.6)))
+    assert vergleich.loc["Gehalt", "PSI"] >= ueberwachung.PSI_DRIFT
+    assert vergleich.loc["Stufe", "PSI"] >= ueberwachung.PSI_DRIFT
+    assert ueberwachung.auffaelligkeiten(vergleich) == {
+        "Gehalt": "drift", "Stufe": "drift", ueberwachung.SCORE: "drift"}
+    assert vergleich.loc["Gehalt", "Mittelwert"] > vergleich.loc["Gehalt", "Mittelwert Basis"] + 1000
+
+
+def test_kleiner_stapel_ohne_status(basis):
+    vergleich = ueberwachung.vergleichen(basis, _profil(basis, 50, seed=2, verschiebung=1500))
+    assert set(vergleich["Status"]) == {"wenige Daten"}
+
+
+def test_stapel_addieren_und_speichern(basis, tmp_path):
+    teile = [_profil(basis, 1000, seed=s) for s in (3, 4, 5)]
+    gesamt = basis.leer()
+    for teil in teile:
+        gesamt.zusammenfuehren(teil)
+    assert gesamt.zeilen == 3000
+    assert sum(t.zaehler["Gehalt"].sum() for t in teile) == gesamt.zaehler["Gehalt"].sum()
+
+    gesamt.speichern(tmp_path)
+    geladen = ueberwachung.Profil.laden(tmp_path)
+    for name, zaehler in gesamt.zaehler.items():
+        np.testing.assert_array_equal(geladen.zaehler[name], zaehler)
+    assert geladen.mittelwert("Gehalt") == pytest.approx(gesamt.mittelwert("Gehalt"))
+
+
+def _stapel_schreiben(kennung, profil, anzahl):
+    for nummer in range(anzahl):
+        ueberwachung.protokollieren(kennung, profil, quelle=f"stapel-{nummer}")
+
+
+# Mehrere Prozesse schreiben gleichzeitig große Einträge: jede Zeile bleibt ganz
+def test_protokoll_gleichzeitig_aus_mehreren_prozessen(tmp_path, monkeypatch):
+    monkeypatch.setattr(ueberwachung, "UEBERWACHUNG_VERZEICHNIS", str(tmp_path))
+    monkeypatch.setattr(ueberwachung, "_protokoll", ueberwachung.Protokoll())
+    grenzen = {"Gehalt": np.linspace(0, 1, 20000)}
+    profil = ueberwachung.Profil(grenzen, KATEGORIEN).erfassen(
+        pd.DataFrame({"Gehalt": np.linspace(0, 1, 100), "Stufe": np.zeros(100)}))
+
+    kontext = multiprocessing.get_context("fork")
+    prozesse = [kontext.Process(target=_stapel_schreiben, args=("v1", profil, 10)) for _ in range(4)]
+    for prozess in prozesse:
+        prozess.start()
+    for prozess in prozesse:
+        prozess.join()
+    assert all(prozess.exitcode == 0 for prozess in prozesse)
+
+    eintraege = ueberwachung.stapel("v1")
+    assert len(eintraege) == 40
+    assert all(eintrag[2].zeilen == 100 for eintrag in eintraege)
+
+
+def test_protokoll_kuerzen(tmp_path, monkeypatch):
+    monkeypatch.setattr(ueberwachung, "UEBERWACHUNG_VERZEICHNIS", str(tmp_path))
+    monkeypatch.setattr(ueberwachung, "_protokoll", ueberwachung.Protokoll())
+    monkeypatch.setattr(ueberwachung, "MAX_STAPEL", 8)
+    profil = ueberwachung.Profil({}, KATEGORIEN)
+    _stapel_schreiben("v1", profil, 11)
+    assert [quelle for _, quelle, _ in ueberwachung.stapel("v1")] == [f"stapel-{n}" for n in range(3, 11)]
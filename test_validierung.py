@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import validierung
+
+
+@pytest.mark.parametrize("text, wert", [
+    ("4.500", 4500.0),
+    ("4.500,00", 4500.0),
+    ("4.500,50", 4500.5),
+    ("1.234.567", 1234567.0),
+    ("-1.000", -1000.0),
+    ("3500 €", 3500.0),
+    ("3.500 €", 3500.0),
+    ("4500,5", 4500.5),
+    ("4500.5", 4500.5),
+    ("12.50", 12.5),
+    ("1.5", 1.5),
+])
+def test_zahlen_deutsches_format(text, wert):
+    werte, fehler = validierung.zahlen(pd.Series([text], dtype=object))
+    assert werte.iloc[0] == wert
+    assert not fehler.any()
+
+
+def test_zahlen_fehler_und_fehlende_werte():
+    werte, fehler = validierung.zahlen(pd.Series(["abc", "4.50.0", None, ""], dtype=object))
+    assert werte.isna().all()
+    np.testing.assert_array_equal(fehler, [True, True, False, False])
@@ -0,0 +1,53 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import benchmark
+import prognose_tool_ethisch
+import wald_engine
+
+
+@pytest.fixture(scope="module")
+def daten():
+    X, y, _, _ = prognose_tool_ethisch._vorbereiten(benchmark.erzeuge_daten(3000, seed=1), True)
+    X_neu, _, _, _ = prognose_tool_ethisch._vorbereiten(benchmark.erzeuge_daten(2000, seed=2), True)
+    return X, y, X_neu
+
+
+@pytest.mark.parametrize("parameter", [
+    {"n_estimators": 30},
+    {"n_estimators": 30, "max_depth": 4},
+    {"n_estimators": 10, "min_samples_leaf": 20, "max_features": None},
+])
+def test_pruefen_wie_predict_proba(daten, parameter):
+    X, y, X_neu = daten
+    model = RandomForestClassifier(random_state=42, **parameter).fit(X, y)
+    assert wald_engine.pruefen(model, X)
+    assert wald_engine.pruefen(model, X_neu)
+
+
+def test_blockgrenzen_und_einzelzeile(daten, monkeypatch):
+    X, y, X_neu = daten
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    monkeypatch.setattr(wald_engine, "BLOCKGROESSE", 7)
+    assert wald_engine.pruefen(model, X_neu.iloc[:50])
+    assert wald_engine.pruefen(model, X_neu.iloc[:1])
+    assert wald_engine.pruefen(model, X_neu.iloc[:1].to_numpy())
+
+
+def test_gespeichert_per_mmap(daten, tmp_path):
+    X, y, X_neu = daten
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    wald_engine.KompilierterWald.aus_modell(model).speichern(tmp_path / "wald")
+    wald = wald_engine.KompilierterWald.laden(tmp_path / "wald")
+    assert wald_engine.pruefen(model, X_neu, wald)
+    np.testing.assert_array_equal(wald.classes_, model.classes_)
+
+
+def test_gespeichertes_altmodell():
+    model = joblib.load(prognose_tool_ethisch.modell_store.MODELL_PFAD)
+    df = pd.read_excel("Datensatz HR-20240606 - Testdaten Stand 11062024.xlsx")
+    X, _, _, _ = prognose_tool_ethisch._vorbereiten(df, False)
+    assert wald_engine.pruefen(model, X)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import einlesen
+import prognose_tool_ethisch
+
+# Maximal gespeicherte (abgeschlossene) Jobs in der Jobtabelle
+MAX_JOBS = 20
+
+WARTEND = "wartend"
+LAEUFT = "läuft"
+FERTIG = "fertig"
+FEHLER = "fehler"
+
+
+# Lokaler Job-Scheduler für das Modelltraining. Ein einzelner Worker-Thread
+# sorgt dafür, dass sich Trainingsläufe nie überlappen; identische Einreichungen
+# (gleicher Datensatz-Hash und gleiche Parameter) werden zusammengeführt.
+class TrainingsJobs:
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="training")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def einreichen(self, df, **parameter):
+        schluessel = (einlesen.datensatz_hash(df), tuple(sorted(parameter.items())))
+        with self._lock:
+            for job in self._jobs.values():
+                if job["schluessel"] == schluessel and job["status"] in (WARTEND, LAEUFT):
+                    return job["id"]
+
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                "id": job_id,
+                "schluessel": schluessel,
+                "datensatz_hash": schluessel[0],
+                "status": WARTEND,
+                "phase": "In Warteschlange",
+                "fortschritt": 0.0,
+                "eingereicht": time.time(),
+                "gestartet": None,
+                "beendet": None,
+                "fehler": None,
+                "model": None,
+            }
+            self._aufraeumen()
+        self._executor.submit(self._ausfuehren, job_id, df, parameter)
+        return job_id
+
+    def _ausfuehren(self, job_id, df, parameter):
+        self._aktualisieren(job_id, status=LAEUFT, gestartet=time.time())
+
+        def fortschritt(phase, anteil):
+            self._aktualisieren(job_id, phase=phase, fortschritt=anteil)
+
+        try:
+            model = prognose_tool_ethisch.trainiere_modell(df, fortschritt=fortschritt, **parameter)
+            self._aktualisieren(job_id, status=FERTIG, phase="Abgeschlossen", fortschritt=1.0,
+                                model=model, beendet=time.time())
+        except Exception as e:
+            self._aktualisieren(job_id, status=FEHLER, phase="Fehlgeschlagen", fehler=str(e),
+                                beendet=time.time())
+
+    def _aktualisieren(self, job_id, **werte):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(werte)
+
+    # Älteste abgeschlossene Jobs entfernen (Aufruf unter Lock)
+    def _aufraeumen(self):
+        abgeschlossen = [j for j, job in self._jobs.items() if job["status"] in (FERTIG, FEHLER)]
+        while len(self._jobs) > MAX_JOBS and abgeschlossen:
+            del self._jobs[abgeschlossen.pop(0)]
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def jobs(self):
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+# Prozessweite Instanz, damit alle Streamlit-Sitzungen dieselbe Jobtabelle sehen
+_jobs = TrainingsJobs()
+
+
+def einreichen(df, **parameter):
+    return _jobs.einreichen(df, **parameter)
+
+
+def status(job_id):
+    return _jobs.status(job_id)
+
+
+def jobs():
+    return _jobs.jobs()
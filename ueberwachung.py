@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import json
+import contextlib
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+import einlesen
+import messung
+
+# Überwachung der bewerteten Daten auf Drift gegenüber den Trainingsdaten.
+# Jede Variable wird als Häufigkeitsverteilung über feste Klassen geführt:
+# Gehälter über die Quantilgrenzen der Trainingsdaten, Kategorien über ihre
+# Codes, der Eignungs-Score über 5-Prozent-Klassen. Ein Profil hat damit
+# konstante Größe, wird pro Stapel mit searchsorted/bincount fortgeschrieben
+# und lässt sich addieren (Stapel -> Zeitraum). Der Vergleich mit der beim
+# Training gespeicherten Basis erfolgt über den Population Stability Index.
+
+# Ohne PROGNOSE_UEBERWACHUNG_DIR liegen die Stapelprotokolle im Ingestion-Cache
+UEBERWACHUNG_VERZEICHNIS = os.environ.get("PROGNOSE_UEBERWACHUNG_DIR")
+# PROGNOSE_UEBERWACHUNG=0 schaltet die Erfassung ab
+AKTIV = os.environ.get("PROGNOSE_UEBERWACHUNG", "1") != "0"
+
+SCORE = "Eignungs-Score (%)"
+SCORE_GRENZEN = np.arange(5.0, 100.0, 5.0)
+# Quantile der Trainingsdaten als Klassengrenzen für stetige Merkmale
+QUANTILE = np.arange(0.05, 1.0, 0.05)
+# Schwellen für den PSI: ab 0.1 beobachten, ab 0.25 deutliche Drift
+PSI_BEOBACHTEN = 0.1
+PSI_DRIFT = 0.25
+# Darunter ist der PSI zu stark vom Zufall geprägt; kein Status (Zeitraum auswerten)
+MIN_ZEILEN = 200
+# Obergrenze je Protokoll; beim Überschreiten werden die ältesten Stapel verworfen,
+# bis drei Viertel der Grenze erreicht sind
+MAX_STAPEL = 10_000
+# Protokolle höchstens so vieler Modellversionen; die am längsten nicht mehr
+# fortgeschriebenen werden gelöscht
+MAX_PROTOKOLLE = 20
+
+
+# Population Stability Index zweier Häufigkeitsverteilungen über dieselben Klassen;
+# leere Klassen werden mit einer halben Beobachtung geglättet
+def psi(erwartet, beobachtet):
+    erwartet = np.asarray(erwartet, dtype=np.float64) + 0.5
+    beobachtet = np.asarray(beobachtet, dtype=np.float64) + 0.5
+    p = erwartet / erwartet.sum()
+    q = beobachtet / beobachtet.sum()
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+# Anzahl je Klasse; Klasse i umfasst [grenzen[i-1], grenzen[i]), die äußeren Klassen
+# sind offen (wie bincount(searchsorted(grenzen, werte, side="right")), aber
+# np.histogram sortiert blockweise und sucht nur die Grenzen: deutlich schneller)
+def _klassen_zaehlen(werte, grenzen):
+    return np.histogram(werte, bins=np.concatenate(([-np.inf], grenzen, [np.inf])))[0]
+
+
+def _status(wert):
+    if wert >= PSI_DRIFT:
+        return "drift"
+    if wert >= PSI_BEOBACHTEN:
+        return "beobachten"
+    return "ok"
+
+
+# Kompakte Zusammenfassung eines oder mehrerer Stapel
+#   grenzen:    {Merkmal: Klassengrenzen} für stetige Merkmale
+#   kategorien: {Merkmal: Liste der Klassen} (Spaltenwert = Code in der Merkmalsmatrix)
+class Profil:
+    def __init__(self, grenzen, kategorien, zaehler=None, zeilen=0, ungueltig=0, summen=None):
+        self.grenzen = {name: np.asarray(g, dtype=np.float64) for name, g in grenzen.items()}
+        self.kategorien = {name: list(k) for name, k in kategorien.items()}
+        leer = {name: np.zeros(len(g) + 1, dtype=np.int64) for name, g in self.grenzen.items()}
+        leer.update({name: np.zeros(len(k), dtype=np.int64) for name, k in self.kategorien.items()})
+        leer[SCORE] = np.zeros(len(SCORE_GRENZEN) + 1, dtype=np.int64)
+        if zaehler is not None:
+            leer.update({name: np.asarray(z, dtype=np.int64) for name, z in zaehler.items()})
+        self.zaehler = leer
+        self.zeilen = int(zeilen)
+        self.ungueltig = int(ungueltig)
+        # Summe und Quadratsumme je stetigem Merkmal (Mittelwert, Streuung)
+        self.summen = {name: np.asarray((summen or {}).get(name, (0.0, 0.0)), dtype=np.float64)
+                       for name in self.grenzen}
+
+    # Basis aus den Trainingsdaten: Klassengrenzen aus deren Quantilen
+    @classmethod
+    def aus_training(cls, X, kategorien, scores=None, ungueltig=0):
+        grenzen = {}
+        for name in X.columns:
+            if name not in kategorien:
+                werte = X[name].to_numpy(dtype=np.float64)
+                grenzen[name] = np.unique(np.quantile(werte, QUANTILE)) if len(werte) else np.zeros(0)
+        profil = cls(grenzen, kategorien)
+        profil.erfassen(X, scores, ungueltig)
+        return profil
+
+    # Leeres Profil mit denselben Klassen (für neue Stapel)
+    def leer(self):
+        return Profil(self.grenzen, self.kategorien)
+
+    # Stapel fortschreiben: X ist die Merkmalsmatrix der gültigen Zeilen
+    # (Kategorien als Codes), scores deren Eignungs-Scores
+    def erfassen(self, X, scores=None, ungueltig=0):
+        with messung.stufe("ueberwachung_erfassen", zeilen=len(X)):
+            for name, grenzen in self.grenzen.items():
+                werte = X[name].to_numpy(dtype=np.float64)
+                self.zaehler[name] += _klassen_zaehlen(werte, grenzen)
+                self.summen[name] += (werte.sum(), np.square(werte).sum())
+            for name, klassen in self.kategorien.items():
+                codes = X[name].to_numpy().astype(np.int64)
+                self.zaehler[name] += np.bincount(codes, minlength=len(klassen))[:len(klassen)]
+            if scores is not None:
+                werte = np.asarray(scores, dtype=np.float64)
+                fehlend = np.isnan(werte)
+                if fehlend.any():
+                    werte = werte[~fehlend]
+                self.zaehler[SCORE] += _klassen_zaehlen(werte, SCORE_GRENZEN)
+            self.zeilen += len(X)
+            self.ungueltig += int(ungueltig)
+        return self
+
+    def zusammenfuehren(self, anderes):
+        for name, zaehler in anderes.zaehler.items():
+            self.zaehler[name] = self.zaehler[name] + zaehler
+        for name, summen in anderes.summen.items():
+            self.summen[name] = self.summen[name] + summen
+        self.zeilen += anderes.zeilen
+        self.ungueltig += anderes.ungueltig
+        return self
+
+    def mittelwert(self, name):
+        return float(self.summen[name][0] / self.zeilen) if self.zeilen else float("nan")
+
+    # Näherungsquantil aus der Klassenverteilung (linear innerhalb der Klasse;
+    # die äußeren Klassen werden an der ersten bzw. letzten Grenze abgeschnitten)
+    def quantil(self, name, q):
+        grenzen = SCORE_GRENZEN if name == SCORE else self.grenzen[name]
+        zaehler = self.zaehler[name]
+        if zaehler.sum() == 0 or len(grenzen) == 0:
+            return float("nan")
+        kumuliert = np.cumsum(zaehler) / zaehler.sum()
+        klasse = int(np.searchsorted(kumuliert, q, side="left"))
+        links = grenzen[max(klasse - 1, 0)]
+        rechts = grenzen[min(klasse, len(grenzen) - 1)]
+        davor = kumuliert[klasse - 1] if klasse > 0 else 0.0
+        anteil = (q - davor) / zaehler[klasse] * zaehler.sum() if zaehler[klasse] else 0.0
+        return float(links + (rechts - links) * min(max(anteil, 0.0), 1.0))
+
+    def als_dict(self):
+        return {
+            "zeilen": self.zeilen,
+            "ungueltig": self.ungueltig,
+            "grenzen": {name: g.tolist() for name, g in self.grenzen.items()},
+            "kategorien": self.kategorien,
+            "zaehler": {name: z.tolist() for name, z in self.zaehler.items()},
+            "summen": {name: s.tolist() for name, s in self.summen.items()},
+        }
+
+    @classmethod
+    def aus_dict(cls, daten):
+        return cls(daten["grenzen"], daten["kategorien"], daten["zaehler"],
+                   daten["zeilen"], daten["ungueltig"], daten["summen"])
+
+    # Artefakt-Schnittstelle des Modellspeichers (siehe modell_store.speichern)
+    def speichern(self, verzeichnis):
+        os.makedirs(verzeichnis, exist_ok=True)
+        with open(os.path.join(verzeichnis, "basis.json"), "w", encoding="utf-8") as f:
+            json.dump(self.als_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def laden(cls, verzeichnis):
+        with open(os.path.join(verzeichnis, "basis.json"), encoding="utf-8") as f:
+            return cls.aus_dict(json.load(f))
+
+
+# Vergleich eines Profils mit der Basis: PSI und Status je Variable, für stetige
+# Merkmale zusätzlich Mittelwert und Median in Basis und Stapel
+def vergleichen(basis, profil):
+    zeilen = []
+    for name in basis.zaehler:
+        eintrag = {"Merkmal": name, "PSI": psi(basis.zaehler[name], profil.zaehler[name])}
+        # Ohne Werte in Basis oder Stapel ist kein Vergleich möglich
+        if profil.zaehler[name].sum() == 0 or basis.zaehler[name].sum() == 0:
+            eintrag["PSI"] = float("nan")
+        if name in basis.grenzen:
+            eintrag.update({"Mittelwert Basis": basis.mittelwert(name), "Mittelwert": profil.mittelwert(name),
+                            "Median Basis": basis.quantil(name, 0.5), "Median": profil.quantil(name, 0.5)})
+        elif name == SCORE:
+            eintrag.update({"Median Basis": basis.quantil(name, 0.5), "Median": profil.quantil(name, 0.5)})
+        zeilen.append(eintrag)
+    ergebnis = pd.DataFrame(zeilen).set_index("Merkmal")
+    ergebnis["Status"] = [_status(w) if not np.isnan(w) else "" for w in ergebnis["PSI"]]
+    anzahl = np.array([profil.zaehler[name].sum() for name in ergebnis.index])
+    ergebnis.loc[anzahl < MIN_ZEILEN, "Status"] = "wenige Daten"
+    return ergebnis
+
+
+# Kurzfassung für Ergebnis-Attribute und Hinweise: {Variable: Status} für
+# Variablen mit Status "beobachten" oder "drift"
+def auffaelligkeiten(vergleich):
+    return {name: status for name, status in vergleich["Status"].items() if status in ("beobachten", "drift")}
+
+
+# Stapelprotokoll je Modellversion: eine JSON-Zeile pro bewertetem Stapel
+# (Zeitpunkt, Quelle, Profil). Im Speicher wird nichts angesammelt; für
+# Auswertungen werden die Zeilen gelesen und addiert. Länge und Anzahl der
+# Protokolle sind begrenzt (MAX_STAPEL, MAX_PROTOKOLLE). Schreiben und Kürzen
+# erfolgen unter einer Dateisperre, gleichzeitige Prozesse verzahnen keine Zeilen.
+class Protokoll:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Pfad -> Anzahl Zeilen (einmal je Prozess gezählt, dann fortgeschrieben)
+        self._zeilen = {}
+
+    def _verzeichnis(self):
+        return UEBERWACHUNG_VERZEICHNIS or os.path.join(einlesen.CACHE_VERZEICHNIS, "ueberwachung")
+
+    def _pfad(self, kennung):
+        return os.path.join(self._verzeichnis(), f"{kennung}.jsonl")
+
+    # Sperre über Prozessgrenzen hinweg (Worker von --prozesse, parallele CLI- und
+    # App-Läufe): fcntl-Dateisperre auf das Protokollverzeichnis, solange sie
+    # gehalten wird; ohne fcntl (Windows) nur der Thread-Lock
+    @contextlib.contextmanager
+    def _gesperrt(self):
+        with self._lock, open(os.path.join(self._verzeichnis(), ".sperre"), "a") as sperre:
+            try:
+                import fcntl
+            except ImportError:
+                fcntl = None
+            if fcntl is not None:
+                fcntl.flock(sperre, fcntl.LOCK_EX)
+            yield
+
+    def schreiben(self, kennung, profil, quelle=None):
+        eintrag = {"zeitpunkt": time.strftime("%Y-%m-%d %H:%M:%S"), "quelle": quelle, **profil.als_dict()}
+        zeile = (json.dumps(eintrag, ensure_ascii=False) + "\n").encode("utf-8")
+        pfad = self._pfad(kennung)
+        try:
+            os.makedirs(os.path.dirname(pfad), exist_ok=True)
+            with self._gesperrt():
+                if pfad not in self._zeilen:
+                    self._zeilen[pfad] = self._zaehlen(pfad)
+                    self._begrenzen_versionen(pfad)
+                # Eine Zeile, ein write mit O_APPEND
+                fd = os.open(pfad, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, zeile)
+                finally:
+                    os.close(fd)
+                self._zeilen[pfad] += 1
+                if self._zeilen[pfad] > MAX_STAPEL:
+                    self._kuerzen(pfad)
+        except OSError:
+            # Nicht beschreibbares Verzeichnis: Bewertung nicht behindern
+            pass
+
+    def _zaehlen(self, pfad):
+        try:
+            with open(pfad, encoding="utf-8") as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    # Nur die jüngsten Stapel behalten; atomar ersetzt
+    def _kuerzen(self, pfad):
+        with open(pfad, encoding="utf-8") as f:
+            zeilen = f.readlines()[-(MAX_STAPEL * 3 // 4):]
+        tmp_pfad = f"{pfad}.{os.getpid()}.tmp"
+        with open(tmp_pfad, "w", encoding="utf-8") as f:
+            f.writelines(zeilen)
+        os.replace(tmp_pfad, pfad)
+        self._zeilen[pfad] = len(zeilen)
+
+    # Protokolle der am längsten nicht fortgeschriebenen Versionen löschen
+    def _begrenzen_versionen(self, behalten):
+        verzeichnis = self._verzeichnis()
+        protokolle = []
+        for name in os.listdir(verzeichnis):
+            pfad = os.path.join(verzeichnis, name)
+            if name.endswith(".jsonl") and pfad != behalten:
+                try:
+                    protokolle.append((os.stat(pfad).st_mtime, pfad))
+                except FileNotFoundError:
+                    pass
+        for _, pfad in sorted(protokolle)[:max(0, len(protokolle) - (MAX_PROTOKOLLE - 1))]:
+            try:
+                os.remove(pfad)
+            except FileNotFoundError:
+                pass
+            self._zeilen.pop(pfad, None)
+
+    # Einträge (Zeitpunkt, Quelle, Profil), optional nur die letzten n
+    def lesen(self, kennung, letzte=None):
+        try:
+            with open(self._pfad(kennung), encoding="utf-8") as f:
+                zeilen = f.readlines()
+        except FileNotFoundError:
+            return []
+        if letzte is not None:
+            zeilen = zeilen[-letzte:]
+        eintraege = []
+        for zeile in zeilen:
+            daten = json.loads(zeile)
+            eintraege.append((daten["zeitpunkt"], daten.get("quelle"), Profil.aus_dict(daten)))
+        return eintraege
+
+    def leeren(self, kennung):
+        with self._lock:
+            self._zeilen.pop(self._pfad(kennung), None)
+            try:
+                os.remove(self._pfad(kennung))
+            except FileNotFoundError:
+                pass
+
+
+# Globale Instanz für CLI und Streamlit-Interface
+_protokoll = Protokoll()
+
+
+def protokollieren(kennung, profil, quelle=None):
+    _protokoll.schreiben(kennung, profil, quelle)
+
+
+def stapel(kennung, letzte=None):
+    return _protokoll.lesen(kennung, letzte)
+
+
+# Alle (bzw. die letzten n) Stapel einer Modellversion zu einem Profil addiert
+def zeitraum(kennung, basis, letzte=None):
+    gesamt = basis.leer()
+    for _, _, profil in stapel(kennung, letzte):
+        gesamt.zusammenfuehren(profil)
+    return gesamt
+
+
+def protokoll_leeren(kennung):
+    _protokoll.leeren(kennung)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+# Gemeinsame Prüfung und Normalisierung der Bewerberdaten für formula_score und
+# prognose_tool_ethisch. Jede Spalte wird in einem vektorisierten Durchlauf
+# bereinigt (Leerraum, Dezimalkomma, Groß-/Kleinschreibung, Datumsformate);
+# ungültige Werte werden nicht mit einer Ausnahme quittiert, sondern je Zeile
+# gemeldet, damit die gültigen Zeilen weiterverarbeitet werden können.
+
+GEHALT_AKTUELL = "Monatsgehalt aktuell/ bzw. zuletz bezogenes Gehalt"
+GEHALT_EINSTIEG = "Monatsgehalt Einstieg"
+
+ZAHL = "zahl"
+DATUM = "datum"
+
+# Spalte -> ZAHL, DATUM oder Liste der erlaubten Codes
+SCHEMA = {
+    GEHALT_AKTUELL: ZAHL,
+    GEHALT_EINSTIEG: ZAHL,
+    "Fehlzeiten (Monaten)": ZAHL,
+    "Einstellungsdatum": DATUM,
+    "Kündigungsdatum": DATUM,
+    "Qualifikationstufe": ["A", "H", "M", "S"],
+    "Schulabschluss": ["AS", "MS", "OS"],
+    "Berufabschluss": ["HW", "K", "O", "ST"],
+}
+# Schreibvarianten, die auf einen erlaubten Code abgebildet werden
+ALIASE = {"Schulabschluss": {"O": "OS"}}
+
+# Ungültige Eingabedaten (Fehler des Aufrufers, nicht des Modells); Unterklasse von
+# ValueError, damit bestehende Aufrufer sie weiterhin abfangen
+class Eingabefehler(ValueError):
+    pass
+
+
+_DEUTSCHES_DATUM = r"^\d{1,2}\.\d{1,2}\.\d{4}$"
+_TAUSENDERGRUPPEN = r"-?\d{1,3}(?:\.\d{3})+"
+
+
+def _leer(spalte, text):
+    return (spalte.isna() | text.eq("")).to_numpy()
+
+
+# Zahlen, auch als Text mit Dezimalkomma ("4.500,50"), Leerraum oder Eurozeichen.
+# Liefert (Werte als float64, Fehlermaske); fehlende Werte sind kein Fehler.
+def zahlen(spalte):
+    if pd.api.types.is_numeric_dtype(spalte):
+        return spalte.astype(float), np.zeros(len(spalte), dtype=bool)
+    text = spalte.astype(str).str.replace(r"[\s€\xa0]", "", regex=True)
+    # Mit Komma oder in Dreiergruppen ("4.500", "1.234.567"): Punkt ist
+    # Tausender-, Komma Dezimaltrenner
+    deutsch = (text.str.contains(",", regex=False, na=False)
+               | text.str.fullmatch(_TAUSENDERGRUPPEN, na=False))
+    text = text.where(~deutsch, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    werte = pd.to_numeric(text, errors="coerce").astype(float)
+    return werte, werte.isna().to_numpy() & ~_leer(spalte, text)
+
+
+# Datumswerte (Excel-Datum, ISO-Text oder TT.MM.JJJJ); liefert (Werte, Fehlermaske)
+def daten(spalte):
+    if pd.api.types.is_datetime64_any_dtype(spalte):
+        return spalte, np.zeros(len(spalte), dtype=bool)
+    text = spalte.astype(str).str.strip()
+    deutsch = text.str.match(_DEUTSCHES_DATUM, na=False)
+    werte = pd.to_datetime(text.where(~deutsch), errors="coerce", format="mixed")
+    if deutsch.any():
+        werte[deutsch] = pd.to_datetime(text[deutsch], errors="coerce", format="%d.%m.%Y")
+    return werte, werte.isna().to_numpy() & ~_leer(spalte, text)
+
+
+# Kategorische Codes: einmal faktorisieren, normalisiert (strip, Großschreibung,
+# Aliase) werden nur die unterschiedlichen Werte. Liefert (Series mit
+# Categorical über erlaubt, Code = Position in erlaubt; Fehlermaske).
+def kategorie(spalte, erlaubt, aliase=None):
+    roh = pd.Categorical(spalte)
+    normiert = pd.Index(roh.categories.astype(str)).str.strip().str.upper()
+    if aliase:
+        normiert = pd.Index([aliase.get(wert, wert) for wert in normiert])
+    # Letzter Eintrag fängt fehlende Werte (Code -1) ab
+    abbildung = np.append(pd.Index(erlaubt).get_indexer(normiert), -1)
+    leer = np.append(normiert == "", True)
+    codes = abbildung[roh.codes]
+    werte = pd.Series(pd.Categorical.from_codes(codes, categories=erlaubt), index=spalte.index, name=spalte.name)
+    return werte, (codes < 0) & ~leer[roh.codes]
+
+
+# Alle Spalten des Schemas prüfen und normalisieren.
+# pflicht: Spalten, in denen ein fehlender Wert als Fehler zählt.
+# Rückgabe: (normalisierte Spalten, Fehlermasken je Spalte) als DataFrames mit
+# dem Index von df; fehlende Spalten führen zu einem Eingabefehler
+def pruefen(df, schema=None, pflicht=()):
+    schema = SCHEMA if schema is None else schema
+    fehlend = [spalte for spalte in schema if spalte not in df.columns]
+    if fehlend:
+        raise Eingabefehler(f"Fehlende Spalten: {fehlend}")
+    werte = {}
+    fehler = {}
+    for spalte, art in schema.items():
+        if art == ZAHL:
+            werte[spalte], fehler[spalte] = zahlen(df[spalte])
+        elif art == DATUM:
+            werte[spalte], fehler[spalte] = daten(df[spalte])
+        else:
+            werte[spalte], fehler[spalte] = kategorie(df[spalte], list(art), ALIASE.get(spalte))
+        if spalte in pflicht:
+            fehler[spalte] = fehler[spalte] | werte[spalte].isna().to_numpy()
+    return pd.DataFrame(werte, index=df.index), pd.DataFrame(fehler, index=df.index)
+
+
+def _meldung(spalte, art, wert):
+    if pd.isna(wert) or str(wert).strip() == "":
+        return "Wert fehlt"
+    if art == ZAHL:
+        return "keine gültige Zahl"
+    if art == DATUM:
+        return "kein gültiges Datum"
+    return f"unbekannter Wert (erlaubt: {', '.join(art)})"
+
+
+# Fehlerbericht im Langformat: eine Zeile je fehlerhaftem Wert
+# (Zeile = Index des Eingaberahmens, Spalte, Originalwert, Meldung)
+def bericht(df, fehler, schema=None):
+    schema = SCHEMA if schema is None else schema
+    teile = []
+    for spalte in fehler.columns:
+        maske = fehler[spalte].to_numpy()
+        if maske.any():
+            originale = df[spalte][maske]
+            teile.append(pd.DataFrame({
+                "Zeile": originale.index,
+                "Spalte": spalte,
+                "Wert": originale.astype(object).to_numpy(),
+                "Fehler": [_meldung(spalte, schema[spalte], w) for w in originale],
+            }))
+    if not teile:
+        return pd.DataFrame(columns=["Zeile", "Spalte", "Wert", "Fehler"])
+    return pd.concat(teile, ignore_index=True)
+
+
+# Meldungen je Zeile zusammengefasst ("Spalte: Meldung; ..."), leer für gültige Zeilen
+def fehler_je_zeile(fehlerbericht, index):
+    if fehlerbericht.empty:
+        return pd.Series("", index=index)
+    texte = fehlerbericht["Spalte"] + ": " + fehlerbericht["Fehler"]
+    return texte.groupby(fehlerbericht["Zeile"].to_numpy(), sort=False).agg("; ".join).reindex(index).fillna("")
+
+
+# Kurzfassung für Ausnahmen und Logs
+def fehlertext(fehlerbericht, max_eintraege=10):
+    teile = [f"Zeile {z}, Spalte '{s}': {f} ({w!r})"
+             for z, s, w, f in fehlerbericht.head(max_eintraege).itertuples(index=False)]
+    if len(fehlerbericht) > max_eintraege:
+        teile.append(f"... und {len(fehlerbericht) - max_eintraege} weitere")
+    return "; ".join(teile)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import json
+import numpy as np
+
+# Zeilen pro Block bei der Traversierung (begrenzt die (Zeilen x Bäume)-Hilfsarrays)
+BLOCKGROESSE = 8192
+
+_ARRAYS = ("feature", "schwelle", "links", "rechts", "blatt_proba", "wurzeln")
+
+
+# RandomForest als flache NumPy-Knotenarrays. Alle Bäume liegen hintereinander in
+# denselben Arrays; Blätter zeigen auf sich selbst, sodass eine feste Anzahl
+# Schritte (maximale Baumtiefe) für alle Zeilen und Bäume gleichzeitig genügt.
+# predict_proba ist bitgenau identisch mit sklearn (gleiche float32-Eingabe,
+# gleiche Normierung der Blattwerte, gleiche Summationsreihenfolge über die Bäume).
+class KompilierterWald:
+    def __init__(self, feature, schwelle, links, rechts, blatt_proba, wurzeln, klassen, tiefe):
+        self.feature = feature
+        self.schwelle = schwelle
+        self.links = links
+        self.rechts = rechts
+        self.blatt_proba = blatt_proba
+        self.wurzeln = wurzeln
+        self.classes_ = np.asarray(klassen)
+        self.tiefe = int(tiefe)
+
+    @classmethod
+    def aus_modell(cls, model):
+        feature, schwelle, links, rechts, proba, wurzeln = [], [], [], [], [], []
+        versatz = 0
+        tiefe = 0
+        for baum in model.estimators_:
+            t = baum.tree_
+            n = t.node_count
+            ist_blatt = t.children_left == -1
+            eigene = np.arange(n, dtype=np.int32)
+
+            feature.append(np.where(ist_blatt, 0, t.feature).astype(np.int32))
+            schwelle.append(t.threshold.astype(np.float64))
+            links.append((np.where(ist_blatt, eigene, t.children_left) + versatz).astype(np.int32))
+            rechts.append((np.where(ist_blatt, eigene, t.children_right) + versatz).astype(np.int32))
+
+            # Normierung wie DecisionTreeClassifier.predict_proba
+            werte = t.value[:, 0, :model.n_classes_].astype(np.float64)
+            normierer = werte.sum(axis=1)[:, np.newaxis]
+            normierer[normierer == 0.0] = 1.0
+            proba.append(werte / normierer)
+
+            wurzeln.append(versatz)
+            versatz += n
+            tiefe = max(tiefe, t.max_depth)
+
+        return cls(np.concatenate(feature), np.concatenate(schwelle), np.concatenate(links),
+                   np.concatenate(rechts), np.ascontiguousarray(np.concatenate(proba)),
+                   np.asarray(wurzeln, dtype=np.int32), model.classes_, tiefe)
+
+    # Blattknoten je Zeile und Baum (auch für erklaerung.Erklaerer)
+    def blaetter(self, X):
+        knoten = np.broadcast_to(self.wurzeln, (X.shape[0], len(self.wurzeln))).copy()
+        for _ in range(self.tiefe):
+            werte = np.take_along_axis(X, self.feature[knoten], axis=1)
+            knoten = np.where(werte <= self.schwelle[knoten], self.links[knoten], self.rechts[knoten])
+        return knoten
+
+    def predict_proba(self, X):
+        # sklearn rechnet intern mit float32-Eingaben
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        proba = np.zeros((X.shape[0], self.blatt_proba.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], BLOCKGROESSE):
+            block = slice(start, start + BLOCKGROESSE)
+            blaetter = self.blaetter(X[block])
+            summe = proba[block]
+            for b in range(blaetter.shape[1]):
+                summe += self.blatt_proba[blaetter[:, b]]
+        proba /= len(self.wurzeln)
+        return proba
+
+    def speichern(self, verzeichnis):
+        os.makedirs(verzeichnis, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(verzeichnis, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(verzeichnis, "wald.json"), "w", encoding="utf-8") as f:
+            json.dump({"klassen": self.classes_.tolist(), "tiefe": self.tiefe}, f)
+
+    # Mit mmap_mode="r" teilen sich alle Prozesse die Knotenarrays über den Page-Cache
+    @classmethod
+    def laden(cls, verzeichnis, mmap_mode="r"):
+        arrays = {name: np.load(os.path.join(verzeichnis, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in _ARRAYS}
+        with open(os.path.join(verzeichnis, "wald.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(klassen=meta["klassen"], tiefe=meta["tiefe"], **arrays)
+
+
+# Abgleich mit sklearn: True, wenn predict_proba bitgenau übereinstimmt
+def pruefen(model, X, wald=None):
+    wald = wald or KompilierterWald.aus_modell(model)
+    return np.array_equal(wald.predict_proba(X), model.predict_proba(X))